@@ -1,29 +1,1790 @@
-import tkinter as tk
-from tkinter import scrolledtext, messagebox, ttk
-from scapy.all import sniff, conf, Dot11, RadioTap, Dot11ProbeReq, Dot11ProbeResp, Dot11Beacon, Dot11Elt, Dot11Deauth, Dot11Auth, Dot11AssoReq, Dot11AssoResp
+import time
+STARTUP_T0 = time.perf_counter()  # Referência para o tempo até a primeira pintura da janela
+try:
+    import tkinter as tk
+    from tkinter import scrolledtext, messagebox, ttk
+except ImportError:  # Sensores sem interface gráfica (modo --headless)
+    tk = None
 import threading
+import argparse
+import contextlib
+import io
+import tempfile
+import signal
+import sys
 import datetime
 import os
-import time
-from queue import Queue
+from queue import Queue, Empty
 from collections import defaultdict
 import subprocess
 import sqlite3
 import webbrowser
+import heapq
+import itertools
 import json
 import random
 import re
+import math
+try:
+    import numpy as np
+except ImportError:  # Avaliação em lote do histórico cai para listas Python
+    np = None
+import socket
+import struct
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Camadas do scapy carregadas sob demanda (_load_scapy): scapy.all importa
+# todos os protocolos e atrasava a abertura da janela em quase um segundo
+sniff = Dot11 = RadioTap = Dot11ProbeReq = Dot11ProbeResp = Dot11Beacon = Dot11Elt = None
+Dot11Deauth = Dot11Auth = Dot11AssoReq = Dot11AssoResp = None
+_scapy_lock = threading.Lock()
+
+# getsockopt do Linux para PF_PACKET: struct tpacket_stats {tp_packets, tp_drops}
+SOL_PACKET = 263
+PACKET_STATISTICS = 6
+TPACKET_STATS = struct.Struct('II')
+
+
+def _load_scapy():
+    """Importa só scapy.layers.dot11 e o sniff; idempotente e seguro entre threads"""
+    global sniff, Dot11, RadioTap, Dot11ProbeReq, Dot11ProbeResp, Dot11Beacon, Dot11Elt
+    global Dot11Deauth, Dot11Auth, Dot11AssoReq, Dot11AssoResp
+    if sniff is not None:
+        return
+    with _scapy_lock:
+        if sniff is not None:
+            return
+        from scapy.layers import dot11
+        from scapy.sendrecv import sniff as scapy_sniff
+        Dot11, RadioTap, Dot11Elt = dot11.Dot11, dot11.RadioTap, dot11.Dot11Elt
+        Dot11ProbeReq, Dot11ProbeResp, Dot11Beacon = dot11.Dot11ProbeReq, dot11.Dot11ProbeResp, dot11.Dot11Beacon
+        Dot11Deauth, Dot11Auth = dot11.Dot11Deauth, dot11.Dot11Auth
+        Dot11AssoReq, Dot11AssoResp = dot11.Dot11AssoReq, dot11.Dot11AssoResp
+        sniff = scapy_sniff
+
+
+def _ensure_columns(cur, table, columns):
+    """Adiciona colunas ausentes em tabelas criadas por versões anteriores"""
+    cur.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cur.fetchall()}
+    for name, col_type in columns:
+        if name not in existing:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+
+
+RADIO_EWMA_ALPHA = 0.25
+
+
+def fold_radio_sample(device, signal, noise, rate):
+    """Acumula sinal/ruído/taxa de um quadro no registro do dispositivo (O(1))"""
+    if signal is not None:
+        if device.get('signal') is None:
+            device['signal'] = float(signal)
+            device['signal_min'] = device['signal_max'] = signal
+        else:
+            device['signal'] += RADIO_EWMA_ALPHA * (signal - device['signal'])
+            if signal < device['signal_min']:
+                device['signal_min'] = signal
+            if signal > device['signal_max']:
+                device['signal_max'] = signal
+    if noise is not None:
+        device['noise'] = float(noise) if device.get('noise') is None else \
+            device['noise'] + RADIO_EWMA_ALPHA * (noise - device['noise'])
+    if rate is not None:
+        device['rate'] = rate
+    device['frames'] = device.get('frames', 0) + 1
+
+
+def radio_summary(device):
+    """Valores suavizados prontos para gravar no banco"""
+    device = device or {}
+    signal = device.get('signal')
+    noise = device.get('noise')
+    return {
+        'signal': int(round(signal)) if signal is not None else None,
+        'signal_min': device.get('signal_min'),
+        'signal_max': device.get('signal_max'),
+        'noise': int(round(noise)) if noise is not None else None,
+        'rate': device.get('rate')
+    }
+
+
+class CommandResult:
+    """Saída de um comando externo, com resultados de parsers memorizados"""
+
+    def __init__(self, returncode, stdout="", stderr="", timed_out=False):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.timed_out = timed_out
+        self._parsed = {}
+
+    def parse(self, parser):
+        """Aplica parser(stdout) uma única vez por resultado em cache"""
+        if parser not in self._parsed:
+            self._parsed[parser] = parser(self.stdout)
+        return self._parsed[parser]
+
+
+class CommandRunner:
+    """Executa ferramentas do sistema com cache TTL, coalescência e timeout
+
+    Chamadas idênticas simultâneas esperam o mesmo processo; resultados com
+    ttl > 0 são reaproveitados até expirarem. Nenhuma chamada passa do timeout.
+    """
+
+    def __init__(self, default_timeout=5):
+        self.default_timeout = default_timeout
+        self._lock = threading.Lock()
+        self._cache = {}      # args -> (expira_em, CommandResult)
+        self._inflight = {}   # args -> [Event, CommandResult]
+        self._stats = defaultdict(lambda: {'spawns': 0, 'cache_hits': 0, 'coalesced': 0,
+                                           'timeouts': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+
+    def run(self, args, ttl=0, timeout=None):
+        """Executa args (lista) e retorna um CommandResult"""
+        key = tuple(args)
+        name = args[1] if args[0] == 'sudo' and len(args) > 1 else args[0]
+        now = time.monotonic()
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] > now:
+                self._stats[name]['cache_hits'] += 1
+                return cached[1]
+            inflight = self._inflight.get(key)
+            owner = inflight is None
+            if owner:
+                inflight = [threading.Event(), None]
+                self._inflight[key] = inflight
+            else:
+                self._stats[name]['coalesced'] += 1
+
+        if not owner:
+            inflight[0].wait()
+            return inflight[1]
+
+        started = time.monotonic()
+        result = self._spawn(args, timeout or self.default_timeout)
+        elapsed_ms = (time.monotonic() - started) * 1000
+
+        with self._lock:
+            stats = self._stats[name]
+            stats['spawns'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            if result.timed_out:
+                stats['timeouts'] += 1
+            elif ttl > 0:
+                self._cache[key] = (time.monotonic() + ttl, result)
+            del self._inflight[key]
+        inflight[1] = result
+        inflight[0].set()
+        return result
+
+    @staticmethod
+    def _spawn(args, timeout):
+        try:
+            proc = subprocess.run(args, capture_output=True, text=True, timeout=timeout)
+            return CommandResult(proc.returncode, proc.stdout, proc.stderr)
+        except subprocess.TimeoutExpired:
+            return CommandResult(-1, "", f"timeout após {timeout}s", timed_out=True)
+        except FileNotFoundError as e:
+            return CommandResult(127, "", str(e))
+        except Exception as e:
+            return CommandResult(-1, "", str(e))
+
+    def invalidate(self, command=None):
+        """Descarta o cache (de um comando específico ou de todos)"""
+        with self._lock:
+            if command is None:
+                self._cache.clear()
+            else:
+                for key in [k for k in self._cache if command in k]:
+                    del self._cache[key]
+
+    def get_stats(self):
+        """Contagem de processos, acertos de cache e latência por comando"""
+        with self._lock:
+            report = {}
+            for name, stats in self._stats.items():
+                report[name] = dict(stats)
+                report[name]['avg_ms'] = round(stats['total_ms'] / stats['spawns'], 1) if stats['spawns'] else 0
+            return report
+
+
+# Executor compartilhado pelas classes que chamam ferramentas do sistema
+system_commands = CommandRunner()
+
+
+class LatencyHistogram:
+    """Histograma log-linear (estilo HDR) mesclável para percentis de latência"""
+
+    def __init__(self, min_value=0.1, max_value=10000.0, precision=16):
+        self.min_value = min_value
+        self.max_value = max_value
+        # Cada bucket cobre ~1/precision do valor (erro relativo ~6% com 16)
+        self._log_ratio = math.log(1 + 1.0 / precision)
+        self.bucket_count = int(math.log(max_value / min_value) / self._log_ratio) + 2
+        self.counts = [0] * self.bucket_count
+        self.total = 0
+
+    def _index(self, value):
+        if value <= self.min_value:
+            return 0
+        index = int(math.log(value / self.min_value) / self._log_ratio) + 1
+        return min(index, self.bucket_count - 1)
+
+    def _upper_bound(self, index):
+        if index == 0:
+            return self.min_value
+        return self.min_value * math.exp(index * self._log_ratio)
+
+    def record(self, value):
+        self.counts[self._index(value)] += 1
+        self.total += 1
+
+    def remove(self, value):
+        """Desfaz um record(value) anterior (janelas deslizantes)"""
+        index = self._index(value)
+        if self.counts[index]:
+            self.counts[index] -= 1
+            self.total -= 1
+
+    def merge(self, other):
+        """Soma as contagens de outro histograma com a mesma configuração"""
+        for i, count in enumerate(other.counts):
+            if count:
+                self.counts[i] += count
+        self.total += other.total
+
+    def clear(self):
+        self.counts = [0] * self.bucket_count
+        self.total = 0
+
+    def percentile(self, p):
+        """Retorna o limite superior do bucket que contém o percentil p (0-100)
+
+        O primeiro bucket (valores até min_value, inclusive zeros) reporta 0.
+        """
+        if not self.total:
+            return 0
+        rank = max(1, int(math.ceil(self.total * p / 100.0)))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._upper_bound(i), self.max_value) if i else 0.0
+        return self.max_value
+
+    def to_json(self):
+        """Contagens não nulas como JSON compacto ({índice: contagem})"""
+        return json.dumps({i: count for i, count in enumerate(self.counts) if count}, separators=(',', ':'))
+
+    def load_json(self, text):
+        """Restaura contagens gravadas por to_json (mesma configuração)"""
+        self.clear()
+        for index, count in json.loads(text).items():
+            index = int(index)
+            if 0 <= index < self.bucket_count:
+                self.counts[index] += count
+                self.total += count
+
+
+class StreamingLatencyStats:
+    """Estatísticas de latência em janela deslizante com memória constante
+
+    - média/variância por Welford (com remoção da amostra mais antiga)
+    - jitter entre chegadas conforme RFC 3550 (J += (|D| - J) / 16)
+    - p50/p95/p99 de um LatencyHistogram que recebe cada amostra ao entrar
+      e a perde ao sair da janela: a janela é exata amostra a amostra, o
+      único erro é o do bucket (~6% relativo)
+    """
+
+    def __init__(self, window_size=120):
+        self.window_size = window_size
+        self.samples = deque(maxlen=window_size)  # RTTs em ms, None = perdido
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.lost = 0
+        self.jitter = 0.0
+        self._last_rtt = None
+        self._histogram = LatencyHistogram()
+
+    def record(self, rtt):
+        """Registra uma amostra de RTT em ms (None para pacote perdido)"""
+        if len(self.samples) == self.window_size:
+            self._forget(self.samples[0])
+        self.samples.append(rtt)
+
+        if rtt is None:
+            self.lost += 1
+            return
+
+        self.count += 1
+        delta = rtt - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (rtt - self.mean)
+
+        if self._last_rtt is not None:
+            d = abs(rtt - self._last_rtt)
+            self.jitter += (d - self.jitter) / 16.0
+        self._last_rtt = rtt
+
+        self._histogram.record(rtt)
+
+    def _forget(self, rtt):
+        if rtt is None:
+            self.lost -= 1
+            return
+        self._histogram.remove(rtt)
+        self.count -= 1
+        if self.count == 0:
+            self.mean = 0.0
+            self._m2 = 0.0
+            return
+        delta = rtt - self.mean
+        self.mean -= delta / self.count
+        self._m2 = max(0.0, self._m2 - delta * (rtt - self.mean))
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def packet_loss(self):
+        return (self.lost / len(self.samples)) * 100 if self.samples else 0.0
+
+    def percentile(self, p):
+        return self._histogram.percentile(p)
+
+    def reset(self):
+        self.__init__(self.window_size)
+
+    def snapshot(self):
+        """Resumo da janela atual pronto para qos_metrics"""
+        return {
+            'latency': round(self.mean, 2),
+            'jitter': round(self.jitter, 2),
+            'packet_loss': round(self.packet_loss, 2),
+            'latency_stddev': round(math.sqrt(self.variance), 2),
+            'latency_p50': round(self.percentile(50), 2),
+            'latency_p95': round(self.percentile(95), 2),
+            'latency_p99': round(self.percentile(99), 2),
+            'samples': len(self.samples)
+        }
+
+
+class QoSProbeScheduler:
+    """Sonda vários alvos em paralelo para localizar o segmento com problema
+
+    Os segmentos seguem a ordem do caminho: 'wifi' (gateway padrão, primeiro
+    salto), 'lan' (DNS local) e 'wan' (hosts externos).
+    """
+
+    SEGMENT_ORDER = ['wifi', 'lan', 'wan']
+    SEGMENT_NAMES = {'wifi': 'Wi-Fi (gateway)', 'lan': 'Rede local / DNS', 'wan': 'Internet (WAN)'}
+
+    def __init__(self, targets=None, count=4, timeout=10):
+        # targets: {'segmento': [hosts]}; None = descoberta automática
+        self.custom_targets = targets
+        self.count = count
+        self.timeout = timeout
+
+    @staticmethod
+    def get_default_gateway():
+        """Lê o gateway padrão de /proc/net/route (sem subprocessos)"""
+        try:
+            with open('/proc/net/route') as f:
+                for line in f.readlines()[1:]:
+                    fields = line.split()
+                    if len(fields) >= 3 and fields[1] == '00000000' and fields[2] != '00000000':
+                        raw = bytes.fromhex(fields[2])
+                        return '.'.join(str(b) for b in reversed(raw))
+        except Exception:
+            pass
+        return None
+
+    @staticmethod
+    def get_local_dns():
+        """Primeiro nameserver não-loopback de /etc/resolv.conf"""
+        try:
+            with open('/etc/resolv.conf') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) >= 2 and parts[0] == 'nameserver' and not parts[1].startswith('127.'):
+                        return parts[1]
+        except Exception:
+            pass
+        return None
+
+    def get_targets(self):
+        """Monta o conjunto de alvos por segmento"""
+        if self.custom_targets:
+            return {seg: list(hosts) for seg, hosts in self.custom_targets.items() if hosts}
+
+        targets = {'wan': ['8.8.8.8', '1.1.1.1']}
+        gateway = self.get_default_gateway()
+        if gateway:
+            targets['wifi'] = [gateway]
+        dns = self.get_local_dns()
+        if dns and dns != gateway and dns not in targets['wan']:
+            targets['lan'] = [dns]
+        return targets
+
+    @staticmethod
+    def parse_ping_times(output):
+        """Extrai os RTTs (ms) da saída do ping"""
+        times = []
+        for line in output.split('\n'):
+            if 'time=' in line:
+                try:
+                    times.append(float(line.split('time=')[1].split(' ')[0]))
+                except (IndexError, ValueError):
+                    continue
+        return times
+
+    def ping(self, target):
+        """Executa ping e retorna (RTTs recebidos em ms, erro ou None)"""
+        result = system_commands.run(['ping', '-c', str(self.count), '-W', '2', target],
+                                     timeout=self.timeout)
+        if result.timed_out:
+            return [], "timeout"
+        times = result.parse(self.parse_ping_times)
+        if not times and result.returncode not in (0, 1):
+            return [], result.stderr.strip() or f"código {result.returncode}"
+        return times, None
+
+    def _probe(self, segment, target):
+        times, error = self.ping(target)
+        return {
+            'segment': segment,
+            'target': target,
+            'times': times,
+            'latency': round(sum(times) / len(times), 2) if times else None,
+            'packet_loss': round((self.count - len(times)) / self.count * 100, 2),
+            'error': error
+        }
+
+    def probe_all(self):
+        """Sonda todos os alvos em paralelo; retorna {segmento: [resultados]}"""
+        targets = self.get_targets()
+        jobs = [(seg, host) for seg, hosts in targets.items() for host in hosts]
+        results = defaultdict(list)
+        if not jobs:
+            return results
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            for probe in executor.map(lambda job: self._probe(*job), jobs):
+                results[probe['segment']].append(probe)
+        return results
+
+    @classmethod
+    def summarize_hops(cls, results):
+        """Resume por segmento: melhor latência e menor perda entre os alvos"""
+        hops = {}
+        for segment in cls.SEGMENT_ORDER:
+            probes = results.get(segment)
+            if not probes:
+                continue
+            latencies = [p['latency'] for p in probes if p['latency'] is not None]
+            hops[segment] = {
+                'targets': [p['target'] for p in probes],
+                'latency': min(latencies) if latencies else None,
+                'packet_loss': min(p['packet_loss'] for p in probes)
+            }
+        return hops
+
+
+WifiChannel = namedtuple('WifiChannel', 'channel mhz band widths dfs')
+
+
+def _build_channel_table():
+    """Tabela de todos os canais 802.11 de 20 MHz em 2.4/5/6 GHz
+
+    Larguras (40/80/160 MHz) são derivadas dos blocos alinhados a partir do
+    início de cada segmento contíguo de canais; DFS marca UNII-2/2e.
+    """
+    table = []
+    for channel in range(1, 15):
+        mhz = 2484 if channel == 14 else 2407 + 5 * channel
+        widths = (20,) if channel == 14 else (20, 40)
+        table.append(WifiChannel(channel, mhz, '2.4', widths, False))
+
+    segments = [('5', 5000, list(range(36, 65, 4))),
+                ('5', 5000, list(range(100, 145, 4))),
+                ('5', 5000, list(range(149, 178, 4))),
+                ('6', 5950, list(range(1, 234, 4)))]
+    for band, base, channels in segments:
+        for position, channel in enumerate(channels):
+            widths = tuple(width for width in (20, 40, 80, 160)
+                           if (position // (width // 20) + 1) * (width // 20) <= len(channels))
+            dfs = band == '5' and 52 <= channel <= 144
+            table.append(WifiChannel(channel, base + 5 * channel, band, widths, dfs))
+    # Canal 2 de 6 GHz (5935 MHz) é o canal de descoberta fora da grade
+    table.append(WifiChannel(2, 5935, '6', (20,), False))
+    return table
+
+
+WIFI_CHANNELS = _build_channel_table()
+CHANNEL_BY_MHZ = {info.mhz: info for info in WIFI_CHANNELS}
+CHANNEL_BY_BAND = {(info.band, info.channel): info for info in WIFI_CHANNELS}
+
+
+def frequency_mhz_to_channel(mhz):
+    """Converte frequência central (MHz) em (banda, canal); (None, 0) se desconhecida
+
+    O número sozinho é ambíguo: os canais 1-13 existem em 2.4 e em 6 GHz.
+    """
+    info = CHANNEL_BY_MHZ.get(mhz)
+    return (info.band, info.channel) if info else (None, 0)
+
+
+def default_band(channel):
+    """Banda presumida quando só o número do canal é conhecido (1-14 = 2.4 GHz)"""
+    return '2.4' if channel <= 14 else '5'
+
+
+def channel_info(channel, band=None):
+    """Metadados de um canal; sem banda, 1-14 é 2.4 GHz e 32+ é 5 GHz"""
+    return CHANNEL_BY_BAND.get((band or default_band(channel), channel))
+
+
+def channel_to_frequency_mhz(channel, band=None):
+    """Frequência central (MHz) do canal (0 se inexistente na banda)"""
+    info = channel_info(channel, band)
+    return info.mhz if info else 0
+
+
+RSN_AKM_NAMES = {1: '802.1X', 2: 'PSK', 5: '802.1X-SHA256', 6: 'PSK-SHA256', 8: 'SAE',
+                 12: '802.1X-SuiteB-192', 18: 'OWE', 24: 'SAE-EXT'}
+RSN_CIPHER_NAMES = {1: 'WEP-40', 2: 'TKIP', 4: 'CCMP', 5: 'WEP-104', 8: 'GCMP', 9: 'GCMP-256', 10: 'CCMP-256'}
+HE_6GHZ_WIDTHS = (20, 40, 80, 160)
+
+
+def _parse_suites(data, offset):
+    """Lê uma lista de suites RSN (contagem + 4 bytes cada); retorna (tipos, novo offset)"""
+    if offset + 2 > len(data):
+        return [], offset
+    count = data[offset] | data[offset + 1] << 8
+    offset += 2
+    suites = [data[offset + 4 * i + 3] for i in range(count) if offset + 4 * i + 4 <= len(data)]
+    return suites, offset + 4 * count
+
+
+def _classify_security(akms, wpa1, privacy):
+    if akms:
+        names = {RSN_AKM_NAMES.get(akm) for akm in akms}
+        if '802.1X-SuiteB-192' in names:
+            return 'WPA3-Enterprise'
+        if names & {'SAE', 'SAE-EXT'}:
+            return 'WPA2/WPA3' if names & {'PSK', 'PSK-SHA256'} else 'WPA3'
+        if 'OWE' in names:
+            return 'OWE'
+        if names & {'802.1X', '802.1X-SHA256'}:
+            return 'WPA2-Enterprise'
+        return 'WPA2'
+    if wpa1:
+        return 'WPA'
+    return 'WEP' if privacy else 'Aberta'
+
+
+def parse_information_elements(data, privacy=False):
+    """Percorre os elementos de informação (tag, tamanho, valor) em uma passada
+
+    data: bytes dos IEs (payload de Beacon/ProbeResp/ProbeReq). Extrai SSID,
+    canal DS, operação HT/VHT/HE (canal primário e largura), segurança
+    RSN/WPA e país, sem reconstruir camadas do scapy para cada elemento.
+    """
+    info = {'ssid': None, 'channel': None, 'primary_channel': None, 'width': 20,
+            'standard': None, 'security': None, 'cipher': None, 'country': None}
+    akms = []
+    wpa1 = ht = vht = he = False
+    offset, end = 0, len(data)
+    while offset + 2 <= end:
+        tag, length = data[offset], data[offset + 1]
+        value = data[offset + 2:offset + 2 + length]
+        offset += 2 + length
+        if len(value) < length:
+            break  # Elemento truncado
+
+        if tag == 0:
+            if info['ssid'] is None:
+                info['ssid'] = value.decode('utf-8', errors='ignore') if value.strip(b'\x00') else ""
+        elif tag == 3 and length >= 1:
+            info['channel'] = value[0]
+        elif tag == 7 and length >= 2:
+            info['country'] = value[:2].decode('ascii', errors='ignore').strip() or None
+        elif tag == 45:
+            ht = True
+        elif tag == 61 and length >= 2:
+            ht = True
+            info['primary_channel'] = value[0]
+            if value[1] & 0x03 in (1, 3) and value[1] & 0x04:
+                info['width'] = max(info['width'], 40)
+        elif tag == 191:
+            vht = True
+        elif tag == 192 and length >= 3:
+            vht = True
+            if value[0] == 1:
+                seg0, seg1 = value[1], value[2]
+                info['width'] = 160 if seg1 and abs(seg1 - seg0) == 8 else max(info['width'], 80)
+            elif value[0] in (2, 3):  # Formatos antigos de 160 e 80+80
+                info['width'] = 160
+        elif tag == 48 and length >= 8:
+            group = value[5]
+            info['cipher'] = RSN_CIPHER_NAMES.get(group)
+            pairwise, cursor = _parse_suites(value, 6)
+            akms, _ = _parse_suites(value, cursor)
+            if pairwise:
+                info['cipher'] = RSN_CIPHER_NAMES.get(pairwise[0], info['cipher'])
+        elif tag == 221 and length >= 4 and value[:4] == b'\x00\x50\xf2\x01':
+            wpa1 = True
+        elif tag == 255 and length >= 1:
+            if value[0] == 35:
+                he = True
+            elif value[0] == 36 and length >= 7:
+                he = True
+                params = value[1] | value[2] << 8 | value[3] << 16
+                cursor = 7 + (3 if params & (1 << 14) else 0) + (1 if params & (1 << 15) else 0)
+                if params & (1 << 17) and cursor + 5 <= length:
+                    # 6 GHz Operation Information: canal primário e largura
+                    info['primary_channel'] = value[cursor]
+                    info['width'] = HE_6GHZ_WIDTHS[value[cursor + 1] & 0x03]
+
+    if info['channel'] is None:
+        info['channel'] = info['primary_channel']
+    info['standard'] = '802.11ax' if he else '802.11ac' if vht else '802.11n' if ht else None
+    info['security'] = _classify_security(akms, wpa1, privacy)
+    if info['security'] == 'WPA' and info['cipher'] is None:
+        info['cipher'] = 'TKIP'
+    return info
+
+
+class ChannelPlanner:
+    """Planejador de canais ponderado por interferência (2.4/5/6 GHz)
+
+    Cada AP observado contribui para o canal em que opera com um peso
+    proporcional à potência recebida (RSSI em escala linear) e à carga do
+    BSS. A matriz de sobreposição (candidatos x canais) espalha essa
+    contribuição pelos canais vizinhos; o vetor de interferência por
+    candidato é mantido incrementalmente, somando apenas a coluna do canal
+    afetado quando um AP aparece, muda de canal ou de sinal. Canais são
+    identificados por (banda, número): o canal 5 de 6 GHz não interfere no 5
+    de 2.4 GHz. Sinal e carga entram quantizados, então um AP estável não
+    gera atualização, e o vetor é recalculado do zero a cada REBUILD_EVERY
+    atualizações para não acumular erro de ponto flutuante.
+    """
+
+    CHANNELS_24 = [(info.band, info.channel) for info in WIFI_CHANNELS if info.band == '2.4' and info.channel <= 13]
+    CHANNELS_5 = [(info.band, info.channel) for info in WIFI_CHANNELS if info.band == '5' and info.channel <= 165]
+    CHANNELS_6 = [(info.band, info.channel) for info in WIFI_CHANNELS if info.band == '6' and info.channel % 4 == 1]
+    DFS_CHANNELS = {(info.band, info.channel) for info in WIFI_CHANNELS if info.dfs}
+    NON_OVERLAPPING_24 = (1, 6, 11)
+    # Fração do espectro compartilhada entre canais de 20/22 MHz a 0..4 canais de distância
+    OVERLAP_24 = (1.0, 0.77, 0.54, 0.31, 0.09)
+    ADJACENT_LEAK_5 = 0.05
+    NOISE_FLOOR_DBM = -95
+    DFS_PENALTY = 1.0  # dB: risco de CAC/troca forçada por radar
+    NON_STANDARD_PENALTY = 0.5  # dB
+    UTILIZATION_DB_PER_PCT = 0.1  # 50% de ocupação medida pesa como 5 dB
+    FULL_LOAD_SHARE = 0.5  # BSS ocupando metade do airtime conta com carga máxima
+    LOAD_STEP = 0.05
+    REBUILD_EVERY = 10000
+
+    def __init__(self):
+        self.channels = self.CHANNELS_24 + self.CHANNELS_5 + self.CHANNELS_6
+        self.index = {ch: i for i, ch in enumerate(self.channels)}
+        size = len(self.channels)
+        overlap = [[self._overlap(a, b) for b in self.channels] for a in self.channels]
+        if np is not None:
+            self.overlap = np.array(overlap, dtype=np.float64)
+            self.interference = np.zeros(size)
+        else:
+            self.overlap = overlap
+            self.interference = [0.0] * size
+        self.contributions = {}  # bssid -> (índice do canal, peso)
+        self.network_count = defaultdict(int)  # (banda, canal) -> APs
+        self.updates = 0
+
+    @classmethod
+    def _overlap(cls, a, b):
+        """Fração de interferência que um AP no canal b causa no canal a (chaves (banda, canal))"""
+        if a[0] != b[0]:
+            return 0.0
+        distance = abs(a[1] - b[1])
+        if a[0] == '2.4':
+            return cls.OVERLAP_24[distance] if distance < len(cls.OVERLAP_24) else 0.0
+        if distance == 0:
+            return 1.0
+        return cls.ADJACENT_LEAK_5 if distance == 4 else 0.0
+
+    @classmethod
+    def weight(cls, signal, load=1.0):
+        """Peso do AP: potência relativa ao piso de ruído vezes a carga"""
+        if signal is None:
+            signal = cls.NOISE_FLOOR_DBM + 10  # AP ouvido sem radiotap: sinal fraco
+        power = 10 ** ((max(signal, cls.NOISE_FLOOR_DBM) - cls.NOISE_FLOOR_DBM) / 10)
+        return power * max(load, 0.05)
+
+    def _add_column(self, idx, delta):
+        if np is not None:
+            self.interference += self.overlap[:, idx] * delta
+        else:
+            for row, weights in enumerate(self.overlap):
+                self.interference[row] += weights[idx] * delta
+
+    def update_ap(self, bssid, channel, signal=None, load=1.0, band=None):
+        """Insere/atualiza a contribuição de um AP (O(canais))"""
+        idx = self.index.get((band or default_band(channel), channel)) if channel else None
+        weight = self.weight(signal, load) if idx is not None else 0.0
+        previous = self.contributions.get(bssid)
+        if previous == (idx, weight):
+            return
+        if previous is not None:
+            old_idx, old_weight = previous
+            if old_idx is not None:
+                self._add_column(old_idx, -old_weight)
+                self.network_count[self.channels[old_idx]] -= 1
+        self.updates += 1
+        if idx is None:
+            self.contributions.pop(bssid, None)
+            return
+        self._add_column(idx, weight)
+        self.network_count[self.channels[idx]] += 1
+        self.contributions[bssid] = (idx, weight)
+
+    def remove_ap(self, bssid):
+        self.update_ap(bssid, None)
+
+    def rebuild(self):
+        """Recalcula o vetor de interferência a partir das contribuições atuais"""
+        if np is not None:
+            self.interference = np.zeros(len(self.channels))
+        else:
+            self.interference = [0.0] * len(self.channels)
+        for idx, weight in self.contributions.values():
+            self._add_column(idx, weight)
+        self.updates = 0
+
+    @classmethod
+    def bss_load(cls, airtime_us, window):
+        """Carga absoluta do BSS (0.5 a 1.0) pela fatia do airtime na janela, quantizada"""
+        share = min(1.0, airtime_us / (window * 1_000_000) / cls.FULL_LOAD_SHARE)
+        return round((0.5 + 0.5 * share) / cls.LOAD_STEP) * cls.LOAD_STEP
+
+    def sync(self, wireless_devices, airtime=None, window=60):
+        """Aplica ao plano o estado atual do registro de dispositivos
+
+        airtime: {bssid: µs ocupados nos últimos window segundos}
+        (ChannelAirtimeEstimator.airtime_by_bss). A carga de cada AP depende
+        só do próprio BSS, então APs inalterados não mexem no vetor.
+        """
+        aps = {mac: dev for mac, dev in list(wireless_devices.items()) if dev.get('type') == 'AP'}
+        airtime = airtime or {}
+        for mac, dev in aps.items():
+            signal = dev.get('signal')
+            self.update_ap(mac, dev.get('channel'), round(signal) if signal is not None else None,
+                           self.bss_load(airtime.get(mac, 0), window), dev.get('band'))
+        for mac in [mac for mac in self.contributions if mac not in aps]:
+            self.remove_ap(mac)
+        if self.updates >= self.REBUILD_EVERY:
+            self.rebuild()
+
+    def rank(self, band=None, include_dfs=True, utilization=None):
+        """Lista de canais ordenada por pontuação (menor = menos interferência)
+
+        A pontuação é a interferência agregada em dB acima do piso de ruído,
+        acrescida de UTILIZATION_DB_PER_PCT por ponto de ocupação medida.
+        band: '2.4', '5', '6' ou None para todas; utilization: {(banda, canal): % ocupado}.
+        """
+        if np is not None:
+            scores = (10 * np.log10(1 + self.interference)).tolist()
+        else:
+            scores = [10 * math.log10(1 + max(value, 0.0)) for value in self.interference]
+
+        ranked = []
+        for key, score in zip(self.channels, scores):
+            channel_band, channel = key
+            dfs = key in self.DFS_CHANNELS
+            if band and channel_band != band or dfs and not include_dfs:
+                continue
+            if dfs:
+                score += self.DFS_PENALTY
+            if channel_band == '2.4' and channel not in self.NON_OVERLAPPING_24:
+                score += self.NON_STANDARD_PENALTY
+            busy = utilization.get(key) if utilization else None
+            if busy is not None:
+                score += busy * self.UTILIZATION_DB_PER_PCT
+            ranked.append({
+                'channel': channel,
+                'band': channel_band,
+                'score': round(score, 2),
+                'networks': self.network_count.get(key, 0),
+                'utilization': busy,
+                'dfs': dfs
+            })
+        ranked.sort(key=lambda item: (item['score'], item['channel']))
+        return ranked
+
+
+# Taxas HT (Mbps) por MCS 0-7, 20 MHz, GI longo, um fluxo espacial
+HT_MCS_RATES_20MHZ = (6.5, 13.0, 19.5, 26.0, 39.0, 52.0, 58.5, 65.0)
+
+
+def ht_mcs_rate(index, bandwidth=0, short_gi=False):
+    """Taxa de PHY em Mbps para um índice MCS HT (bandwidth 0=20 MHz, 1=40 MHz)"""
+    if index is None or index < 0 or index > 31:
+        return None
+    rate = HT_MCS_RATES_20MHZ[index % 8] * (index // 8 + 1)
+    if bandwidth == 1:
+        rate *= 13.5 / 6.5
+    if short_gi:
+        rate *= 10 / 9
+    return round(rate, 1)
+
+
+class ChannelAirtimeEstimator:
+    """Estimativa de ocupação (airtime) por canal a partir dos quadros capturados
+
+    O tempo de ar de cada quadro vem do comprimento, da taxa (radiotap Rate
+    ou MCS) e do preâmbulo; o campo Duration/ID (NAV) estende a reserva do
+    meio. Os intervalos ocupados são unidos por canal (busy_until), então o
+    ACK já coberto pelo NAV do quadro de dados não é contado duas vezes. As
+    somas ficam em baldes de 1 s num anel por canal; a ocupação de uma janela
+    considera só os segundos em que o canal foi de fato escutado (channel
+    hopping). Canais são chaveados por (banda, canal). O mesmo anel, por
+    BSSID, dá a carga recente de cada AP usada pelo planejador de canais.
+    Custo por quadro O(1).
+    """
+
+    SLOTS = 60
+    DSSS_RATES = (1.0, 2.0, 5.5, 11.0)
+    DSSS_PREAMBLE_US = 192
+    OFDM_PREAMBLE_US = 20
+    HT_PREAMBLE_US = 36
+    MAX_NAV_US = 32767
+
+    def __init__(self):
+        self.busy = {}  # (banda, canal) -> [µs ocupados por segundo]
+        self.stamps = {}  # (banda, canal) -> [segundo a que cada balde se refere]
+        self.busy_until = {}  # (banda, canal) -> fim (µs) da última ocupação contabilizada
+        self.bss_busy = {}  # bssid -> ([µs por segundo], [segundo de cada balde])
+        self.frames = 0
+
+    @classmethod
+    def frame_airtime(cls, band, length, rate=None, ht=False):
+        """Tempo de transmissão (µs) de um quadro de length bytes"""
+        if not rate:
+            rate = 1.0 if band == '2.4' else 6.0  # taxa básica de gerência
+        if ht:
+            preamble = cls.HT_PREAMBLE_US
+        elif rate in cls.DSSS_RATES and band == '2.4':
+            preamble = cls.DSSS_PREAMBLE_US
+        else:
+            preamble = cls.OFDM_PREAMBLE_US
+        return preamble + (length + 4) * 8 / rate  # + FCS
+
+    def record(self, channel, length, rate=None, duration=0, capture_time=None, ht=False, weight=1, band=None,
+               bssid=None):
+        """Contabiliza um quadro; retorna os µs de ocupação acrescentados
+
+        weight > 1 quando o quadro representa outros descartados pela
+        amostragem adaptativa (a ocupação é escalada pelo mesmo fator).
+        Sem banda, o canal é interpretado por default_band(). Com bssid, a
+        ocupação também entra na janela do BSS.
+        """
+        if not channel:
+            return 0.0
+        key = (band or default_band(channel), channel)
+        capture_time = capture_time if capture_time is not None else time.time()
+        start = capture_time * 1_000_000
+        nav = duration if duration and duration <= self.MAX_NAV_US else 0  # bit 15 = AID, não duração
+        end = start + self.frame_airtime(key[0], length, rate, ht) + nav
+
+        busy_until = self.busy_until.get(key, 0.0)
+        if end <= busy_until:
+            return 0.0
+        added = (end - max(start, busy_until)) * weight
+        self.busy_until[key] = end
+
+        second = int(capture_time)
+        slot = second % self.SLOTS
+        busy = self.busy.get(key)
+        if busy is None:
+            busy = self.busy[key] = [0.0] * self.SLOTS
+            self.stamps[key] = [-1] * self.SLOTS
+        stamps = self.stamps[key]
+        if stamps[slot] != second:
+            stamps[slot] = second
+            busy[slot] = 0.0
+        busy[slot] += added
+        if bssid is not None:
+            ring = self.bss_busy.get(bssid)
+            if ring is None:
+                ring = self.bss_busy[bssid] = ([0.0] * self.SLOTS, [-1] * self.SLOTS)
+            if ring[1][slot] != second:
+                ring[1][slot] = second
+                ring[0][slot] = 0.0
+            ring[0][slot] += added
+        self.frames += 1
+        return added
+
+    def utilization(self, channel, window=10, now=None, band=None):
+        """% do tempo escutado no canal em que o meio esteve ocupado (None sem dados)"""
+        key = (band or default_band(channel), channel)
+        busy = self.busy.get(key)
+        if busy is None:
+            return None
+        now = int(now if now is not None else time.time())
+        oldest = now - min(window, self.SLOTS) + 1
+        total = 0.0
+        observed = 0
+        for slot_busy, stamp in zip(busy, self.stamps[key]):
+            if oldest <= stamp <= now:
+                total += slot_busy
+                observed += 1
+        if not observed:
+            return None
+        return round(min(100.0, total / (observed * 10_000)), 1)
+
+    def utilization_by_channel(self, window=10, now=None):
+        """{(banda, canal): % ocupado} para os canais com observações na janela"""
+        result = {}
+        for band, channel in list(self.busy):
+            value = self.utilization(channel, window, now, band)
+            if value is not None:
+                result[band, channel] = value
+        return result
+
+    def airtime_by_bss(self, window=60, now=None):
+        """{bssid: µs ocupados na janela}; BSSs sem quadros no anel são descartados"""
+        now = int(now if now is not None else time.time())
+        oldest = now - min(window, self.SLOTS) + 1
+        expired = now - self.SLOTS
+        result = {}
+        for bssid, (busy, stamps) in list(self.bss_busy.items()):
+            total = sum(slot_busy for slot_busy, stamp in zip(busy, stamps) if oldest <= stamp <= now)
+            if total:
+                result[bssid] = total
+            elif max(stamps) <= expired:
+                del self.bss_busy[bssid]
+        return result
+
+    def reset(self):
+        self.busy.clear()
+        self.stamps.clear()
+        self.busy_until.clear()
+        self.bss_busy.clear()
+        self.frames = 0
+
+
+class AdaptiveSampler:
+    """Descarte adaptativo de quadros de alto volume quando a captura atrasa
+
+    O atraso é medido como relógio atual menos o timestamp de captura do
+    quadro: se o handler não acompanha, ele cresce antes que o kernel comece
+    a descartar. Quadros de segurança (deauth/disassoc/auth/assoc) são sempre
+    processados; beacons, probes, dados e controle são amostrados com
+    probabilidade 1/2^nível. Como os pesos são potências de 2, os contadores
+    corrigidos (soma de 1/p) continuam inteiros e sem viés.
+    """
+
+    # (tipo, subtipo) de gerência sempre processados: assoc/reassoc, disassoc, auth, deauth, action
+    ALWAYS = {(0, 0), (0, 1), (0, 2), (0, 3), (0, 10), (0, 11), (0, 12), (0, 13)}
+    # Classes amostráveis e quantos níveis abaixo do nível global cada uma fica
+    CLASS_OFFSETS = {'data': 0, 'control': 0, 'management': 0, 'beacon': 1, 'probe': 1}
+    MAX_LEVEL = 6  # p mínima = 1/64
+    HIGH_LAG = 0.5  # segundos de atraso para aumentar o descarte
+    LOW_LAG = 0.05
+    ADJUST_EVERY = 1.0  # segundos entre ajustes
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.level = 0
+        self.lag = 0.0
+        self.seen = defaultdict(int)
+        self.processed = defaultdict(int)
+        self._last_adjust = 0.0
+
+    @staticmethod
+    def classify(frame_type, subtype):
+        if frame_type == 2:
+            return 'data'
+        if frame_type == 1:
+            return 'control'
+        if subtype == 8:
+            return 'beacon'
+        if subtype in (4, 5):
+            return 'probe'
+        return 'management'
+
+    def _adjust(self, now):
+        if now - self._last_adjust < self.ADJUST_EVERY:
+            return
+        self._last_adjust = now
+        if self.lag > self.HIGH_LAG and self.level < self.MAX_LEVEL:
+            self.level += 1
+        elif self.lag < self.LOW_LAG and self.level > 0:
+            self.level -= 1
+
+    def admit(self, frame_type, subtype, capture_time, now):
+        """Peso do quadro nos contadores (2^nível) ou 0 se deve ser descartado"""
+        self.lag += 0.05 * (max(0.0, now - capture_time) - self.lag)
+        self._adjust(now)
+        if not self.enabled or (frame_type, subtype) in self.ALWAYS:
+            return 1
+        frame_class = self.classify(frame_type, subtype)
+        self.seen[frame_class] += 1
+        level = max(0, self.level - self.CLASS_OFFSETS.get(frame_class, 0))
+        if level and random.random() >= 1.0 / (1 << level):
+            return 0
+        self.processed[frame_class] += 1
+        return 1 << level
+
+    def rates(self):
+        """Probabilidade de amostragem atual por classe de quadro"""
+        rates = {frame_class: 1.0 / (1 << max(0, self.level - offset))
+                 for frame_class, offset in self.CLASS_OFFSETS.items()}
+        rates['security'] = 1.0
+        return rates
+
+    def reset(self):
+        self.level = 0
+        self.lag = 0.0
+        self.seen.clear()
+        self.processed.clear()
+
+
+class StageProfiler:
+    """Tempo por estágio do caminho quente do packet_handler
+
+    Só N de cada M quadros são cronometrados (perf_counter_ns, monotônico);
+    nos demais o custo é um incremento e uma comparação. Cada estágio tem um
+    histograma em µs para p50/p99. O estágio 'scapy' re-disseca os bytes
+    originais do quadro amostrado, já que a dissecação do sniff acontece
+    antes do handler. Pode ser ligado/desligado em tempo de execução.
+    """
+
+    STAGES = ('scapy', 'dissect', 'classify', 'airtime', 'format', 'db', 'queue', 'total')
+    STAGE_NAMES = {
+        'scapy': "dissecação scapy", 'dissect': "campos/radiotap/amostragem", 'classify': "classificação e estado",
+        'airtime': "sinal e airtime", 'format': "formatação do log", 'db': "SQLite (packets)",
+        'queue': "fila e eventos", 'total': "handler completo"
+    }
+
+    def __init__(self, sample_n=1, sample_m=50, enabled=False):
+        self.sample_n = sample_n
+        self.sample_m = sample_m
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.histograms = {stage: LatencyHistogram(min_value=0.1, max_value=1000000.0) for stage in self.STAGES}
+        self.sums = dict.fromkeys(self.STAGES, 0.0)
+        self.frames = 0
+        self.started = time.monotonic()
+
+    def set_enabled(self, enabled):
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = enabled
+
+    def begin(self):
+        """Início do quadro: retorna o instante (ns) se for amostrado, senão 0"""
+        self.frames += 1
+        if not self.enabled or self.frames % self.sample_m >= self.sample_n:
+            return 0
+        return time.perf_counter_ns()
+
+    def mark(self, stage, start):
+        """Fecha o estágio iniciado em start; retorna o início do próximo"""
+        now = time.perf_counter_ns()
+        elapsed = (now - start) / 1000
+        self.histograms[stage].record(elapsed)
+        self.sums[stage] += elapsed
+        return now
+
+    def measure_dissection(self, packet):
+        raw = getattr(packet, 'original', None)
+        if raw:
+            start = time.perf_counter_ns()
+            packet.__class__(raw)
+            self.mark('scapy', start)
+
+    def snapshot(self):
+        """{estágio: {'samples', 'p50_us', 'p99_us', 'mean_us'}} e quadros/s"""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        stages = {}
+        for stage in self.STAGES:
+            histogram = self.histograms[stage]
+            if histogram.total:
+                stages[stage] = {
+                    'samples': histogram.total,
+                    'p50_us': round(histogram.percentile(50), 1),
+                    'p99_us': round(histogram.percentile(99), 1),
+                    'mean_us': round(self.sums[stage] / histogram.total, 1)
+                }
+        return {'frames': self.frames, 'fps': round(self.frames / elapsed, 1), 'stages': stages}
+
+    def report(self):
+        """Tabela de texto com p50/p99 por estágio e para onde vai o orçamento"""
+        snap = self.snapshot()
+        stages = snap['stages']
+        lines = [f"⏱️ PROFILER ({'ativo' if self.enabled else 'inativo'}, {self.sample_n}/{self.sample_m} quadros)",
+                 f"   Quadros: {snap['frames']} | Taxa: {snap['fps']} quadros/s", ""]
+        if 'total' not in stages:
+            lines.append("   Nenhuma amostra ainda.")
+            return "\n".join(lines) + "\n"
+        total_mean = stages['total']['mean_us']
+        lines.append(f"   {'estágio':<28}{'amostras':>9}{'p50 µs':>10}{'p99 µs':>10}{'média':>10}{'% total':>9}")
+        for stage in self.STAGES:
+            if stage not in stages:
+                continue
+            info = stages[stage]
+            share = "" if stage in ('total', 'scapy') else f"{info['mean_us'] / total_mean:.0%}"
+            lines.append(f"   {self.STAGE_NAMES[stage]:<28}{info['samples']:>9}{info['p50_us']:>10}"
+                         f"{info['p99_us']:>10}{info['mean_us']:>10}{share:>9}")
+        per_frame = total_mean + stages.get('scapy', {}).get('mean_us', 0)
+        lines.append("")
+        lines.append(f"   Orçamento: {per_frame:.0f} µs/quadro (com scapy) → "
+                     f"{snap['fps'] * per_frame / 10000:.1f}% de um núcleo na taxa atual, "
+                     f"máx. ~{1000000 / per_frame:.0f} quadros/s")
+        return "\n".join(lines) + "\n"
+
+
+class SignalStrengthTracker:
+    """Janela deslizante de amostras de RSSI com estatísticas O(1)
+
+    Mantém somas acumuladas para média/variância e para a inclinação da
+    regressão linear (tendência em dB/min), além de uma média exponencial
+    (EWMA) usada como valor suavizado pelo diagnóstico.
+    """
+
+    def __init__(self, window_seconds=60, max_samples=240, alpha=0.2):
+        self.window_seconds = window_seconds
+        self.alpha = alpha
+        self.samples = deque(maxlen=max_samples)  # (t relativo, dBm)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._t0 = None
+            self.samples.clear()
+            self.smoothed = None
+            self._sum_t = self._sum_v = self._sum_tt = self._sum_tv = self._sum_vv = 0.0
+
+    def _add(self, t, v, sign):
+        self._sum_t += sign * t
+        self._sum_v += sign * v
+        self._sum_tt += sign * t * t
+        self._sum_tv += sign * t * v
+        self._sum_vv += sign * v * v
+
+    def record(self, dbm, timestamp=None):
+        """Registra uma amostra de sinal (dBm)"""
+        with self._lock:
+            timestamp = timestamp if timestamp is not None else time.time()
+            if self._t0 is None:
+                self._t0 = timestamp  # Tempos relativos mantêm as somas precisas
+            t = timestamp - self._t0
+            if len(self.samples) == self.samples.maxlen:
+                self._add(*self.samples[0], -1)
+            self.samples.append((t, dbm))
+            self._add(t, dbm, 1)
+            # Descarta amostras mais antigas que a janela
+            while self.samples and t - self.samples[0][0] > self.window_seconds:
+                self._add(*self.samples.popleft(), -1)
+            self.smoothed = dbm if self.smoothed is None else self.smoothed + self.alpha * (dbm - self.smoothed)
+
+    def stats(self, now=None):
+        """Retorna {'smoothed', 'mean', 'variance', 'trend'} sem subprocessos
+
+        None se não há amostras ou a mais recente já saiu da janela (link caído).
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            n = len(self.samples)
+            if not n or now - (self._t0 + self.samples[-1][0]) > self.window_seconds:
+                return None
+            mean = self._sum_v / n
+            variance = max(0.0, self._sum_vv / n - mean * mean)
+            denom = n * self._sum_tt - self._sum_t * self._sum_t
+            slope = (n * self._sum_tv - self._sum_t * self._sum_v) / denom if n > 1 and denom > 1e-9 else 0.0
+            return {
+                'smoothed': round(self.smoothed, 1),
+                'mean': round(mean, 1),
+                'variance': round(variance, 2),
+                'trend': round(slope * 60, 2),  # dB por minuto
+                'samples': n
+            }
+
+
+class Nl80211Client:
+    """Cliente mínimo de nl80211 via generic netlink (sem processos externos)"""
+
+    NETLINK_GENERIC = 16
+    GENL_ID_CTRL = 0x10
+    CTRL_CMD_GETFAMILY = 3
+    CTRL_ATTR_FAMILY_ID = 1
+    CTRL_ATTR_FAMILY_NAME = 2
+    NLM_F_REQUEST = 0x1
+    NLM_F_DUMP = 0x300
+    NLMSG_ERROR = 2
+    NLMSG_DONE = 3
+
+    CMD_GET_INTERFACE = 5
+    CMD_GET_STATION = 17
+    ATTR_IFINDEX = 3
+    ATTR_MAC = 6
+    ATTR_STA_INFO = 21
+    ATTR_WIPHY_FREQ = 38
+    ATTR_SSID = 52
+    STA_INFO_SIGNAL = 7
+    STA_INFO_SIGNAL_AVG = 13
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, self.NETLINK_GENERIC)
+        self.sock.settimeout(1.0)
+        self.sock.bind((0, 0))
+        self.seq = 0
+        self.family_id = self._resolve_family('nl80211')
+
+    def close(self):
+        self.sock.close()
+
+    @staticmethod
+    def _attr(attr_type, payload):
+        length = 4 + len(payload)
+        return struct.pack('=HH', length, attr_type) + payload + b'\0' * ((4 - length % 4) % 4)
+
+    @staticmethod
+    def parse_attrs(data):
+        """Converte uma sequência de atributos netlink em {tipo: bytes}"""
+        attrs = {}
+        offset = 0
+        while offset + 4 <= len(data):
+            length, attr_type = struct.unpack_from('=HH', data, offset)
+            if length < 4:
+                break
+            attrs[attr_type & 0x3fff] = data[offset + 4:offset + length]
+            offset += (length + 3) & ~3
+        return attrs
+
+    def _request(self, msg_type, cmd, attrs, flags=0):
+        """Envia um comando genl e retorna a lista de atributos de cada resposta"""
+        self.seq += 1
+        payload = struct.pack('=BBH', cmd, 1, 0) + b''.join(attrs)
+        header = struct.pack('=IHHII', 16 + len(payload), msg_type, self.NLM_F_REQUEST | flags, self.seq, 0)
+        self.sock.send(header + payload)
+
+        replies = []
+        while True:
+            data = self.sock.recv(65536)
+            offset = 0
+            while offset + 16 <= len(data):
+                length, nl_type, _, seq, _ = struct.unpack_from('=IHHII', data, offset)
+                if length < 16:
+                    return replies
+                if nl_type == self.NLMSG_DONE:
+                    return replies
+                if nl_type == self.NLMSG_ERROR:
+                    error = struct.unpack_from('=i', data, offset + 16)[0]
+                    if error:
+                        raise OSError(-error, os.strerror(-error))
+                    return replies
+                if seq == self.seq:
+                    replies.append(self.parse_attrs(data[offset + 20:offset + length]))
+                offset += (length + 3) & ~3
+            if not flags & self.NLM_F_DUMP:
+                return replies
+
+    def _resolve_family(self, name):
+        replies = self._request(self.GENL_ID_CTRL, self.CTRL_CMD_GETFAMILY,
+                                [self._attr(self.CTRL_ATTR_FAMILY_NAME, name.encode() + b'\0')])
+        for attrs in replies:
+            if self.CTRL_ATTR_FAMILY_ID in attrs:
+                return struct.unpack('=H', attrs[self.CTRL_ATTR_FAMILY_ID][:2])[0]
+        raise OSError("família nl80211 indisponível")
+
+    def get_link(self, ifname):
+        """Retorna {'ssid', 'bssid', 'frequency_mhz', 'signal'} da interface"""
+        ifindex = struct.pack('=I', socket.if_nametoindex(ifname))
+        link = {}
+
+        for attrs in self._request(self.family_id, self.CMD_GET_INTERFACE,
+                                   [self._attr(self.ATTR_IFINDEX, ifindex)]):
+            if self.ATTR_SSID in attrs:
+                link['ssid'] = attrs[self.ATTR_SSID].decode('utf-8', errors='ignore')
+            if self.ATTR_WIPHY_FREQ in attrs:
+                link['frequency_mhz'] = struct.unpack('=I', attrs[self.ATTR_WIPHY_FREQ][:4])[0]
+
+        # Em modo managed a única estação é o AP associado
+        for attrs in self._request(self.family_id, self.CMD_GET_STATION,
+                                   [self._attr(self.ATTR_IFINDEX, ifindex)], self.NLM_F_DUMP):
+            if self.ATTR_MAC in attrs:
+                link['bssid'] = ':'.join(f"{b:02x}" for b in attrs[self.ATTR_MAC][:6])
+            sta_info = self.parse_attrs(attrs.get(self.ATTR_STA_INFO, b''))
+            for key in (self.STA_INFO_SIGNAL_AVG, self.STA_INFO_SIGNAL):
+                if key in sta_info:
+                    link['signal'] = struct.unpack('=b', sta_info[key][:1])[0]
+                    break
+            break
+
+        return link
+
+
+class LinkStateSampler:
+    """Amostrador de enlace em segundo plano (/proc/net/wireless + nl80211)
+
+    Lê o sinal de /proc/net/wireless a cada amostra e consulta SSID/BSSID/
+    frequência via nl80211 com menor frequência. Só as mudanças são entregues
+    ao callback on_change, no formato de current_wifi_info. Sem procfs ou
+    nl80211, start() retorna False e o chamador usa iwgetid/iwconfig.
+    """
+
+    PROC_WIRELESS = '/proc/net/wireless'
+
+    def __init__(self, on_change, interval=0.5, details_every=10, signal_tracker=None):
+        self.on_change = on_change
+        self.signal_tracker = signal_tracker
+        self.interval = interval
+        self.details_every = details_every  # consulta nl80211 a cada N amostras
+        self.running = False
+        self.thread = None
+        self.nl80211 = None
+        self.state = {}
+        self._details = {}
+        self._tick = 0
+
+    @classmethod
+    def read_proc_wireless(cls):
+        """Retorna {interface: nível de sinal em dBm} de /proc/net/wireless"""
+        levels = {}
+        with open(cls.PROC_WIRELESS) as f:
+            for line in f.readlines()[2:]:
+                if ':' not in line:
+                    continue
+                iface, fields = line.split(':', 1)
+                fields = fields.split()
+                try:
+                    levels[iface.strip()] = int(float(fields[2].rstrip('.')))
+                except (IndexError, ValueError):
+                    continue
+        return levels
+
+    def available(self):
+        return os.path.exists(self.PROC_WIRELESS)
+
+    def start(self):
+        """Inicia a thread; retorna False se procfs/nl80211 não estão disponíveis"""
+        if not self.available():
+            return False
+        try:
+            self.nl80211 = Nl80211Client()
+        except Exception as e:
+            print(f"[LINK] nl80211 indisponível, usando iwconfig: {e}")
+            return False
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.running = False
+        if self.nl80211:
+            self.nl80211.close()
+
+    def _run(self):
+        while self.running:
+            try:
+                changes = self.sample()
+                if changes:
+                    self.on_change(changes)
+            except Exception as e:
+                print(f"[LINK-ERRO] Falha na amostragem: {e}")
+            time.sleep(self.interval)
+
+    def sample(self):
+        """Lê o estado atual e retorna apenas os campos que mudaram"""
+        levels = self.read_proc_wireless()
+        iface = next(iter(levels), None)
+
+        if iface and (self._tick % self.details_every == 0 or not self._details):
+            try:
+                self._details = self.nl80211.get_link(iface)
+            except Exception:
+                self._details = {}
+        self._tick += 1
+
+        if not iface or not self._details.get('ssid'):
+            new_state = {'ssid': 'Não conectado', 'signal_strength': "N/A"}
+            if self.signal_tracker is not None and self.state.get('ssid') != 'Não conectado':
+                self.signal_tracker.reset()  # Sem link, o último dBm não vale mais
+        else:
+            # procfs é lido a cada amostra; nl80211 cobre drivers que reportam 0
+            signal = levels.get(iface) or self._details.get('signal')
+            new_state = {
+                'interface': iface,
+                'ssid': self._details['ssid'],
+                'signal_strength': f"{signal} dBm" if signal else "N/A"
+            }
+            if 'bssid' in self._details:
+                new_state['bssid'] = self._details['bssid']
+            if self.signal_tracker is not None and signal:
+                # Troca de AP (roaming) invalida a série anterior
+                if new_state.get('bssid') != self.state.get('bssid'):
+                    self.signal_tracker.reset()
+                self.signal_tracker.record(signal)
+            if 'frequency_mhz' in self._details:
+                mhz = self._details['frequency_mhz']
+                new_state['frequency'] = f"{mhz / 1000:.3f}GHz"
+                new_state['band'], new_state['channel'] = frequency_mhz_to_channel(mhz)
+
+        changes = {k: v for k, v in new_state.items() if self.state.get(k) != v}
+        self.state.update(new_state)
+        return changes
+
+
+DEAUTH_SOURCE_NAMES = {'bssid': "BSSID", 'src': "Origem"}
+
+
+class DeauthAttackDetector:
+    """Detector de ataques de deauthentication em janela deslizante
+
+    Conta quadros por (origem, destino, BSSID) em um count-min sketch por
+    segundo; a soma dos sketches da janela é mantida incrementalmente, então
+    cada quadro custa O(profundidade) e a memória não cresce com MACs
+    falsificados. Só os pares mais ativos (max_tracked) guardam detalhes.
+    O mesmo sketch conta por BSSID e por origem: com destinos/origens
+    aleatórios nenhum par se repete, mas o BSSID (ou a origem) atacado
+    continua identificado. on_attack é chamado fora do lock.
+    """
+
+    def __init__(self, window_seconds=30, sketch_width=1024, sketch_depth=4,
+                 attack_threshold=10, pair_threshold=5, max_tracked=128, on_attack=None):
+        self.window_seconds = window_seconds
+        self.width = sketch_width
+        self.depth = sketch_depth
+        self.attack_threshold = attack_threshold
+        self.pair_threshold = pair_threshold
+        self.max_tracked = max_tracked
+        self.on_attack = on_attack
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        size = self.width * self.depth
+        self._buckets = [[0] * size for _ in range(self.window_seconds)]
+        self._bucket_totals = [0] * self.window_seconds
+        self._window = [0] * size
+        self._window_total = 0
+        self._current = None
+        self.tracked = {}  # (src, dst, bssid) -> {'reasons': {}, 'first_seen', 'last_seen'}
+        self.tracked_sources = {}  # ('bssid' | 'src', mac) -> {'first_seen', 'last_seen'}
+        self.under_attack = False
+        self.attack_started = None
+
+    def _cells(self, key):
+        return [d * self.width + hash((d, key)) % self.width for d in range(self.depth)]
+
+    def _advance(self, now):
+        """Expira os segundos que saíram da janela"""
+        second = int(now)
+        if self._current is None:
+            self._current = second
+            return
+        steps = min(second - self._current, self.window_seconds)
+        for i in range(1, steps + 1):
+            slot = (self._current + i) % self.window_seconds
+            expired = self._buckets[slot]
+            if self._bucket_totals[slot]:
+                self._window = [w - e for w, e in zip(self._window, expired)]
+                self._window_total -= self._bucket_totals[slot]
+                self._buckets[slot] = [0] * len(expired)
+                self._bucket_totals[slot] = 0
+        if second > self._current:
+            self._current = second
+
+    def _estimate(self, cells):
+        return min(self._window[c] for c in cells)
+
+    def _count(self, bucket, key):
+        """Soma 1 à chave no balde atual e na janela; retorna as células"""
+        cells = self._cells(key)
+        for c in cells:
+            bucket[c] += 1
+            self._window[c] += 1
+        return cells
+
+    def record(self, src, dst, bssid, reason=None, now=None):
+        """Registra um quadro de deauth; retorna o evento de ataque, se houver"""
+        now = now if now is not None else time.time()
+        key = (src, dst, bssid)
+        with self._lock:
+            self._advance(now)
+            slot = self._current % self.window_seconds
+            bucket = self._buckets[slot]
+            cells = self._count(bucket, key)
+            self._bucket_totals[slot] += 1
+            self._window_total += 1
+
+            if key in self.tracked or self._estimate(cells) >= self.pair_threshold:
+                self._track(key, reason, now)
+            for source in (('bssid', bssid), ('src', src)):
+                cells = self._count(bucket, source)
+                if source in self.tracked_sources or self._estimate(cells) >= self.pair_threshold:
+                    self._track_source(source, now)
+            event = self._check(now)
+        self._emit(event)
+        return event
+
+    def _track(self, key, reason, now):
+        info = self.tracked.get(key)
+        if info is None:
+            if len(self.tracked) >= self.max_tracked:
+                # Descarta o par menos ativo para manter o limite de memória
+                weakest = min(self.tracked, key=lambda k: self._estimate(self._cells(k)))
+                del self.tracked[weakest]
+            info = self.tracked[key] = {'reasons': {}, 'first_seen': now}
+        info['last_seen'] = now
+        if reason is not None and (reason in info['reasons'] or len(info['reasons']) < 8):
+            info['reasons'][reason] = info['reasons'].get(reason, 0) + 1
+
+    def _track_source(self, source, now):
+        info = self.tracked_sources.get(source)
+        if info is None:
+            if len(self.tracked_sources) >= self.max_tracked:
+                weakest = min(self.tracked_sources, key=lambda k: self._estimate(self._cells(k)))
+                del self.tracked_sources[weakest]
+            info = self.tracked_sources[source] = {'first_seen': now}
+        info['last_seen'] = now
+
+    def _check(self, now):
+        """Monta o evento de início/fim de ataque (sob o lock; quem chama emite)"""
+        if not self.under_attack and self._window_total >= self.attack_threshold:
+            self.under_attack = True
+            self.attack_started = now
+            return {'event': 'attack_started', 'timestamp': now, 'window_count': self._window_total,
+                    'pairs': self._top_pairs(5), 'sources': self._top_sources(3)}
+        if self.under_attack and self._window_total < self.attack_threshold / 2:
+            self.under_attack = False
+            return {'event': 'attack_ended', 'timestamp': now, 'started_at': self.attack_started,
+                    'window_count': self._window_total, 'pairs': [], 'sources': []}
+        return None
+
+    def _emit(self, event):
+        if event and self.on_attack:
+            self.on_attack(event)
+
+    def _top_pairs(self, n):
+        ranked = []
+        for key, info in self.tracked.items():
+            count = self._estimate(self._cells(key))
+            if count:
+                ranked.append({'src': key[0], 'dst': key[1], 'bssid': key[2],
+                               'count': count, 'reasons': dict(info['reasons'])})
+        ranked.sort(key=lambda pair: pair['count'], reverse=True)
+        return ranked[:n]
+
+    def _top_sources(self, n):
+        ranked = []
+        for (kind, mac), info in self.tracked_sources.items():
+            count = self._estimate(self._cells((kind, mac)))
+            if count:
+                ranked.append({'kind': kind, 'mac': mac, 'count': count})
+        ranked.sort(key=lambda source: source['count'], reverse=True)
+        return ranked[:n]
+
+    def window_count(self, now=None):
+        """Quadros de deauth na janela atual"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            self._advance(now)
+            event = self._check(now)
+            total = self._window_total
+        self._emit(event)
+        return total
+
+    def peek_window_count(self, now=None):
+        """Quadros de deauth na janela sem lock e sem efeitos colaterais
+
+        Para leitores de outras threads (métricas): parte do _window_total
+        mantido pela captura e desconta os segundos já expirados que ainda
+        não foram avançados, sem alterar o estado nem disparar on_attack.
+        Pode ficar um quadro atrasado em relação à captura.
+        """
+        current, total = self._current, self._window_total
+        if current is None:
+            return 0
+        totals = list(self._bucket_totals)
+        steps = min(int(now if now is not None else time.time()) - current, self.window_seconds)
+        for i in range(1, steps + 1):
+            total -= totals[(current + i) % self.window_seconds]
+        return max(total, 0)
+
+    def top_pairs(self, n=5, now=None):
+        """Pares (origem, destino, BSSID) mais ativos na janela, com códigos de razão"""
+        with self._lock:
+            self._advance(now if now is not None else time.time())
+            return self._top_pairs(n)
+
+    def top_sources(self, n=3, now=None):
+        """BSSIDs/origens com mais deauths na janela, mesmo sem par repetido"""
+        with self._lock:
+            self._advance(now if now is not None else time.time())
+            return self._top_sources(n)
+
+
+class BeaconTimingState:
+    """Estado compacto de temporização de beacons de um BSSID"""
+
+    __slots__ = ('last_capture', 'last_tsf', 'last_seq', 'interval_tu', 'offset_us',
+                 'jitter_us', 'score', 'tsf_regressions', 'seq_anomalies', 'offset_jumps', 'beacons')
+
+    def __init__(self):
+        self.last_capture = None
+        self.last_tsf = None
+        self.last_seq = None
+        self.interval_tu = None
+        self.offset_us = None
+        self.jitter_us = 0.0
+        self.score = 0.0
+        self.tsf_regressions = 0
+        self.seq_anomalies = 0
+        self.offset_jumps = 0
+        self.beacons = 0
+
+
+class BeaconTimingAnalyzer:
+    """Análise de temporização de beacons para detectar APs falsos/spoofing
+
+    Para cada BSSID acompanha a regularidade do intervalo entre beacons, a
+    monotonicidade do TSF, a continuidade do número de sequência e o
+    deslocamento entre o relógio de captura e o TSF. Dois rádios anunciando o
+    mesmo BSSID intercalam TSFs e sequências, o que acumula pontuação de
+    anomalia. Cada beacon custa O(1): os estados ficam em ordem LRU e o
+    excedente sai pelo início.
+    """
+
+    TU_US = 1024  # Time Unit do 802.11 em microssegundos
+    OFFSET_JUMP_US = 5000
+    SCORE_DECAY = 0.95
+    FLAG_SCORE = 3.0
+    STALE_INTERVALS = 20  # BSS sem beacon há mais intervalos que isso não é reportado
+    DEFAULT_INTERVAL_TU = 100
+
+    def __init__(self, max_aps=4096):
+        self.max_aps = max_aps
+        self.states = OrderedDict()  # bssid -> BeaconTimingState, do menos ao mais recente
+
+    def observe(self, bssid, capture_time, tsf, interval_tu, seq):
+        """Atualiza o estado do BSSID com um beacon; retorna a pontuação atual"""
+        state = self.states.get(bssid)
+        if state is None:
+            if len(self.states) >= self.max_aps:
+                self.states.popitem(last=False)
+            state = self.states[bssid] = BeaconTimingState()
+        else:
+            self.states.move_to_end(bssid)
+
+        capture_us = int(capture_time * 1_000_000)
+        anomaly = 0
+
+        if state.last_tsf is not None and tsf is not None:
+            # TSF deve sempre crescer; recuos repetidos indicam outro rádio
+            if tsf <= state.last_tsf:
+                state.tsf_regressions += 1
+                anomaly += 1
+
+            offset = capture_us - tsf
+            if state.offset_us is not None and abs(offset - state.offset_us) > self.OFFSET_JUMP_US:
+                state.offset_jumps += 1
+                anomaly += 1
+                # Reancora no novo offset: um AP que reiniciou só é contado uma vez
+                state.offset_us = offset
+            else:
+                state.offset_us = offset if state.offset_us is None else state.offset_us + (offset - state.offset_us) / 8
+        elif tsf is not None:
+            state.offset_us = capture_us - tsf
+
+        if state.last_seq is not None and seq is not None:
+            delta = (seq - state.last_seq) % 4096
+            if delta == 0 or delta > 2048:  # repetida ou voltou no tempo
+                state.seq_anomalies += 1
+                anomaly += 1
+
+        if state.last_capture is not None and interval_tu:
+            observed_us = capture_us - int(state.last_capture * 1_000_000)
+            expected_us = interval_tu * self.TU_US
+            if observed_us > 0:
+                # Beacons perdidos aparecem como múltiplos do intervalo
+                periods = max(1, round(observed_us / expected_us))
+                error = abs(observed_us - periods * expected_us)
+                state.jitter_us += (error - state.jitter_us) / 16
+            if state.interval_tu is not None and interval_tu != state.interval_tu:
+                anomaly += 1
+
+        state.score = state.score * self.SCORE_DECAY + anomaly
+        state.last_capture = capture_time
+        if tsf is not None:
+            state.last_tsf = tsf
+        if seq is not None:
+            state.last_seq = seq
+        if interval_tu:
+            state.interval_tu = interval_tu
+        state.beacons += 1
+        return state.score
+
+    def anomalies(self, now=None):
+        """BSSIDs ainda ativos com pontuação acima do limiar e os motivos observados"""
+        now = now if now is not None else time.time()
+        flagged = []
+        for bssid, state in list(self.states.items()):
+            if state.score < self.FLAG_SCORE:
+                continue
+            interval_us = (state.interval_tu or self.DEFAULT_INTERVAL_TU) * self.TU_US
+            if now - state.last_capture > self.STALE_INTERVALS * interval_us / 1_000_000:
+                continue
+            reasons = []
+            if state.tsf_regressions:
+                reasons.append(f"TSF regrediu {state.tsf_regressions}x")
+            if state.offset_jumps:
+                reasons.append(f"offset TSF saltou {state.offset_jumps}x")
+            if state.seq_anomalies:
+                reasons.append(f"sequência descontínua {state.seq_anomalies}x")
+            flagged.append({
+                'bssid': bssid,
+                'score': round(state.score, 1),
+                'beacons': state.beacons,
+                'interval_jitter_ms': round(state.jitter_us / 1000, 2),
+                'reasons': reasons
+            })
+        flagged.sort(key=lambda item: item['score'], reverse=True)
+        return flagged
+
+    def reset(self):
+        self.states.clear()
+
 
 class NetworkProblemSolver:
     def __init__(self, db_name="wireless_monitor.db"):
         self.db_name = db_name
+        self.signal_tracker = SignalStrengthTracker()
+        self.deauth_detector = DeauthAttackDetector()
+        self.beacon_analyzer = BeaconTimingAnalyzer()
+        self.channel_planner = ChannelPlanner()
+        self.airtime = ChannelAirtimeEstimator()
         self.init_diagnostics_database()
         
         # Base de conhecimento de problemas WiFi - APRIMORADA
         self.problem_knowledge_base = {
             'high_latency': {
                 'name': 'Latência Alta',
-                'thresholds': {'latency': 100, 'jitter': 30},
+                'thresholds': {'latency': 100, 'jitter': 30, 'latency_p95': 200},
                 'symptoms': ['latência acima de 100ms', 'jitter alto', 'chamadas com eco'],
                 'causes': [
                     'Canal WiFi congestionado',
@@ -103,7 +1864,7 @@ class NetworkProblemSolver:
             },
             'channel_congestion': {
                 'name': 'Canal Congestionado',
-                'thresholds': {'nearby_networks': 10},
+                'thresholds': {'channel_utilization': 60},
                 'symptoms': ['performance piora em horários de pico', 'interferência intermitente'],
                 'causes': [
                     'Muitas redes no mesmo canal',
@@ -152,6 +1913,23 @@ class NetworkProblemSolver:
                     'Contatar administrador de rede'
                 ],
                 'severity': 'critical'
+            },
+            'beacon_spoofing': {
+                'name': 'Possível AP Falso (BSSID Clonado)',
+                'thresholds': {'beacon_anomalies': 0},
+                'symptoms': ['conexão cai e volta em outro AP', 'portal ou certificado inesperado', 'sinal do AP oscila'],
+                'causes': [
+                    'Dois rádios anunciando o mesmo BSSID (evil twin)',
+                    'Beacons forjados por ferramenta de ataque',
+                    'AP reiniciando repetidamente'
+                ],
+                'solutions': [
+                    'Localizar o transmissor com o BSSID duplicado',
+                    'Usar WPA3/802.11w (Protected Management Frames)',
+                    'Conferir o certificado/portal antes de autenticar',
+                    'Contatar administrador de rede'
+                ],
+                'severity': 'critical'
             }
         }
 
@@ -189,27 +1967,73 @@ class NetworkProblemSolver:
             )
             """)
             
+            # Episódios (início/fim) gerados pela avaliação em lote do histórico
+            _ensure_columns(cur, 'network_diagnostics', [
+                ('started_at', 'TEXT'),
+                ('ended_at', 'TEXT'),
+                ('source', 'TEXT')
+            ])
+            
             conn.commit()
             conn.close()
             print("[DIAGNOSTIC] Banco de dados de diagnóstico inicializado")
         except Exception as e:
             print(f"[DIAGNOSTIC-ERRO] Falha ao inicializar DB: {e}")
 
-    def analyze_network_health(self, qos_metrics, wireless_devices, capture_queue, network_stats, current_wifi_info=None):
-        """Analisa a saúde da rede e detecta problemas - APRIMORADA"""
-        print("\n🔍 ANALISANDO SAÚDE DA REDE...")
-        
-        problems_detected = []
+    # Direção da comparação de cada métrica com seu limiar
+    RULE_OPERATORS = {
+        'latency': '>', 'jitter': '>', 'latency_p95': '>', 'packet_loss': '>',
+        'throughput': '<', 'signal_strength': '<', 'nearby_networks': '>',
+        'deauth_packets': '>', 'beacon_anomalies': '>', 'channel_utilization': '>'
+    }
+
+    def compile_rules(self):
+        """{problema: [(métrica, operador, limiar)]}, combinadas por OU"""
+        rules = {}
+        for problem_id, info in self.problem_knowledge_base.items():
+            conditions = [(metric, self.RULE_OPERATORS[metric], threshold)
+                          for metric, threshold in info['thresholds'].items()
+                          if metric in self.RULE_OPERATORS]
+            if conditions:
+                rules[problem_id] = conditions
+        return rules
+
+    def collect_metrics(self, qos_metrics, wireless_devices, network_stats, current_wifi_info=None):
+        """Monta o dicionário de métricas usado pelas regras de diagnóstico"""
+        signal_stats = self.signal_tracker.stats() or {}
+        beacon_anomalies = self.beacon_analyzer.anomalies()
+        nearby_networks = len([dev for dev in list(wireless_devices.values()) if dev.get('type') == 'AP'])
+        
+        # Ocupação medida do canal conectado; sem captura nesse canal, estima
+        # ~6% de airtime por rede vizinha (a carga de outro canal não se aplica)
+        channel = (current_wifi_info or {}).get('channel')
+        utilization = self.airtime.utilization(channel, band=current_wifi_info.get('band')) if channel else None
+        utilization_source = 'medida'
+        if utilization is None:
+            utilization = min(100.0, nearby_networks * 6.0)
+            utilization_source = 'estimada'
         
         # Coleta métricas atuais - COM SINAL REAL
         current_metrics = {
             'latency': qos_metrics['latency'],
             'jitter': qos_metrics['jitter'],
             'packet_loss': qos_metrics['packet_loss'],
-            'nearby_networks': len([dev for dev in wireless_devices.values() if dev.get('type') == 'AP']),
-            'signal_strength': self.get_real_signal_strength(),  # MUDADO: Agora usa função real
+            'latency_p95': qos_metrics.get('latency_p95', 0),
+            'latency_p99': qos_metrics.get('latency_p99', 0),
+            'latency_stddev': qos_metrics.get('latency_stddev', 0),
+            'hops': qos_metrics.get('hops', {}),
+            'nearby_networks': nearby_networks,
+            'channel_utilization': utilization,
+            'channel_utilization_source': utilization_source,
+            'signal_strength': self.get_real_signal_strength(),  # Valor suavizado (EWMA) em memória
+            'signal_variance': signal_stats.get('variance', 0),
+            'signal_trend': signal_stats.get('trend', 0),
             'throughput': self.estimate_throughput(),
-            'deauth_packets': network_stats.get('deauth_count', 0),
+            'deauth_packets': self.deauth_detector.window_count(),  # Janela deslizante, não acumulado
+            'deauth_pairs': self.deauth_detector.top_pairs(3),
+            'deauth_sources': self.deauth_detector.top_sources(3),
+            'beacon_anomalies': len(beacon_anomalies),
+            'beacon_anomaly_details': beacon_anomalies[:3],
             'auth_packets': network_stats.get('auth_count', 0),
             'data_packets': network_stats.get('data_count', 0)
         }
@@ -219,13 +2043,30 @@ class NetworkProblemSolver:
             current_metrics.update({
                 'connected_ssid': current_wifi_info.get('ssid', 'Desconhecido'),
                 'connected_channel': current_wifi_info.get('channel', 0),
+                'connected_band': current_wifi_info.get('band'),
                 'connected_frequency': current_wifi_info.get('frequency', '2.4GHz'),
                 'connected_security': current_wifi_info.get('security', 'Desconhecido')
             })
-            
+        return current_metrics
+
+    def analyze_network_health(self, qos_metrics, wireless_devices, capture_queue, network_stats, current_wifi_info=None,
+                               persist=True):
+        """Analisa a saúde da rede e detecta problemas - APRIMORADA
+
+        persist=False evita gravar o resultado (ex.: quando o monitor contínuo
+        já registra as transições de estado).
+        """
+        print("\n🔍 ANALISANDO SAÚDE DA REDE...")
+        
+        problems_detected = []
+        current_metrics = self.collect_metrics(qos_metrics, wireless_devices, network_stats, current_wifi_info)
+        
+        if current_wifi_info:
             # Detecção especial para canal não-padrão
-            if self._detect_non_standard_channel(current_wifi_info.get('channel', 0)):
-                problem_data = self._generate_non_standard_channel_report(current_wifi_info.get('channel', 0))
+            if self._detect_non_standard_channel(current_wifi_info.get('channel', 0),
+                                                                    current_wifi_info.get('band')):
+                problem_data = self._generate_non_standard_channel_report(current_wifi_info.get('channel', 0),
+                                                                          current_wifi_info.get('band'))
                 problems_detected.append(problem_data)
                 capture_queue.put(f"⚠️  PROBLEMA DETECTADO: {problem_data['problem_name']}\n")
                 capture_queue.put(f"   Severidade: {problem_data['severity'].upper()}\n")
@@ -246,72 +2087,37 @@ class NetworkProblemSolver:
                 capture_queue.put(f"   Confiança: {problem_data['confidence']}%\n")
         
         if problems_detected:
-            self._save_diagnosis(problems_detected, current_metrics)
+            if persist:
+                self._save_diagnosis(problems_detected, current_metrics)
             return problems_detected
         else:
             # Verifica se há canal não-padrão mesmo sem outros problemas
-            if current_wifi_info and self._detect_non_standard_channel(current_wifi_info.get('channel', 0)):
-                problem_data = self._generate_non_standard_channel_report(current_wifi_info.get('channel', 0))
+            if current_wifi_info and self._detect_non_standard_channel(current_wifi_info.get('channel', 0),
+                                                                    current_wifi_info.get('band')):
+                problem_data = self._generate_non_standard_channel_report(current_wifi_info.get('channel', 0),
+                                                                          current_wifi_info.get('band'))
                 problems_detected.append(problem_data)
-                self._save_diagnosis(problems_detected, current_metrics)
+                if persist:
+                    self._save_diagnosis(problems_detected, current_metrics)
                 return problems_detected
             else:
                 capture_queue.put("✅ Rede saudável - nenhum problema crítico detectado\n")
                 return []
 
     def get_real_signal_strength(self):
-        """Obtém a força REAL do sinal da rede WiFi conectada"""
-        try:
-            # Usa iwconfig para obter sinal real
-            result = subprocess.run(
-                ['iwconfig'], 
-                capture_output=True, 
-                text=True
-            )
-            
-            if result.returncode == 0:
-                for line in result.stdout.split('\n'):
-                    if 'Signal level=' in line:
-                        # Extrai valor do sinal em dBm
-                        match = re.search(r'Signal level=(-?\d+) dBm', line)
-                        if match:
-                            return int(match.group(1))
-                        # Tenta outros formatos
-                        match = re.search(r'Signal level=(-?\d+)/(\d+)', line)
-                        if match:
-                            # Converte de fração para dBm aproximado
-                            signal = int(match.group(1))
-                            max_signal = int(match.group(2))
-                            # Aproximação: 100% = -20dBm, 0% = -100dBm
-                            dbm = -20 + (signal/max_signal * -80)
-                            return int(dbm)
-            
-            # Fallback: tenta obter via iw
-            result = subprocess.run(
-                ['iw', 'dev', 'wlan0', 'link'],  # Ajuste a interface se necessário
-                capture_output=True, 
-                text=True
-            )
-            
-            if result.returncode == 0:
-                for line in result.stdout.split('\n'):
-                    if 'signal:' in line:
-                        match = re.search(r'signal:\s*(-?\d+)', line)
-                        if match:
-                            return int(match.group(1))
-        
-        except Exception as e:
-            print(f"[DIAGNOSTIC-ERRO] Falha ao obter sinal: {e}")
-        
-        # Fallback: retorna um valor razoável
-        return -65
+        """Obtém a força REAL do sinal (suavizada) da série mantida em memória"""
+        stats = self.signal_tracker.stats()
+        return stats['smoothed'] if stats else None
 
     def _detect_problem(self, problem_id, metrics):
         """Detecta se um problema específico está ocorrendo"""
         thresholds = self.problem_knowledge_base[problem_id]['thresholds']
         
         if problem_id == 'high_latency':
-            return metrics['latency'] > thresholds['latency'] or metrics['jitter'] > thresholds['jitter']
+            # p95 captura picos que a média da janela esconde
+            return (metrics['latency'] > thresholds['latency'] or
+                    metrics['jitter'] > thresholds['jitter'] or
+                    metrics.get('latency_p95', 0) > thresholds['latency_p95'])
         
         elif problem_id == 'packet_loss':
             return metrics['packet_loss'] > thresholds['packet_loss']
@@ -320,30 +2126,33 @@ class NetworkProblemSolver:
             return metrics['throughput'] < thresholds['throughput']
         
         elif problem_id == 'signal_weak':
+            # Sem amostras de sinal não há como afirmar que está fraco
+            if metrics['signal_strength'] is None:
+                return False
             return metrics['signal_strength'] < thresholds['signal_strength']
         
         elif problem_id == 'channel_congestion':
-            return metrics['nearby_networks'] > thresholds['nearby_networks']
+            return metrics['channel_utilization'] > thresholds['channel_utilization']
         
         elif problem_id == 'deauth_attack':
             return metrics['deauth_packets'] > thresholds['deauth_packets']
         
+        elif problem_id == 'beacon_spoofing':
+            return metrics.get('beacon_anomalies', 0) > thresholds['beacon_anomalies']
+        
         return False
 
-    def _detect_non_standard_channel(self, channel):
+    def _detect_non_standard_channel(self, channel, band=None):
         """Detecta se o canal é não-padrão (sobreposto)"""
-        if not channel or channel == 0:
+        if not channel:
             return False
         
-        # Para banda 2.4GHz
-        if 1 <= channel <= 13:
-            # Canais não sobrepostos: 1, 6, 11
-            if channel not in [1, 6, 11]:
-                return True
-        
-        return False
+        # Só 2.4GHz tem canais sobrepostos; o 14 (Japão) fica de fora
+        info = channel_info(channel, band)
+        return (info is not None and info.band == '2.4' and channel <= 13
+                and channel not in ChannelPlanner.NON_OVERLAPPING_24)
 
-    def _generate_non_standard_channel_report(self, channel):
+    def _generate_non_standard_channel_report(self, channel, band=None):
         """Gera relatório para canal não-padrão"""
         problem_info = self.problem_knowledge_base['non_standard_channel']
         
@@ -355,7 +2164,7 @@ class NetworkProblemSolver:
             'symptoms_detected': problem_info['symptoms'],
             'causes': problem_info['causes'],
             'solutions': problem_info['solutions'],
-            'metrics': {'channel': channel},
+            'metrics': {'channel': channel, 'band': band},
             'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
 
@@ -366,9 +2175,16 @@ class NetworkProblemSolver:
         # Calcula confiança baseada na gravidade
         confidence = self._calculate_confidence(problem_id, metrics)
         
+        # Localiza o segmento do caminho responsável (Wi-Fi, LAN ou WAN)
+        segment = self._locate_segment(problem_id, metrics.get('hops'))
+        problem_name = problem_info['name']
+        if segment:
+            problem_name += f" - {QoSProbeScheduler.SEGMENT_NAMES[segment]}"
+        
         return {
             'problem_type': problem_id,
-            'problem_name': problem_info['name'],
+            'problem_name': problem_name,
+            'segment': segment,
             'severity': problem_info['severity'],
             'confidence': confidence,
             'symptoms_detected': problem_info['symptoms'],
@@ -378,6 +2194,38 @@ class NetworkProblemSolver:
             'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
 
+    def _locate_segment(self, problem_id, hops):
+        """Retorna o segmento do caminho responsável pelo problema
+
+        Perda: o primeiro segmento acima do limiar. Latência: o primeiro salto
+        sem resposta ou, senão, o segmento que acrescenta a maior parte da
+        latência acumulada, mesmo que nenhum passe sozinho do limiar (aumento
+        espalhado pelo caminho).
+        """
+        if not hops or problem_id not in ('high_latency', 'packet_loss'):
+            return None
+        thresholds = self.problem_knowledge_base[problem_id]['thresholds']
+        previous_latency = 0
+        worst_segment, worst_increase = None, 0
+        
+        for segment in QoSProbeScheduler.SEGMENT_ORDER:
+            hop = hops.get(segment)
+            if not hop:
+                continue
+            if problem_id == 'packet_loss':
+                if hop['packet_loss'] > thresholds['packet_loss']:
+                    return segment
+            elif hop['latency'] is None:
+                # Sem resposta neste salto: a falha está aqui
+                return segment
+            else:
+                # Latência acumulada: o segmento culpado é o que mais acrescenta
+                increase = hop['latency'] - previous_latency
+                if increase > worst_increase:
+                    worst_segment, worst_increase = segment, increase
+                previous_latency = max(previous_latency, hop['latency'])
+        return worst_segment
+
     def _calculate_confidence(self, problem_id, metrics):
         """Calcula confiança na detecção do problema"""
         base_confidence = 80
@@ -387,6 +2235,8 @@ class NetworkProblemSolver:
                 base_confidence += 15
             if metrics['jitter'] > 50:
                 base_confidence += 10
+            if metrics.get('latency_p99', 0) > 300:
+                base_confidence += 5
                 
         elif problem_id == 'packet_loss':
             if metrics['packet_loss'] > 10:
@@ -397,15 +2247,24 @@ class NetworkProblemSolver:
                 base_confidence += 15
             if metrics['signal_strength'] < -80:
                 base_confidence += 10
+            if metrics.get('signal_trend', 0) < -1:
+                base_confidence += 5  # Sinal ainda piorando
                 
         elif problem_id == 'channel_congestion':
-            if metrics['nearby_networks'] > 15:
+            if metrics['channel_utilization'] > 80:
                 base_confidence += 15
+            if metrics.get('channel_utilization_source') == 'estimada':
+                base_confidence -= 10  # Inferida pela contagem de redes
                 
         elif problem_id == 'deauth_attack':
             if metrics['deauth_packets'] > 20:
                 base_confidence += 25
                 
+        elif problem_id == 'beacon_spoofing':
+            details = metrics.get('beacon_anomaly_details', [])
+            if details and details[0]['score'] > 10:
+                base_confidence += 15
+                
         return min(base_confidence, 100)
 
     def estimate_throughput(self):
@@ -450,16 +2309,17 @@ class NetworkProblemSolver:
             # Adiciona informação sobre canal mesmo se não houver problemas
             if wifi_info and wifi_info.get('channel'):
                 channel = wifi_info.get('channel')
+                band = wifi_info.get('band')
                 signal = wifi_info.get('signal_strength', 'N/A')
                 
                 report += f"\n\n📊 ESTADO ATUAL:\n"
                 report += f"   📶 Sinal: {signal}\n"
                 report += f"   📡 Canal: {channel}\n"
                 
-                if self._detect_non_standard_channel(channel):
+                if self._detect_non_standard_channel(channel, band):
                     report += f"   ⚠️  ALERTA: Canal {channel} não é recomendado!\n"
                     report += f"      Use canal 1, 6 ou 11 para melhor performance\n"
-                elif channel in [1, 6, 11]:
+                elif channel in ChannelPlanner.NON_OVERLAPPING_24 and band in (None, '2.4'):
                     report += f"   ✅ Canal {channel} é ideal (não sobreposto)\n"
                 
                 # Adiciona recomendação baseada no sinal
@@ -487,7 +2347,10 @@ class NetworkProblemSolver:
         for i, problem in enumerate(problems_detected, 1):
             report += f"🚨 PROBLEMA {i}: {problem['problem_name']}\n"
             report += f"   ⚠️  Severidade: {problem['severity'].upper()}\n"
-            report += f"   🎯 Confiança: {problem['confidence']}%\n\n"
+            report += f"   🎯 Confiança: {problem['confidence']}%\n"
+            if problem.get('segment'):
+                report += f"   📍 Segmento afetado: {QoSProbeScheduler.SEGMENT_NAMES[problem['segment']]}\n"
+            report += "\n"
             
             report += f"   📋 SINTOMAS:\n"
             for symptom in problem['symptoms_detected'][:3]:
@@ -502,24 +2365,41 @@ class NetworkProblemSolver:
                 report += f"      • {solution}\n"
             
             report += f"\n   📈 MÉTRICAS:\n"
-            if 'signal_strength' in problem['metrics']:
+            if problem['metrics'].get('signal_strength') is not None:
                 signal = problem['metrics']['signal_strength']
                 report += f"      • Sinal: {signal}dBm\n"
                 if signal < -70:
                     report += f"      ⚠️  SINAL FRACO (abaixo de -70dBm)\n"
+                if problem['metrics'].get('signal_trend'):
+                    report += f"      • Tendência do sinal: {problem['metrics']['signal_trend']:+} dB/min\n"
             
             if 'latency' in problem['metrics']:
                 report += f"      • Latência: {problem['metrics']['latency']}ms\n"
+            if problem['metrics'].get('latency_p95'):
+                report += f"      • Latência p95/p99: {problem['metrics']['latency_p95']}ms / {problem['metrics'].get('latency_p99', 0)}ms\n"
             if 'jitter' in problem['metrics']:
                 report += f"      • Jitter: {problem['metrics']['jitter']}ms\n"
             if 'packet_loss' in problem['metrics']:
                 report += f"      • Perda: {problem['metrics']['packet_loss']}%\n"
+            if problem['problem_type'] == 'beacon_spoofing':
+                for item in problem['metrics'].get('beacon_anomaly_details', []):
+                    report += f"      • BSSID {item['bssid']}: {'; '.join(item['reasons']) or 'intervalo irregular'}\n"
+            if problem['problem_type'] == 'deauth_attack':
+                for pair in problem['metrics'].get('deauth_pairs', []):
+                    reasons = ", ".join(str(r) for r in pair['reasons']) or "N/A"
+                    report += f"      • {pair['src']} → {pair['dst']} (BSSID {pair['bssid']}): {pair['count']} quadros | Razões: {reasons}\n"
+                if not problem['metrics'].get('deauth_pairs'):
+                    for source in problem['metrics'].get('deauth_sources', []):
+                        report += f"      • {DEAUTH_SOURCE_NAMES[source['kind']]} {source['mac']}: {source['count']} quadros\n"
             if 'nearby_networks' in problem['metrics']:
                 report += f"      • Redes próximas: {problem['metrics']['nearby_networks']}\n"
+            if problem['problem_type'] == 'channel_congestion':
+                report += (f"      • Ocupação do canal: {problem['metrics']['channel_utilization']:.0f}% "
+                           f"({problem['metrics'].get('channel_utilization_source', 'medida')})\n")
             if 'channel' in problem['metrics']:
                 channel = problem['metrics']['channel']
                 report += f"      • Canal: {channel}\n"
-                if self._detect_non_standard_channel(channel):
+                if self._detect_non_standard_channel(channel, problem['metrics'].get('band')):
                     report += f"      ⚠️  CANAL NÃO-PADRÃO (sobreposto)\n"
             
             report += "\n" + "─" * 50 + "\n\n"
@@ -538,78 +2418,482 @@ class NetworkProblemSolver:
         
         return list(set(quick_fixes))[:5]  # Remove duplicatas e limita a 5
 
-    def get_recommended_channel(self, wireless_devices, current_channel=None):
-        """Recomenda o melhor canal baseado nas redes vizinhas - APRIMORADA"""
-        aps = [dev for dev in wireless_devices.values() if dev.get('type') == 'AP']
-        channel_count = {}
-        
-        for ap in aps:
-            channel = ap.get('channel')
-            if channel:
-                # Converte canais não-padrão para o mais próximo padrão (1,6,11)
-                if channel in [1, 2, 3, 4, 5]:
-                    standardized_channel = 1
-                elif channel in [6, 7, 8, 9, 10]:
-                    standardized_channel = 6
-                elif channel in [11, 12, 13]:
-                    standardized_channel = 11
-                else:
-                    # Para canais 5GHz, mantém como está
-                    standardized_channel = channel
-                    
-                channel_count[standardized_channel] = channel_count.get(standardized_channel, 0) + 1
-        
-        # Canais não sobrepostos recomendados para 2.4GHz
-        recommended_channels_24 = [1, 6, 11]
-        
-        # Se temos um canal atual, damos prioridade a ele se não estiver muito congestionado
-        if current_channel and current_channel in recommended_channels_24:
-            current_networks = channel_count.get(current_channel, 0)
-            # Se o canal atual tem menos de 5 redes, mantém ele
-            if current_networks < 5:
-                return current_channel, current_networks
-        
-        # Encontra o canal menos congestionado
-        best_channel = min(recommended_channels_24, key=lambda x: channel_count.get(x, 0))
-        congestion_level = channel_count.get(best_channel, 0)
-        
-        return best_channel, congestion_level
+    def get_recommended_channel(self, wireless_devices, current_channel=None, band=None):
+        """Ranking de canais ponderado por interferência - APRIMORADA
+
+        Retorna lista de dicts (channel, band, score, networks, dfs), do melhor
+        para o pior. Sem banda explícita, usa a banda do canal atual; o canal
+        atual é mantido no topo se sua pontuação estiver próxima da melhor.
+        """
+        self.channel_planner.sync(wireless_devices, self.airtime.airtime_by_bss(window=60), window=60)
+        if band is None and current_channel:
+            band = default_band(current_channel)
+        ranked = self.channel_planner.rank(band, utilization=self.airtime.utilization_by_channel(window=60))
+        
+        # Evita trocar de canal por ganho marginal
+        if current_channel and ranked:
+            current = next((item for item in ranked
+                            if item['channel'] == current_channel and item['band'] == band), None)
+            if current and current['score'] - ranked[0]['score'] < 1.0:
+                ranked.remove(current)
+                ranked.insert(0, current)
+        
+        return ranked
+
+    def check_channel_quality(self, channel, band=None):
+        """Verifica a qualidade do canal atual"""
+        if not channel or channel == 0:
+            return "Desconhecido", "N/A"
+        
+        if band == '6':
+            return "Excelente", f"Canal {channel} (6GHz) sem redes legadas e sem sobreposição"
+        # Canais não-padrão em 2.4GHz
+        if channel in ChannelPlanner.NON_OVERLAPPING_24:
+            quality = "Excelente"
+            reason = f"Canal {channel} é não-sobreposto (ideal)"
+        elif 2 <= channel <= 5:
+            quality = "Ruim"
+            reason = f"Canal {channel} interfere com canal 1"
+        elif 7 <= channel <= 10:
+            quality = "Ruim"
+            reason = f"Canal {channel} interfere com canal 6"
+        elif channel == 12 or channel == 13:
+            quality = "Ruim"
+            reason = f"Canal {channel} interfere com canal 11"
+        elif channel >= 36:  # Canais 5GHz
+            quality = "Boa"
+            reason = f"Canal {channel} (5GHz) tem menos interferência"
+        else:
+            quality = "Desconhecida"
+            reason = f"Canal {channel} não identificado"
+        
+        return quality, reason
+
+class HistoricalDiagnosisEvaluator:
+    """Avalia as regras de diagnóstico em lote sobre o histórico de QoS
+
+    Os limiares de problem_knowledge_base são compilados em comparações
+    vetoriais (NumPy) aplicadas a colunas inteiras de qos_metrics ou dos
+    rollups de qos_rrd; transições da máscara viram episódios início/fim.
+    Nos rollups, buckets não consecutivos (captura parada) encerram o
+    episódio em vez de emendar os dois lados do buraco.
+    """
+
+    DEFAULT_ROLLUP_RANGE = 30 * 86400  # Sem intervalo pedido: últimos 30 dias (arquivo '1h')
+
+    def __init__(self, problem_solver):
+        self.problem_solver = problem_solver
+        self.db_name = problem_solver.db_name
+        self.rules = problem_solver.compile_rules()
+
+    @staticmethod
+    def _compare(values, operator, threshold):
+        if np is not None:
+            # NaN (valor ausente) nunca satisfaz a comparação
+            return values > threshold if operator == '>' else values < threshold
+        if operator == '>':
+            return [v is not None and v > threshold for v in values]
+        return [v is not None and v < threshold for v in values]
+
+    @staticmethod
+    def _combine(mask, other):
+        if np is not None:
+            return mask | other
+        return [a or b for a, b in zip(mask, other)]
+
+    def evaluate(self, columns):
+        """Retorna {problema: máscara booleana} para as colunas disponíveis"""
+        masks = {}
+        for problem_id, conditions in self.rules.items():
+            mask = None
+            for metric, operator, threshold in conditions:
+                if metric not in columns:
+                    continue
+                hit = self._compare(columns[metric], operator, threshold)
+                mask = hit if mask is None else self._combine(mask, hit)
+            if mask is not None:
+                masks[problem_id] = mask
+        return masks
+
+    @staticmethod
+    def episodes(mask, breaks=None):
+        """Converte a máscara em intervalos [(início, fim)] de índices
+
+        breaks: índices de linhas que vêm depois de um buraco na série; um
+        episódio ativo é encerrado antes delas.
+        """
+        if np is not None:
+            padded = np.concatenate(([False], np.asarray(mask, dtype=bool), [False]))
+            edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+            intervals = [(int(a), int(b) - 1) for a, b in zip(edges[::2], edges[1::2])]
+        else:
+            intervals, start = [], None
+            for i, active in enumerate(mask):
+                if active and start is None:
+                    start = i
+                elif not active and start is not None:
+                    intervals.append((start, i - 1))
+                    start = None
+            if start is not None:
+                intervals.append((start, len(mask) - 1))
+        if not breaks:
+            return intervals
+        split = []
+        for first, last in intervals:
+            for i in breaks:
+                if first < i <= last:
+                    split.append((first, i - 1))
+                    first = i
+            split.append((first, last))
+        return split
+
+    def _to_column(self, values):
+        if np is not None:
+            return np.array([np.nan if v is None else v for v in values], dtype=float)
+        return values
+
+    def load_qos_history(self, start=None, end=None):
+        """Carrega qos_metrics como (timestamps, {métrica: coluna})"""
+        conn = sqlite3.connect(self.db_name)
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT timestamp, latency, jitter, packet_loss, latency_p95 FROM qos_metrics
+            WHERE timestamp BETWEEN ? AND ?
+            ORDER BY timestamp
+        """, (start or '', end or '9999'))
+        rows = cur.fetchall()
+        conn.close()
+        timestamps = [row[0] for row in rows]
+        columns = {}
+        for i, metric in enumerate(['latency', 'jitter', 'packet_loss', 'latency_p95'], 1):
+            columns[metric] = self._to_column([row[i] for row in rows])
+        return timestamps, columns
+
+    def choose_rollup_archive(self, start=None, end=None):
+        """Arquivo de qos_rrd mais fino cuja retenção ainda cobre o início pedido"""
+        now = time.time()
+        start = start if start is not None else now - self.DEFAULT_ROLLUP_RANGE
+        for archive, step, size in QoSHistoryArchive.ARCHIVES:
+            if now - start <= step * size:
+                return archive, step
+        archive, step, _ = QoSHistoryArchive.ARCHIVES[-1]
+        return archive, step
+
+    def load_rollup_history(self, archive=None, start=None, end=None):
+        """Carrega as médias de um arquivo de qos_rrd alinhadas por bucket
+
+        Sem archive, escolhe pelo intervalo (padrão: últimos 30 dias). Retorna
+        (timestamps, {métrica: coluna}, índices após buracos na série).
+        """
+        if archive is None:
+            archive, step = self.choose_rollup_archive(start, end)
+        else:
+            step = next(step for name, step, _ in QoSHistoryArchive.ARCHIVES if name == archive)
+        conn = sqlite3.connect(self.db_name)
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT metric, bucket_start, avg FROM qos_rrd
+            WHERE archive = ? AND bucket_start BETWEEN ? AND ?
+            ORDER BY bucket_start
+        """, (archive, int(start or 0), int(end if end is not None else time.time())))
+        rows = cur.fetchall()
+        conn.close()
+        buckets = sorted({row[1] for row in rows})
+        position = {bucket: i for i, bucket in enumerate(buckets)}
+        series = defaultdict(lambda: [None] * len(buckets))
+        for metric, bucket, avg in rows:
+            series[metric][position[bucket]] = avg
+        breaks = [i for i in range(1, len(buckets)) if buckets[i] - buckets[i - 1] > step]
+        timestamps = [datetime.datetime.fromtimestamp(b).strftime("%Y-%m-%d %H:%M:%S") for b in buckets]
+        return timestamps, {metric: self._to_column(values) for metric, values in series.items()}, breaks
+
+    def find_episodes(self, timestamps, columns, breaks=None):
+        """Lista episódios {'problem_type', 'started_at', 'ended_at', 'samples', 'row'}"""
+        result = []
+        for problem_id, mask in self.evaluate(columns).items():
+            for first, last in self.episodes(mask, breaks):
+                # Métricas da primeira amostra do episódio (usadas para a confiança)
+                row = {}
+                for metric, col in columns.items():
+                    value = col[first]
+                    if np is not None:
+                        value = None if np.isnan(value) else float(value)
+                    row[metric] = value
+                result.append({
+                    'problem_type': problem_id,
+                    'started_at': timestamps[first],
+                    'ended_at': timestamps[last],
+                    'samples': last - first + 1,
+                    'row': row
+                })
+        result.sort(key=lambda ep: ep['started_at'])
+        return result
+
+    def backfill(self, source='qos_metrics', archive=None):
+        """Reprocessa o histórico e regrava os episódios em network_diagnostics"""
+        breaks = None
+        if source == 'rollup':
+            archive = archive or self.choose_rollup_archive()[0]
+            timestamps, columns, breaks = self.load_rollup_history(archive)
+            source_tag = f"backfill:rrd:{archive}"
+        else:
+            timestamps, columns = self.load_qos_history()
+            source_tag = "backfill:qos_metrics"
+        episodes = self.find_episodes(timestamps, columns, breaks)
+
+        conn = sqlite3.connect(self.db_name)
+        cur = conn.cursor()
+        # Idempotente: substitui o resultado de reprocessamentos anteriores
+        cur.execute("DELETE FROM network_diagnostics WHERE source = ?", (source_tag,))
+        rows = []
+        for ep in episodes:
+            info = self.problem_solver.problem_knowledge_base[ep['problem_type']]
+            metrics = defaultdict(int, {k: v for k, v in ep['row'].items() if v is not None})
+            rows.append((
+                ep['started_at'], ep['problem_type'], info['name'], info['severity'],
+                self.problem_solver._calculate_confidence(ep['problem_type'], metrics),
+                '; '.join(info['symptoms']), '; '.join(info['causes']), '; '.join(info['solutions']),
+                str(dict(metrics)), json.dumps({'samples': ep['samples']}),
+                ep['started_at'], ep['ended_at'], source_tag
+            ))
+        cur.executemany("""
+            INSERT INTO network_diagnostics
+            (timestamp, problem_type, problem_name, severity, confidence, symptoms_detected, causes,
+             solutions, qos_metrics, environment_data, started_at, ended_at, source)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+        conn.close()
+        return len(timestamps), episodes
+
+
+class ContinuousDiagnosisMonitor:
+    """Diagnóstico contínuo em segundo plano com histerese
+
+    A cada ciclo só são reavaliadas as regras cujas métricas de entrada
+    mudaram. Um problema abre após a regra valer por enter_seconds e só fecha
+    depois de exit_seconds com as métricas além da margem de histerese. Linhas
+    em network_diagnostics (source='continuous') só são gravadas nas
+    transições: INSERT ao abrir e UPDATE de ended_at ao resolver.
+    """
+
+    SOURCE = 'continuous'
+    # Margem absoluta exigida para considerar a métrica normalizada
+    HYSTERESIS_MARGINS = {
+        'latency': 10, 'jitter': 5, 'latency_p95': 20, 'packet_loss': 1,
+        'throughput': 2, 'signal_strength': 3, 'nearby_networks': 2, 'deauth_packets': 2,
+        'beacon_anomalies': 0, 'channel_utilization': 10
+    }
+
+    def __init__(self, problem_solver, metrics_provider, on_event=None,
+                 interval=5, enter_seconds=10, exit_seconds=30):
+        self.problem_solver = problem_solver
+        self.db_name = problem_solver.db_name
+        self.metrics_provider = metrics_provider
+        self.on_event = on_event
+        self.interval = interval
+        self.enter_seconds = enter_seconds
+        self.exit_seconds = exit_seconds
+
+        self.rules = problem_solver.compile_rules()
+        self.rule_inputs = {pid: {metric for metric, _, _ in conds} for pid, conds in self.rules.items()}
+        self.rule_inputs['non_standard_channel'] = {'connected_channel', 'connected_band'}
+        self.states = {pid: {'raw': False, 'raw_since': 0, 'active': False, 'row_id': None, 'dirty': True}
+                       for pid in self.rule_inputs}
+        self.last_metrics = {}
+        self.running = False
+        self.thread = None
+        self._resume_open_episodes()
+
+    def _resume_open_episodes(self):
+        """Retoma problemas que ficaram abertos na execução anterior"""
+        try:
+            conn = sqlite3.connect(self.db_name)
+            cur = conn.cursor()
+            cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_diagnostics_lifecycle
+            ON network_diagnostics (source, ended_at, started_at)
+            """)
+            cur.execute("""
+                SELECT id, problem_type FROM network_diagnostics
+                WHERE source = ? AND ended_at IS NULL
+            """, (self.SOURCE,))
+            for row_id, problem_id in cur.fetchall():
+                if problem_id in self.states:
+                    self.states[problem_id].update({'raw': True, 'active': True, 'row_id': row_id})
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"[DIAGNOSTIC-ERRO] Falha ao retomar episódios: {e}")
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def _run(self):
+        while self.running:
+            try:
+                self.step(self.metrics_provider())
+            except Exception as e:
+                print(f"[DIAGNOSTIC-ERRO] Falha no diagnóstico contínuo: {e}")
+            time.sleep(self.interval)
+
+    def _condition(self, problem_id, metrics, active):
+        """Avalia a regra; se o problema está ativo exige a margem para sair"""
+        if problem_id == 'non_standard_channel':
+            return self.problem_solver._detect_non_standard_channel(metrics.get('connected_channel', 0),
+                                                                    metrics.get('connected_band'))
+
+        for metric, operator, threshold in self.rules[problem_id]:
+            value = metrics.get(metric)
+            if value is None:
+                continue
+            margin = self.HYSTERESIS_MARGINS.get(metric, 0) if active else 0
+            if operator == '>' and value > threshold - margin:
+                return True
+            if operator == '<' and value < threshold + margin:
+                return True
+        return False
+
+    def step(self, metrics, now=None):
+        """Processa um snapshot de métricas; retorna as transições ocorridas"""
+        now = now if now is not None else time.time()
+        changed = {k for k, v in metrics.items() if self.last_metrics.get(k) != v}
+        self.last_metrics = dict(metrics)
+        transitions = []
+
+        for problem_id, state in self.states.items():
+            # Só reavalia regras com entradas alteradas (ou recém-transicionadas)
+            if state['dirty'] or self.rule_inputs[problem_id] & changed:
+                raw = self._condition(problem_id, metrics, state['active'])
+                state['dirty'] = False
+                if raw != state['raw']:
+                    state['raw'] = raw
+                    state['raw_since'] = now
+
+            if state['raw'] != state['active']:
+                hold = self.enter_seconds if state['raw'] else self.exit_seconds
+                if now - state['raw_since'] >= hold:
+                    state['active'] = state['raw']
+                    state['dirty'] = True  # limiar de saída difere do de entrada
+                    transitions.append(self._transition(problem_id, state, metrics, now))
+
+        return transitions
+
+    def _transition(self, problem_id, state, metrics, now):
+        timestamp = datetime.datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S")
+        if state['active']:
+            if problem_id == 'non_standard_channel':
+                report = self.problem_solver._generate_non_standard_channel_report(
+                    metrics.get('connected_channel', 0), metrics.get('connected_band'))
+            else:
+                report = self.problem_solver._generate_problem_report(problem_id, metrics)
+            state['row_id'] = self._open_episode(report, metrics, timestamp)
+            event = {'event': 'opened', 'problem_type': problem_id, 'problem_name': report['problem_name'],
+                     'severity': report['severity'], 'timestamp': timestamp}
+        else:
+            self._close_episode(state['row_id'], timestamp)
+            state['row_id'] = None
+            event = {'event': 'resolved', 'problem_type': problem_id,
+                     'problem_name': self.problem_solver.problem_knowledge_base[problem_id]['name'],
+                     'timestamp': timestamp}
+        if self.on_event:
+            self.on_event(event)
+        return event
+
+    def _open_episode(self, problem, metrics, timestamp):
+        try:
+            conn = sqlite3.connect(self.db_name)
+            cur = conn.cursor()
+            cur.execute("""
+                INSERT INTO network_diagnostics
+                (timestamp, problem_type, problem_name, severity, confidence, symptoms_detected, causes,
+                 solutions, qos_metrics, environment_data, started_at, ended_at, source)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, ?)
+            """, (
+                timestamp, problem['problem_type'], problem['problem_name'], problem['severity'],
+                problem['confidence'], '; '.join(problem['symptoms_detected']), '; '.join(problem['causes']),
+                '; '.join(problem['solutions']), str(metrics), str(problem['metrics']), timestamp, self.SOURCE
+            ))
+            row_id = cur.lastrowid
+            conn.commit()
+            conn.close()
+            return row_id
+        except Exception as e:
+            print(f"[DIAGNOSTIC-ERRO] Falha ao abrir episódio: {e}")
+            return None
+
+    def _close_episode(self, row_id, timestamp):
+        if row_id is None:
+            return
+        try:
+            conn = sqlite3.connect(self.db_name)
+            cur = conn.cursor()
+            cur.execute("UPDATE network_diagnostics SET ended_at = ? WHERE id = ?", (timestamp, row_id))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"[DIAGNOSTIC-ERRO] Falha ao fechar episódio: {e}")
+
+    def active_problems(self):
+        """Problemas abertos no momento (consulta em memória)"""
+        return [pid for pid, state in self.states.items() if state['active']]
+
+    def get_lifecycles(self, status=None, since=None, limit=100):
+        """Episódios gravados: status 'ongoing' (em aberto) ou 'resolved'"""
+        query = """
+            SELECT problem_type, problem_name, severity, started_at, ended_at
+            FROM network_diagnostics WHERE source = ?
+        """
+        params = [self.SOURCE]
+        if status == 'ongoing':
+            query += " AND ended_at IS NULL"
+        elif status == 'resolved':
+            query += " AND ended_at IS NOT NULL"
+        if since:
+            query += " AND started_at >= ?"
+            params.append(since)
+        query += " ORDER BY started_at DESC LIMIT ?"
+        params.append(limit)
+        try:
+            conn = sqlite3.connect(self.db_name)
+            cur = conn.cursor()
+            cur.execute(query, params)
+            rows = cur.fetchall()
+            conn.close()
+        except Exception as e:
+            print(f"[DIAGNOSTIC-ERRO] Falha ao consultar episódios: {e}")
+            return []
+        return [{'problem_type': r[0], 'problem_name': r[1], 'severity': r[2], 'started_at': r[3],
+                 'ended_at': r[4], 'status': 'ongoing' if r[4] is None else 'resolved'} for r in rows]
 
-    def check_channel_quality(self, channel):
-        """Verifica a qualidade do canal atual"""
-        if not channel or channel == 0:
-            return "Desconhecido", "N/A"
-        
-        # Canais não-padrão em 2.4GHz
-        if channel in [1, 6, 11]:
-            quality = "Excelente"
-            reason = f"Canal {channel} é não-sobreposto (ideal)"
-        elif 2 <= channel <= 5:
-            quality = "Ruim"
-            reason = f"Canal {channel} interfere com canal 1"
-        elif 7 <= channel <= 10:
-            quality = "Ruim"
-            reason = f"Canal {channel} interfere com canal 6"
-        elif channel == 12 or channel == 13:
-            quality = "Ruim"
-            reason = f"Canal {channel} interfere com canal 11"
-        elif channel >= 36:  # Canais 5GHz
-            quality = "Boa"
-            reason = f"Canal {channel} (5GHz) tem menos interferência"
-        else:
-            quality = "Desconhecida"
-            reason = f"Canal {channel} não identificado"
-        
-        return quality, reason
 
 class NetworkSimulator:
     """Simula problemas de rede para testar o sistema de diagnóstico"""
     
+    # Cenários de reprodução de quadros: (beacon, probe, deauth) em pesos relativos
+    REPLAY_SCENARIOS = {
+        'beacon_heavy': (100, 0, 0),
+        'probe_storm': (0, 100, 0),
+        'deauth_flood': (0, 0, 100),
+        'mixed': (60, 35, 5)
+    }
+    REPLAY_CHANNELS = (1, 6, 11, 36, 44, 149)
+    REPLAY_SIGNALS = (-38, -47, -55, -62, -68, -74, -81, -88)
+    _SSID_PLACEHOLDER = b"SIM_00000"
+    _MAC_SPACE = 1 << 40
+    
     def __init__(self):
         self.simulation_active = False
         self.simulation_type = None
+        self._templates = None
         
-    def simulate_problem(self, problem_type, qos_metrics, wireless_devices, network_stats):
+    def simulate_problem(self, problem_type, qos_metrics, wireless_devices, network_stats, deauth_detector=None,
+                         airtime=None):
         """Simula um problema específico na rede"""
         self.simulation_active = True
         self.simulation_type = problem_type
@@ -642,11 +2926,21 @@ class NetworkSimulator:
                     'channel': 6,
                     'last_seen': time.time()
                 }
+            if airtime is not None:
+                # Quadros de 1500 bytes a 1 Mbps a cada 15 ms: ~80% de ocupação no canal 6
+                start = time.time() - 6
+                for i in range(400):
+                    airtime.record(6, 1500, rate=1.0, capture_time=start + i * 0.015)
             return "🎭 Simulando: Canal Congestionado (15 redes no canal 6)"
             
         elif problem_type == "deauth_attack":
             # Simula ataque deauthentication
             network_stats['deauth_count'] = 25
+            if deauth_detector is not None:
+                # Alimenta a janela do detector como um flood real faria
+                for i in range(25):
+                    deauth_detector.record("02:de:ad:00:00:01", f"02:00:00:00:02:{i % 5:02x}",
+                                           "02:de:ad:00:00:01", reason=7)
             return "🎭 Simulando: Ataque Deauthentication (25 pacotes)"
             
         elif problem_type == "weak_signal":
@@ -672,6 +2966,139 @@ class NetworkSimulator:
         
         return "❌ Tipo de simulação não reconhecido"
 
+    # ----------------- Reprodução de quadros sintéticos -----------------
+    def _build_templates(self):
+        """Quadros-modelo por (canal, sinal); a geração só sobrescreve bytes"""
+        _load_scapy()
+        templates = {'beacon': {}, 'probe': {}, 'probe_directed': {}, 'deauth': {}}
+        for signal_dbm in self.REPLAY_SIGNALS:
+            for channel in self.REPLAY_CHANNELS:
+                templates['beacon'][channel, signal_dbm] = bytes(
+                    RadioTap(present='Flags+Rate+Channel+dBm_AntSignal', Rate=2,
+                             ChannelFrequency=channel_to_frequency_mhz(channel), dBm_AntSignal=signal_dbm) /
+                    Dot11(type=0, subtype=8, addr1='ff:ff:ff:ff:ff:ff', addr2='02:00:00:00:00:00',
+                          addr3='02:00:00:00:00:00') /
+                    Dot11Beacon(cap=0x1111) /
+                    Dot11Elt(ID=0, info=self._SSID_PLACEHOLDER) / Dot11Elt(ID=3, info=bytes([channel])) /
+                    Dot11Elt(ID=48, info=bytes.fromhex('0100000fac040100000fac040100000fac020000')))
+            probe = (RadioTap(present='Flags+Rate+dBm_AntSignal', Rate=2, dBm_AntSignal=signal_dbm) /
+                     Dot11(type=0, subtype=4, addr1='ff:ff:ff:ff:ff:ff', addr2='06:00:00:00:00:00',
+                           addr3='ff:ff:ff:ff:ff:ff') / Dot11ProbeReq())
+            templates['probe'][signal_dbm] = bytes(probe / Dot11Elt(ID=0, info=b""))
+            templates['probe_directed'][signal_dbm] = bytes(probe / Dot11Elt(ID=0, info=self._SSID_PLACEHOLDER))
+            templates['deauth'][signal_dbm] = bytes(
+                RadioTap(present='Flags+Rate+dBm_AntSignal', Rate=2, dBm_AntSignal=signal_dbm) /
+                Dot11(type=0, subtype=12, addr1='06:00:00:00:00:00', addr2='02:00:00:00:00:00',
+                      addr3='02:00:00:00:00:00') / Dot11Deauth(reason=7))
+        return templates
+    
+    @classmethod
+    def _synthetic_mac(cls, prefix, index, salt):
+        # Multiplicador ímpar é bijetor em 2^40: MACs distintos e espalhados
+        return bytes([prefix]) + ((index * 0x9E3779B1 + salt) % cls._MAC_SPACE).to_bytes(5, 'big')
+    
+    def frame_stream(self, scenario='mixed', ap_count=2000, client_count=200000, seed=None):
+        """Gerador infinito de quadros 802.11 crus (bytes), determinístico pela seed
+        
+        APs (prefixo 02:) têm canal, sinal, SSID e TSF fixos por índice; clientes
+        (prefixo 06:) são sorteados entre client_count MACs distintos.
+        """
+        if scenario not in self.REPLAY_SCENARIOS:
+            raise ValueError(f"Cenário desconhecido: {scenario}")
+        if self._templates is None:
+            self._templates = self._build_templates()
+        templates = self._templates
+        rng = random.Random(seed)
+        ap_salt, client_salt = rng.getrandbits(40), rng.getrandbits(40)
+        ap_count = max(1, min(ap_count, 99999))
+        client_count = max(1, client_count)
+        kinds = rng.choices(('beacon', 'probe', 'deauth'), weights=self.REPLAY_SCENARIOS[scenario], k=4096)
+        channels, signals = self.REPLAY_CHANNELS, self.REPLAY_SIGNALS
+        start = time.time()
+        sequence = 0
+        ap_sequences = [0] * ap_count  # Número de sequência próprio de cada AP (contínuo por BSSID)
+        
+        while True:
+            kind = kinds[sequence % 4096]
+            sequence += 1
+            ap = rng.randrange(ap_count)
+            bssid = self._synthetic_mac(0x02, ap, ap_salt)
+            signal_dbm = signals[ap % len(signals)]
+            if kind == 'beacon':
+                frame = bytearray(templates['beacon'][channels[ap % len(channels)], signal_dbm])
+                header = int.from_bytes(frame[2:4], 'little')  # Tamanho do RadioTap
+                frame[header + 10:header + 16] = bssid
+                frame[header + 16:header + 22] = bssid
+                ap_sequences[ap] = (ap_sequences[ap] + 1) % 4096
+                frame[header + 22:header + 24] = (ap_sequences[ap] << 4).to_bytes(2, 'little')
+                # TSF coerente com a captura (cada AP com seu próprio "boot")
+                tsf = int((time.time() - start) * 1000000) + ap * 7919
+                frame[header + 24:header + 32] = tsf.to_bytes(8, 'little')
+                ssid_at = frame.index(self._SSID_PLACEHOLDER, header)
+                frame[ssid_at:ssid_at + 9] = f"SIM_{ap:05d}".encode()
+            elif kind == 'probe':
+                directed = rng.random() < 0.3
+                frame = bytearray(templates['probe_directed' if directed else 'probe'][signal_dbm])
+                header = int.from_bytes(frame[2:4], 'little')
+                frame[header + 10:header + 16] = self._synthetic_mac(0x06, rng.randrange(client_count), client_salt)
+                if directed:
+                    ssid_at = frame.index(self._SSID_PLACEHOLDER, header)
+                    frame[ssid_at:ssid_at + 9] = f"SIM_{ap:05d}".encode()
+            else:
+                # Flood forjando o BSSID dos primeiros APs contra clientes aleatórios
+                bssid = self._synthetic_mac(0x02, ap % 4, ap_salt)
+                frame = bytearray(templates['deauth'][signal_dbm])
+                header = int.from_bytes(frame[2:4], 'little')
+                frame[header + 4:header + 10] = self._synthetic_mac(0x06, rng.randrange(client_count), client_salt)
+                frame[header + 10:header + 16] = bssid
+                frame[header + 16:header + 22] = bssid
+            yield bytes(frame)
+    
+    def replay_frames(self, handler, scenario='mixed', rate=2000, duration=10.0, count=None,
+                      ap_count=2000, client_count=200000, seed=None, should_stop=None):
+        """Injeta quadros sintéticos no handler de captura, no ritmo pedido
+        
+        Os bytes passam pela mesma dissecação RadioTap do sniff() antes de
+        chegar ao handler. rate=0 injeta o mais rápido possível. Retorna
+        estatísticas da reprodução (taxa alcançada, erros).
+        """
+        _load_scapy()
+        interval = 1.0 / rate if rate else 0
+        started = time.perf_counter()
+        deadline = started + duration if duration else None
+        sent = errors = 0
+        
+        for raw in self.frame_stream(scenario, ap_count, client_count, seed):
+            if count is not None and sent >= count:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if should_stop is not None and should_stop():
+                break
+            packet = RadioTap(raw)
+            packet.time = time.time()
+            try:
+                handler(packet)
+            except Exception as e:
+                if not errors:
+                    print(f"[SIM-ERRO] Handler falhou no quadro {sent}: {e}")
+                errors += 1
+            sent += 1
+            if interval:
+                delay = started + sent * interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        
+        elapsed = time.perf_counter() - started
+        return {
+            'scenario': scenario,
+            'frames': sent,
+            'seconds': round(elapsed, 3),
+            'rate': round(sent / elapsed, 1) if elapsed else 0,
+            'target_rate': rate,
+            'errors': errors
+        }
+
     def stop_simulation(self, original_metrics, qos_metrics):
         """Para a simulação e restaura métricas originais"""
         qos_metrics.update(original_metrics)
@@ -711,7 +3138,7 @@ class DatabaseManager:
     
     def get_table_stats(self):
         """Retorna estatísticas das tabelas"""
-        tables = ['packets', 'access_points', 'clients', 'qos_metrics', 'network_diagnostics']
+        tables = ['packets', 'access_points', 'clients', 'client_probes', 'ssids', 'qos_metrics', 'network_diagnostics']
         stats = {}
         
         try:
@@ -749,45 +3176,863 @@ class DatabaseManager:
         except Exception as e:
             return False, None, str(e)
 
-class WirelessMonitorApp:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Monitor de Rede Sem Fio com Diagnóstico - Linux")
-        self.root.geometry("1100x800")
+class QoSHistoryArchive:
+    """Arquivo round-robin (estilo RRD) para o histórico de QoS e sinal
+
+    Cada métrica tem arquivos de tamanho fixo em várias resoluções; cada
+    bucket consolida média/mín/máx/p95. O slot é (início // passo) % linhas,
+    então o armazenamento é constante e consultas de tendência leem apenas
+    os pontos exibidos. update() só consolida em memória; os buckets
+    alterados são gravados por flush() numa única conexão/transação, no
+    máximo a cada FLUSH_INTERVAL segundos. O histograma do bucket é gravado
+    junto, então o p95 continua correto após reiniciar no meio do bucket.
+    """
+
+    # nome, passo (s), linhas
+    ARCHIVES = [
+        ('raw', 10, 360),       # 1 hora em amostras de 10s
+        ('1min', 60, 1440),     # 1 dia
+        ('1h', 3600, 720),      # 30 dias
+        ('1d', 86400, 730)      # 2 anos
+    ]
+    METRICS = ['latency', 'jitter', 'packet_loss', 'signal_strength']
+    # Deslocamento para que o histograma (só valores positivos) aceite dBm
+    VALUE_OFFSETS = {'signal_strength': 150}
+    FLUSH_INTERVAL = 60
+
+    def __init__(self, db_name="wireless_monitor.db"):
+        self.db_name = db_name
+        self._open_buckets = {}  # (métrica, arquivo) -> estado do bucket aberto
+        self._dirty = set()  # Chaves de _open_buckets alteradas desde o último flush
+        self._closed_rows = []  # Buckets fechados ainda não gravados
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self.init_database()
+
+    def init_database(self):
+        """Cria a tabela do arquivo round-robin"""
+        try:
+            conn = sqlite3.connect(self.db_name)
+            cur = conn.cursor()
+            cur.execute("""
+            CREATE TABLE IF NOT EXISTS qos_rrd (
+                metric TEXT,
+                archive TEXT,
+                slot INTEGER,
+                bucket_start INTEGER,
+                count INTEGER,
+                avg REAL,
+                min REAL,
+                max REAL,
+                p95 REAL,
+                hist TEXT,
+                PRIMARY KEY (metric, archive, slot)
+            )
+            """)
+            _ensure_columns(cur, 'qos_rrd', [('hist', 'TEXT')])
+            cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_qos_rrd_time
+            ON qos_rrd (metric, archive, bucket_start)
+            """)
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"[RRD-ERRO] Falha ao inicializar arquivo: {e}")
+
+    @staticmethod
+    def _new_bucket(slot, bucket_start):
+        return {'slot': slot, 'start': bucket_start, 'count': 0, 'sum': 0.0,
+                'min': None, 'max': None, 'hist': LatencyHistogram(max_value=1000.0, precision=64)}
+
+    def _load_bucket(self, metric, archive, slot, bucket_start):
+        """Retoma um bucket já persistido (ex.: após reiniciar no meio dele)"""
+        state = self._new_bucket(slot, bucket_start)
+        try:
+            conn = sqlite3.connect(self.db_name)
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT bucket_start, count, avg, min, max, hist FROM qos_rrd
+                WHERE metric = ? AND archive = ? AND slot = ?
+            """, (metric, archive, slot))
+            row = cur.fetchone()
+            conn.close()
+        except Exception as e:
+            print(f"[RRD-ERRO] Falha ao retomar bucket: {e}")
+            return state
+        if row and row[0] == bucket_start and row[1]:
+            state.update({'count': row[1], 'sum': row[2] * row[1], 'min': row[3], 'max': row[4]})
+            if row[5]:
+                state['hist'].load_json(row[5])
+        return state
+
+    def _row(self, metric, archive, state):
+        offset = self.VALUE_OFFSETS.get(metric, 0)
+        return (metric, archive, state['slot'], state['start'], state['count'], state['sum'] / state['count'],
+                state['min'], state['max'], state['hist'].percentile(95) - offset, state['hist'].to_json())
+
+    def update(self, values, timestamp=None):
+        """Consolida {métrica: valor} em memória em todos os arquivos (O(nº de arquivos))"""
+        timestamp = int(timestamp if timestamp is not None else time.time())
+
+        with self._lock:
+            for metric, value in values.items():
+                if value is None or metric not in self.METRICS:
+                    continue
+                value = float(value)
+                offset = self.VALUE_OFFSETS.get(metric, 0)
+
+                for archive, step, size in self.ARCHIVES:
+                    bucket_start = timestamp - (timestamp % step)
+                    key = (metric, archive)
+                    state = self._open_buckets.get(key)
+                    if state is None or state['start'] != bucket_start:
+                        slot = (bucket_start // step) % size
+                        if state is None:
+                            # Só o primeiro bucket após iniciar pode já estar no banco
+                            state = self._load_bucket(metric, archive, slot, bucket_start)
+                        else:
+                            if key in self._dirty:
+                                self._closed_rows.append(self._row(metric, archive, state))
+                            state = self._new_bucket(slot, bucket_start)
+                        self._open_buckets[key] = state
+
+                    state['count'] += 1
+                    state['sum'] += value
+                    state['min'] = value if state['min'] is None else min(state['min'], value)
+                    state['max'] = value if state['max'] is None else max(state['max'], value)
+                    state['hist'].record(max(value + offset, 0))
+                    self._dirty.add(key)
+
+        if time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Grava os buckets alterados numa única transação"""
+        with self._lock:
+            rows = self._closed_rows
+            rows.extend(self._row(metric, archive, self._open_buckets[metric, archive])
+                        for metric, archive in self._dirty)
+            self._closed_rows = []
+            self._dirty = set()
+            self._last_flush = time.monotonic()
+            if not rows:
+                return 0
+            try:
+                conn = sqlite3.connect(self.db_name)
+                cur = conn.cursor()
+                cur.executemany("""
+                    INSERT OR REPLACE INTO qos_rrd
+                    (metric, archive, slot, bucket_start, count, avg, min, max, p95, hist)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+                conn.commit()
+                conn.close()
+            except Exception as e:
+                print(f"[RRD-ERRO] Falha ao consolidar métricas: {e}")
+                return 0
+        return len(rows)
+
+    def choose_archive(self, start, end, max_points=500):
+        """Arquivo mais fino que cobre o intervalo com no máximo max_points pontos"""
+        now = time.time()
+        for archive, step, size in self.ARCHIVES:
+            covers = now - start <= step * size
+            if covers and (end - start) / step <= max_points:
+                return archive, step
+        archive, step, _ = self.ARCHIVES[-1]
+        return archive, step
+
+    def fetch(self, metric, start, end=None, max_points=500, archive=None):
+        """Retorna [(bucket_start, avg, min, max, p95)] do intervalo pedido"""
+        self.flush()
+        end = end if end is not None else time.time()
+        if archive is None:
+            archive, _ = self.choose_archive(start, end, max_points)
+        try:
+            conn = sqlite3.connect(self.db_name)
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT bucket_start, avg, min, max, p95 FROM qos_rrd
+                WHERE metric = ? AND archive = ? AND bucket_start BETWEEN ? AND ?
+                ORDER BY bucket_start
+            """, (metric, archive, int(start), int(end)))
+            rows = cur.fetchall()
+            conn.close()
+            return rows
+        except Exception as e:
+            print(f"[RRD-ERRO] Falha ao consultar histórico: {e}")
+            return []
+
+class InventoryCache:
+    """Cache autoritativo em memória de access_points/clients com gravação em lote
+
+    O registro de dispositivos (wireless_devices) é a fonte da verdade; cada
+    quadro apenas compara a linha que seria gravada com a última persistida e
+    marca a chave como suja se algo mudou. last_seen é arredondado para
+    LAST_SEEN_GRANULARITY segundos, então um AP estável só volta a ser
+    gravado quando o minuto vira. Uma thread grava as linhas sujas a cada
+    flush_interval em uma única transação (UPSERT), sem recriar a linha.
+    """
+
+    LAST_SEEN_GRANULARITY = 60
+
+    AP_SQL = """
+        INSERT INTO access_points
+        (bssid, ssid, channel, signal_strength, signal_min, signal_max, noise_level, data_rate,
+         security, cipher, channel_width, phy_standard, country, last_seen)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(bssid) DO UPDATE SET
+            ssid = excluded.ssid, channel = excluded.channel,
+            signal_strength = excluded.signal_strength, signal_min = excluded.signal_min,
+            signal_max = excluded.signal_max, noise_level = excluded.noise_level,
+            data_rate = excluded.data_rate, security = excluded.security, cipher = excluded.cipher,
+            channel_width = excluded.channel_width, phy_standard = excluded.phy_standard,
+            country = excluded.country, last_seen = excluded.last_seen
+    """
+    CLIENT_SQL = """
+        INSERT INTO clients (mac, probed_ssid, signal_strength, noise_level, last_seen)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(mac) DO UPDATE SET
+            probed_ssid = excluded.probed_ssid, signal_strength = excluded.signal_strength,
+            noise_level = excluded.noise_level, last_seen = excluded.last_seen
+    """
+    SSID_SQL = "INSERT OR IGNORE INTO ssids (id, ssid) VALUES (?, ?)"
+    PROBE_SQL = "INSERT OR IGNORE INTO client_probes (mac, ssid_id, first_seen) VALUES (?, ?, ?)"
+
+    def __init__(self, db_name="wireless_monitor.db", flush_interval=10):
+        self.db_name = db_name
+        self.flush_interval = flush_interval
+        self.persisted = {'ap': {}, 'client': {}}  # chave -> última linha gravada
+        self.dirty = {'ap': {}, 'client': {}}  # chave -> linha pendente
+        self.probes = ProbeHistory()  # Pares (cliente, SSID) gravados junto com o inventário
+        self.rows_written = 0
+        self.updates_seen = 0
+        self._lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    @classmethod
+    def _last_seen(cls, now):
+        bucket = int(now) - int(now) % cls.LAST_SEEN_GRANULARITY
+        return datetime.datetime.fromtimestamp(bucket).strftime("%Y-%m-%d %H:%M:%S")
+
+    def _mark(self, kind, key, row):
+        with self._lock:
+            self.updates_seen += 1
+            if self.persisted[kind].get(key) == row:
+                self.dirty[kind].pop(key, None)
+            else:
+                self.dirty[kind][key] = row
+
+    def touch_ap(self, bssid, device, now):
+        """Registra o estado atual do AP; marca como sujo só se a linha mudou"""
+        radio = radio_summary(device)
+        self._mark('ap', bssid, (
+            bssid, device.get('ssid'), device.get('channel'), radio['signal'], radio['signal_min'],
+            radio['signal_max'], radio['noise'], radio['rate'], device.get('security'), device.get('cipher'),
+            device.get('width'), device.get('standard'), device.get('country'), self._last_seen(now)))
+
+    def touch_client(self, mac, device, now):
+        radio = radio_summary(device)
+        self._mark('client', mac, (
+            mac, device.get('probed_ssid'), radio['signal'], radio['noise'], self._last_seen(now)))
+
+    def flush(self):
+        """Grava as linhas sujas em uma transação; retorna quantas foram gravadas"""
+        with self._lock:
+            pending = self.dirty
+            self.dirty = {'ap': {}, 'client': {}}
+        # Antes da carga os ids de SSID ainda não são os do banco
+        ssid_rows, probe_rows = self.probes.take_pending() if self.probes.loaded else ([], [])
+        if not pending['ap'] and not pending['client'] and not probe_rows:
+            return 0
+        try:
+            conn = sqlite3.connect(self.db_name)
+            with conn:
+                conn.executemany(self.AP_SQL, list(pending['ap'].values()))
+                conn.executemany(self.CLIENT_SQL, list(pending['client'].values()))
+                conn.executemany(self.SSID_SQL, ssid_rows)
+                conn.executemany(self.PROBE_SQL, probe_rows)
+            conn.close()
+        except Exception as e:
+            print(f"[DB-ERRO] Falha ao gravar inventário: {e}")
+            with self._lock:
+                # Devolve as linhas sem sobrescrever atualizações mais novas
+                for kind, rows in pending.items():
+                    for key, row in rows.items():
+                        self.dirty[kind].setdefault(key, row)
+            self.probes.restore_pending(ssid_rows, probe_rows)
+            return 0
+        with self._lock:
+            for kind, rows in pending.items():
+                self.persisted[kind].update(rows)
+        written = len(pending['ap']) + len(pending['client']) + len(probe_rows)
+        self.rows_written += written
+        return written
+
+    def start(self):
+        if not self.probes.loaded:
+            self.probes.load(self.db_name)
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Para a thread e grava o que estiver pendente"""
+        self.running = False
+        self.flush()
+
+    def _run(self):
+        while self.running:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+class ProbeHistory:
+    """Histórico de SSIDs procurados por cliente, com SSIDs internados
+
+    Cada SSID recebe um id inteiro na primeira vez que aparece. Cada cliente
+    guarda só os ids: um int enquanto procura uma única rede (o caso comum) e
+    um set a partir da segunda. O índice invertido (id -> clientes) responde
+    "quem procura X" e o ranking de SSIDs sem varrer packets. Pares novos
+    ficam pendentes e são gravados pelo InventoryCache na mesma transação
+    das demais linhas (ssids + client_probes).
+    """
+
+    def __init__(self):
+        self.ssid_ids = {}  # SSID -> id
+        self.ssids = []  # id -> SSID
+        self.by_client = {}  # MAC -> id ou set de ids
+        self.by_ssid = []  # id -> set de MACs (índice invertido)
+        self.pairs = 0
+        self.pending_ssids = []  # (id, SSID) ainda não gravados
+        self.pending_pairs = []  # (MAC, id, first_seen) ainda não gravados
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def _intern(self, ssid):
+        ssid_id = self.ssid_ids.get(ssid)
+        if ssid_id is None:
+            ssid_id = self.ssid_ids[ssid] = len(self.ssids)
+            self.ssids.append(ssid)
+            self.by_ssid.append(set())
+            self.pending_ssids.append((ssid_id, ssid))
+        return ssid_id
+
+    def _add(self, mac, ssid_id):
+        """Associa o par; retorna False se o cliente já procurava esse SSID"""
+        current = self.by_client.get(mac)
+        if current is None:
+            self.by_client[mac] = ssid_id
+        elif current == ssid_id or (type(current) is set and ssid_id in current):
+            return False
+        elif type(current) is set:
+            current.add(ssid_id)
+        else:
+            self.by_client[mac] = {current, ssid_id}
+        self.by_ssid[ssid_id].add(mac)
+        self.pairs += 1
+        return True
+
+    def record(self, mac, ssid, now=None):
+        """Registra um probe direcionado; retorna True se o par (cliente, SSID) é novo"""
+        with self._lock:
+            ssid_id = self._intern(ssid)
+            if not self._add(mac, ssid_id):
+                return False
+            first_seen = datetime.datetime.fromtimestamp(now or time.time()).strftime("%Y-%m-%d %H:%M:%S")
+            self.pending_pairs.append((mac, ssid_id, first_seen))
+            return True
+
+    # ----------------- Consultas -----------------
+    def ssids_for_client(self, mac):
+        current = self.by_client.get(mac)
+        if current is None:
+            return []
+        ids = sorted(current) if type(current) is set else [current]
+        return [self.ssids[ssid_id] for ssid_id in ids]
+
+    def clients_for_ssid(self, ssid):
+        ssid_id = self.ssid_ids.get(ssid)
+        return set(self.by_ssid[ssid_id]) if ssid_id is not None else set()
+
+    def top_ssids(self, count=10):
+        """[(SSID, clientes distintos)] dos SSIDs mais procurados"""
+        ranked = heapq.nlargest(count, enumerate(self.by_ssid), key=lambda item: len(item[1]))
+        return [(self.ssids[ssid_id], len(clients)) for ssid_id, clients in ranked if clients]
+
+    # ----------------- Persistência -----------------
+    def take_pending(self):
+        with self._lock:
+            pending = self.pending_ssids, self.pending_pairs
+            self.pending_ssids, self.pending_pairs = [], []
+        return pending
+
+    def restore_pending(self, ssid_rows, pair_rows):
+        """Devolve linhas cuja gravação falhou para o próximo flush"""
+        with self._lock:
+            self.pending_ssids[:0] = ssid_rows
+            self.pending_pairs[:0] = pair_rows
+
+    def load(self, db_name):
+        """Reconstrói ids e índices a partir do banco (o banco é a referência dos ids)
+
+        Pares registrados antes da carga (captura iniciada cedo) são
+        reinternados por cima do que veio do banco.
+        """
+        try:
+            conn = sqlite3.connect(db_name)
+            ssid_rows = conn.execute("SELECT id, ssid FROM ssids ORDER BY id").fetchall()
+            pair_rows = conn.execute("SELECT mac, ssid_id FROM client_probes").fetchall()
+            conn.close()
+        except Exception as e:
+            print(f"[DB-ERRO] Falha ao carregar histórico de probes: {e}")
+            return 0
+        
+        with self._lock:
+            early = [(mac, self.ssids[ssid_id], first_seen) for mac, ssid_id, first_seen in self.pending_pairs]
+            self.ssid_ids, self.ssids, self.by_client, self.by_ssid = {}, [], {}, []
+            self.pairs = 0
+            self.pending_ssids, self.pending_pairs = [], []
+            for ssid_id, ssid in ssid_rows:
+                while len(self.ssids) < ssid_id:  # Lacunas de ids ficam vazias
+                    self.ssids.append(None)
+                    self.by_ssid.append(set())
+                self.ssid_ids[ssid] = ssid_id
+                self.ssids.append(ssid)
+                self.by_ssid.append(set())
+            for mac, ssid_id in pair_rows:
+                if ssid_id < len(self.ssids):
+                    self._add(mac, ssid_id)
+            for mac, ssid, first_seen in early:
+                ssid_id = self._intern(ssid)
+                if self._add(mac, ssid_id):
+                    self.pending_pairs.append((mac, ssid_id, first_seen))
+            self.loaded = True
+        return len(pair_rows)
+
+
+class StateSnapshot:
+    """Instantâneo binário compacto do registro de dispositivos e contadores
+
+    Dispositivos são agrupados pelo "formato" (quais campos conhecidos têm
+    valor): cada grupo vira um bloco de registros struct de tamanho fixo só
+    com esses campos, com MACs em 6 bytes e strings (SSIDs, segurança...)
+    como índices de uma tabela gravada uma vez. Contadores, a WiFi conectada
+    e campos fora do esquema vão em JSON. A gravação é atômica (temporário +
+    fsync + os.replace); a leitura usa mmap e decodifica cada bloco inteiro
+    de uma vez (struct.iter_unpack) e só troca índices por strings nas
+    posições de campos 'I'.
+    """
+
+    MAGIC = b"WMSNAP\x00\x03"
+    HEADER = struct.Struct('<dII')  # salvo em, bytes de metadados, bytes da tabela de strings
+    # Campo -> formato struct ('I' = índice na tabela de strings); valores que
+    # não cabem no formato (None, tipos inesperados) vão para 'extras' em JSON
+    FIELD_FORMATS = {
+        'type': 'I', 'ssid': 'I', 'probed_ssid': 'I', 'security': 'I', 'cipher': 'I', 'standard': 'I',
+        'country': 'I', 'band': 'I', 'channel': 'h', 'width': 'h', 'signal_min': 'h', 'signal_max': 'h',
+        'signal': 'd', 'noise': 'd', 'rate': 'd', 'last_seen': 'd', 'frames': 'Q'
+    }
+
+    def __init__(self, path, interval=60, max_age=3600):
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age  # Dispositivos mais antigos que isso não voltam na carga
+        self.saves = 0
+        self.last_save_seconds = 0.0
+        self.running = False
+        self.thread = None
+
+    @staticmethod
+    def _mac_bytes(key):
+        """6 bytes se a chave é um MAC canônico (aa:bb:...), senão None"""
+        if len(key) != 17:
+            return None
+        try:
+            raw = bytes.fromhex(key.replace(':', ''))
+        except ValueError:
+            return None
+        return raw if raw.hex(':') == key else None
+
+    def _split(self, device):
+        """Separa campo a campo o que cabe no formato binário do que vai para JSON"""
+        fields, values, extra = [], [], {}
+        for field, value in device.items():
+            code = self.FIELD_FORMATS.get(field)
+            try:
+                if code is None or (code == 'I' and type(value) is not str):
+                    raise struct.error
+                if code != 'I':
+                    struct.pack('<' + code, value)
+            except struct.error:
+                extra[field] = value
+                continue
+            fields.append(field)
+            values.append(value)
+        return tuple(fields), values, extra
+
+    def save(self, devices, network_stats, wifi_info):
+        """Grava o instantâneo atomicamente; retorna quantos dispositivos foram salvos"""
+        started = time.perf_counter()
+        strings, index = [], {}
+        
+        def intern(value):
+            if type(value) is not str:
+                raise TypeError(value)
+            position = index.get(value)
+            if position is None:
+                position = index[value] = len(strings)
+                strings.append(value)
+            return position
+        
+        groups = {}  # (chave é MAC, campos) -> [registros empacotados]
+        layouts = {}  # Ordem das chaves do dict -> campos do esquema (dispositivos iguais repetem)
+        records = {}
+        extras = {}
+        items = list(devices.items())  # Cópia atômica: a captura continua gravando
+        for key, device in items:
+            key = str(key)
+            device = dict(device)
+            mac = self._mac_bytes(key)
+            shape_key = mac is not None
+            if mac is None:
+                mac = intern(key)
+            
+            names = tuple(device)
+            fields = layouts.get(names)
+            if fields is None:
+                fields = layouts[names] = tuple(name for name in names if name in self.FIELD_FORMATS)
+            packed = None
+            if len(fields) == len(names):
+                # Caminho rápido: o pack rejeita None, tipos errados e estouro de faixa
+                try:
+                    row = [intern(device[field]) if self.FIELD_FORMATS[field] == 'I' else device[field]
+                           for field in fields]
+                    packed = self._record(shape_key, fields, records).pack(mac, *row)
+                except (struct.error, TypeError):
+                    packed = None
+            if packed is None:
+                fields, row, extra = self._split(device)
+                if extra:
+                    extras[key] = extra
+                row = [intern(value) if self.FIELD_FORMATS[field] == 'I' else value
+                       for field, value in zip(fields, row)]
+                packed = self._record(shape_key, fields, records).pack(mac, *row)
+            groups.setdefault((shape_key, fields), []).append(packed)
+        
+        shapes, blocks = [], []
+        for (mac_keys, fields), rows in groups.items():
+            blocks.append(b"".join(rows))
+            shapes.append({'mac_keys': mac_keys, 'fields': fields, 'count': len(rows)})
+        
+        meta = json.dumps({'shapes': shapes, 'network_stats': dict(network_stats), 'wifi_info': dict(wifi_info),
+                           'extras': extras}, default=str).encode('utf-8')
+        string_table = json.dumps(strings, ensure_ascii=False).encode('utf-8')
+        temporary = self.path + ".tmp"
+        with open(temporary, 'wb') as f:
+            f.write(self.MAGIC)
+            f.write(self.HEADER.pack(time.time(), len(meta), len(string_table)))
+            f.write(meta)
+            f.write(string_table)
+            for block in blocks:
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+        self.saves += 1
+        self.last_save_seconds = time.perf_counter() - started
+        return len(items)
+
+    def _record_format(self, mac_keys, fields):
+        return '<' + ('6s' if mac_keys else 'I') + ''.join(self.FIELD_FORMATS[field] for field in fields)
+
+    def _record(self, mac_keys, fields, cache):
+        record = cache.get((mac_keys, fields))
+        if record is None:
+            record = cache[mac_keys, fields] = struct.Struct(self._record_format(mac_keys, fields))
+        return record
+
+    def _row_decoder(self, mac_keys, fields, strings):
+        """Função (registro desempacotado) -> (chave, dispositivo) para o formato"""
+        fields = tuple(fields)
+        string_positions = tuple(i for i, field in enumerate(fields) if self.FIELD_FORMATS[field] == 'I')
+
+        def decode(record):
+            values = list(record)
+            raw_key = values.pop(0)
+            for i in string_positions:
+                values[i] = strings[values[i]]
+            return raw_key.hex(':') if mac_keys else strings[raw_key], dict(zip(fields, values))
+        return decode
+
+    def load(self, now=None):
+        """Lê o instantâneo; retorna dict (devices, network_stats, wifi_info, saved_at) ou None"""
+        import mmap
+        now = now or time.time()
+        try:
+            with open(self.path, 'rb') as f:
+                view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):  # Sem arquivo (ou vazio): partida a frio
+            return None
         
+        oldest = now - self.max_age if self.max_age else -math.inf
+        devices = {}
+        try:
+            if view[:len(self.MAGIC)] != self.MAGIC:
+                print(f"[SNAPSHOT-ERRO] Formato desconhecido em {self.path}")
+                return None
+            offset = len(self.MAGIC)
+            saved_at, meta_size, strings_size = self.HEADER.unpack_from(view, offset)
+            offset += self.HEADER.size
+            meta = json.loads(view[offset:offset + meta_size])
+            offset += meta_size
+            strings = json.loads(view[offset:offset + strings_size])
+            offset += strings_size
+            
+            for shape in meta['shapes']:
+                fields = shape['fields']
+                record = struct.Struct(self._record_format(shape['mac_keys'], fields))
+                size = record.size * shape['count']
+                block = view[offset:offset + size]
+                offset += size
+                if len(block) != size:
+                    raise ValueError("instantâneo truncado")
+                if not shape['count']:
+                    continue
+                decoder = self._row_decoder(shape['mac_keys'], fields, strings)
+                records = map(decoder, struct.iter_unpack(record.format, block))
+                if 'last_seen' in fields and self.max_age:
+                    records = [item for item in records if item[1]['last_seen'] >= oldest]
+                devices.update(records)
+        except (struct.error, ValueError, KeyError, IndexError) as e:
+            print(f"[SNAPSHOT-ERRO] Falha ao ler {self.path}: {e}")
+            return None
+        finally:
+            view.close()
+        
+        for key, extra in meta.get('extras', {}).items():
+            if key in devices:
+                devices[key].update(extra)
+        return {'devices': devices, 'network_stats': meta.get('network_stats', {}),
+                'wifi_info': meta.get('wifi_info', {}), 'saved_at': saved_at}
+
+    def start(self, collect):
+        """Grava periodicamente o que collect() retorna: (devices, network_stats, wifi_info)"""
+        self.running = True
+        self.thread = threading.Thread(target=self._run, args=(collect,), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def _run(self, collect):
+        while self.running:
+            time.sleep(self.interval)
+            if not self.running:
+                break
+            try:
+                self.save(*collect())
+            except Exception as e:
+                print(f"[SNAPSHOT-ERRO] Falha ao gravar {self.path}: {e}")
+
+
+class MetricsExporter:
+    """Endpoint HTTP /metrics no formato de exposição do Prometheus
+
+    Roda em um ThreadingHTTPServer da biblioteca padrão em thread própria. A
+    coleta só lê o estado do engine com cópias atômicas (dict()/list() sob o
+    GIL), sem locks no caminho de captura.
+    """
+
+    PREFIX = 'wifimon'
+
+    def __init__(self, engine, port=9108, host='127.0.0.1'):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.server = None
+        self.thread = None
+
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ""
+        escaped = (key + '="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+                   for key, value in labels.items())
+        return "{" + ",".join(escaped) + "}"
+
+    def _family(self, lines, name, kind, help_text, samples):
+        """Acrescenta uma família de métricas: samples = [(labels, valor)]"""
+        samples = [(labels, value) for labels, value in samples if isinstance(value, (int, float))]
+        if not samples:
+            return
+        name = f"{self.PREFIX}_{name}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            value = int(value) if isinstance(value, int) else float(value)  # %g perderia dígitos
+            lines.append(f"{name}{self._labels(labels)} {value}")
+
+    def render(self):
+        """Texto de exposição com o estado atual do engine"""
+        engine = self.engine
+        stats = dict(engine.network_stats)
+        qos = dict(engine.qos_metrics)
+        sampler = engine.sampler
+        seen, processed = dict(sampler.seen), dict(sampler.processed)
+        lines = []
+
+        self._family(lines, 'frames_total', 'counter', "Quadros 802.11 por tipo (corrigidos pela amostragem)",
+                     [({'type': key[:-len('_count')]}, value) for key, value in sorted(stats.items())
+                      if key.endswith('_count')])
+        self._family(lines, 'frames_processed_total', 'counter', "Quadros processados pelo handler",
+                     [({}, engine.frames_processed)])
+        self._family(lines, 'frames_shed_total', 'counter', "Quadros descartados pela amostragem adaptativa",
+                     [({'class': frame_class}, count - processed.get(frame_class, 0))
+                      for frame_class, count in sorted(seen.items())])
+        self._family(lines, 'sampling_rate', 'gauge', "Probabilidade de amostragem atual por classe",
+                     [({'class': frame_class}, rate) for frame_class, rate in sorted(sampler.rates().items())])
+        self._family(lines, 'capture_lag_seconds', 'gauge', "Atraso do handler em relação à captura",
+                     [({}, sampler.lag)])
+        self._family(lines, 'kernel_packets_total', 'counter',
+                     "Quadros entregues ao socket de captura pelo kernel (PACKET_STATISTICS)",
+                     [({}, engine.kernel_packets)])
+        self._family(lines, 'kernel_drops_total', 'counter',
+                     "Quadros descartados pelo kernel com o buffer do socket de captura cheio",
+                     [({}, engine.kernel_drops)])
+        self._family(lines, 'capturing', 'gauge', "1 se a captura está ativa", [({}, int(engine.is_capturing))])
+
+        self._family(lines, 'access_points', 'gauge', "APs detectados", [({}, engine.device_counts['AP'])])
+        self._family(lines, 'clients', 'gauge', "Clientes detectados", [({}, engine.device_counts['Client'])])
+        self._family(lines, 'probed_ssids', 'gauge', "SSIDs distintos procurados por clientes",
+                     [({}, len(engine.inventory.probes.ssid_ids))])
+        self._family(lines, 'client_probe_pairs', 'gauge', "Pares (cliente, SSID) distintos observados",
+                     [({}, engine.inventory.probes.pairs)])
+        self._family(lines, 'channel_utilization_percent', 'gauge', "Ocupação medida do canal (janela de 10s)",
+                     [({'band': band, 'channel': channel}, busy) for (band, channel), busy in
+                      sorted(engine.problem_solver.airtime.utilization_by_channel().items())])
+
+        qos_fields = [('latency', 'latency_ms'), ('jitter', 'jitter_ms'), ('packet_loss', 'packet_loss_percent'),
+                      ('latency_stddev', 'latency_stddev_ms'), ('latency_p50', 'latency_p50_ms'),
+                      ('latency_p95', 'latency_p95_ms'), ('latency_p99', 'latency_p99_ms')]
+        for key, name in qos_fields:
+            self._family(lines, f"qos_{name}", 'gauge', f"QoS: {key} da última medição", [({}, qos.get(key))])
+        self._family(lines, 'qos_measurements_total', 'counter', "Medições QoS realizadas",
+                     [({}, engine.qos_measurement_count)])
+        hops = qos.get('hops') or {}
+        self._family(lines, 'hop_latency_ms', 'gauge', "Melhor latência por segmento do caminho",
+                     [({'segment': segment}, hop.get('latency')) for segment, hop in sorted(hops.items())])
+        self._family(lines, 'hop_packet_loss_percent', 'gauge', "Perda por segmento do caminho",
+                     [({'segment': segment}, hop.get('packet_loss')) for segment, hop in sorted(hops.items())])
+        self._family(lines, 'signal_dbm', 'gauge', "Sinal suavizado do enlace conectado",
+                     [({}, engine.problem_solver.get_real_signal_strength())])
+
+        states = dict(engine.diagnosis_monitor.states)
+        self._family(lines, 'problem_active', 'gauge', "1 se o problema está aberto no diagnóstico contínuo",
+                     [({'problem': problem_id}, int(state['active'])) for problem_id, state in sorted(states.items())])
+        self._family(lines, 'deauth_window_frames', 'gauge', "Quadros deauth na janela deslizante",
+                     [({}, engine.problem_solver.deauth_detector.peek_window_count())])
+        return "\n".join(lines) + "\n"
+
+    def start(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                try:
+                    body = exporter.render().encode('utf-8')
+                except Exception as e:
+                    self.send_error(500, str(e))
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Sem log por scrape
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"[METRICS] Endpoint em http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class MonitorEngine:
+    """Núcleo de captura, QoS e diagnóstico, independente da interface gráfica
+
+    Roda igual como serviço (--headless) ou dentro do Tk: a GUI é apenas um
+    cliente que lê capture_queue e recebe eventos ('wifi', 'qos', 'devices')
+    pelos listeners, sempre chamados na thread do engine.
+    """
+
+    def __init__(self, db_name="wireless_monitor.db", log_packets=True, snapshot_interval=60):
         self.is_capturing = False
-        self.packets = []
         self.capture_thread = None
-        self.qos_thread = None
         self.capture_queue = Queue()
         self.wireless_devices = defaultdict(dict)
+        self.device_counts = {'AP': 0, 'Client': 0}  # Mantidos pelo handler, sem varrer o registro
         self.network_stats = defaultdict(int)  # Estatísticas de rede
+        self.sampler = AdaptiveSampler()
+        self.profiler = StageProfiler()
+        self.frames_processed = 0
+        self.frames_logged = 0  # Quadros de gerência que passam pelo banco/log
+        self.kernel_packets = 0  # PACKET_STATISTICS acumulado (lido ao fim de cada ciclo)
+        self.kernel_drops = 0
         self.capture_interval = 15
         self.capture_duration = 15
         self.interface = None
-        self.interface_map = {}
-        
-        # ====== SISTEMA DE DIAGNÓSTICO ======
-        self.problem_solver = NetworkProblemSolver()
-        self.last_diagnosis = []
-        
-        # ====== SIMULADOR DE PROBLEMAS ======
+        self.log_packets = log_packets
+        self.last_error = None
+        self.listeners = []
+        self.exporter = None
         self.simulator = NetworkSimulator()
-        self.original_metrics = None
+        self._replaying = False
+        self._stop_event = threading.Event()
+        self._capture_wakeup = threading.Event()
         
         # ====== GERENCIADOR DE BANCO DE DADOS ======
-        self.db_manager = DatabaseManager()
-        # ===========================================
+        self.db_manager = DatabaseManager(db_name)
+        self.qos_history = QoSHistoryArchive(self.db_manager.db_name)
+        self.inventory = InventoryCache(self.db_manager.db_name)
+        self.snapshot = StateSnapshot(os.path.splitext(self.db_manager.db_name)[0] + ".snapshot",
+                                      snapshot_interval) if snapshot_interval else None
+        self.init_database()
+        
+        # ====== SISTEMA DE DIAGNÓSTICO ======
+        self.problem_solver = NetworkProblemSolver(self.db_manager.db_name)
+        self.problem_solver.deauth_detector.on_attack = self._on_deauth_attack
+        self.history_evaluator = HistoricalDiagnosisEvaluator(self.problem_solver)
         
         # ====== MÉTRICAS QoS ======
         self.qos_metrics = {
             'latency': 0,
             'jitter': 0,
             'packet_loss': 0,
+            'latency_stddev': 0,
+            'latency_p50': 0,
+            'latency_p95': 0,
+            'latency_p99': 0,
+            'hops': {},
             'last_update': "Nunca",
             'status': "Não medido"
         }
         self.qos_measurement_count = 0
+        self.latency_stats = StreamingLatencyStats(window_size=120)
+        self.qos_prober = QoSProbeScheduler()
         self.last_qos_before_capture = None
         
         # ====== INFORMAÇÕES DA REDE WIFI CONECTADA ======
@@ -799,17 +4044,227 @@ class WirelessMonitorApp:
             'security': 'Desconhecido',
             'signal_strength': "0 dBm"
         }
-        # ================================================
+        self.link_sampler = LinkStateSampler(on_change=self._on_link_change,
+                                             signal_tracker=self.problem_solver.signal_tracker)
+        self._last_signal_archive = 0
+        
+        # Diagnóstico contínuo em segundo plano (grava só transições de estado)
+        self.diagnosis_monitor = ContinuousDiagnosisMonitor(
+            self.problem_solver,
+            lambda: self.problem_solver.collect_metrics(
+                self.qos_metrics, self.wireless_devices, self.network_stats, self.current_wifi_info),
+            on_event=self._on_diagnosis_event
+        )
+
+    # ----------------- Ciclo de vida -----------------
+    def add_listener(self, callback):
+        """Registra callback(evento, dados) para 'wifi', 'qos' e 'devices'"""
+        self.listeners.append(callback)
+
+    def _notify(self, event, data=None):
+        for callback in list(self.listeners):
+            try:
+                callback(event, data)
+            except Exception as e:
+                print(f"[ENGINE-ERRO] Listener falhou em '{event}': {e}")
+
+    def _fail(self, message):
+        """Registra erro para o cliente (GUI mostra em diálogo, daemon no log)"""
+        self.last_error = message
+        self.capture_queue.put(f"\n[ERRO] {message}\n")
+
+    def start(self):
+        """Inicia os serviços de fundo: enlace, diagnóstico contínuo e inventário"""
+        self._stop_event.clear()
+        if self.snapshot:
+            self.restore_snapshot()
+            self.snapshot.start(self._snapshot_state)
+        self.start_link_monitoring()
+        self.diagnosis_monitor.start()
+        self.inventory.start()
+
+    def start_metrics_server(self, port=9108, host='127.0.0.1'):
+        """Expõe /metrics (Prometheus); retorna o exportador ou None se a porta falhar"""
+        try:
+            self.exporter = MetricsExporter(self, port, host)
+            self.exporter.start()
+        except OSError as e:
+            print(f"[METRICS-ERRO] Falha ao abrir porta {port}: {e}")
+            self.exporter = None
+        return self.exporter
+
+    def shutdown(self):
+        """Para captura e serviços, restaura a rede e grava o que estiver pendente"""
+        self._stop_event.set()
+        self.stop_capture()
+        if self.exporter:
+            self.exporter.stop()
+        self.link_sampler.stop()
+        self.diagnosis_monitor.stop()
+        self.inventory.stop()
+        self.qos_history.flush()
+        if self.snapshot:
+            self.snapshot.stop()
+            try:
+                self.snapshot.save(*self._snapshot_state())
+            except Exception as e:
+                print(f"[SNAPSHOT-ERRO] Falha ao gravar {self.snapshot.path}: {e}")
+
+    def _snapshot_state(self):
+        return self.wireless_devices, self.network_stats, self.current_wifi_info
+
+    def restore_snapshot(self):
+        """Reidrata dispositivos e contadores do último instantâneo (partida a quente)"""
+        started = time.perf_counter()
+        state = self.snapshot.load()
+        if not state:
+            return 0
+        # Atualiza no lugar: a GUI compartilha estes mesmos objetos
+        for key, device in state['devices'].items():
+            self.wireless_devices[key].update(device)
+        for key, value in state['network_stats'].items():
+            self.network_stats[key] += value
+        if self.current_wifi_info.get('ssid') == 'Desconhecido':
+            self.current_wifi_info.update(state['wifi_info'])
+        self.recount_devices()
+        age = time.time() - state['saved_at']
+        print(f"[SNAPSHOT] {len(state['devices'])} dispositivos restaurados em "
+              f"{(time.perf_counter() - started) * 1000:.1f} ms (instantâneo de {age:.0f}s atrás)")
+        self._notify('wifi')
+        return len(state['devices'])
+
+    def start_capture(self, interface, interval=15, duration=15):
+        """Ativa modo monitor e inicia a captura periódica; retorna a interface ou None"""
+        if self.is_capturing:
+            return self.interface
+        try:
+            _load_scapy()
+        except ImportError as e:
+            self._fail(f"scapy indisponível: {e}")
+            return None
+        monitor_iface = self.set_monitor_mode(interface)
+        if not monitor_iface:
+            return None
+        self.capture_interval = interval
+        self.capture_duration = duration
+        self.interface = monitor_iface
+        self.is_capturing = True
+        self._capture_wakeup.clear()
+        self.capture_thread = threading.Thread(target=self.run_periodic_capture, daemon=True)
+        self.capture_thread.start()
+        return monitor_iface
+
+    def stop_capture(self):
+        """Encerra a captura e restaura o NetworkManager"""
+        if not self.is_capturing:
+            return False
+        self.is_capturing = False
+        self._capture_wakeup.set()
+        if self._replaying:
+            self._replaying = False
+        else:
+            self.stop_monitor_mode(self.interface)
+        if self.capture_thread and self.capture_thread.is_alive():
+            self.capture_thread.join(timeout=1)
+        return True
+
+    def start_replay(self, scenario='mixed', rate=2000, duration=60, on_done=None, **options):
+        """Alimenta o packet_handler com quadros sintéticos, sem rádio (teste de carga)
         
-        self.create_widgets()
-        self.setup_styles()
-        self.update_interfaces()
+        Ocupa o lugar da captura: stop_capture() interrompe a reprodução.
+        options vão para NetworkSimulator.replay_frames (ap_count, client_count, seed).
+        """
+        if self.is_capturing:
+            return None
+        if scenario not in NetworkSimulator.REPLAY_SCENARIOS:
+            self._fail(f"Cenário de reprodução desconhecido: {scenario}")
+            return None
+        self.interface = f"sim:{scenario}"
+        self._replaying = True
+        self.is_capturing = True
+        
+        def run():
+            self.capture_queue.put(f"\n[SIMULAÇÃO] Reproduzindo '{scenario}' a {rate or 'máx.'} quadros/s "
+                                   f"por {duration}s...\n")
+            stats = self.simulator.replay_frames(self.packet_handler, scenario, rate, duration,
+                                                 should_stop=lambda: not self.is_capturing, **options)
+            self.capture_queue.put(f"[SIMULAÇÃO] {stats['frames']} quadros em {stats['seconds']}s "
+                                   f"({stats['rate']} quadros/s, {stats['errors']} erros)\n")
+            self.is_capturing = False
+            self._replaying = False
+            if on_done:
+                on_done(stats)
         
-        # Inicia o monitoramento da rede WiFi conectada
-        self.update_wifi_info()
+        self.capture_thread = threading.Thread(target=run, daemon=True)
+        self.capture_thread.start()
+        return self.interface
+
+    def _qos_loop(self, interval):
+        while not self._stop_event.wait(interval):
+            self.measure_qos()
+
+    def run_headless(self, interface, interval=15, duration=15, qos_interval=60, replay=None):
+        """Executa como serviço até SIGTERM/SIGINT; retorna o código de saída
+        
+        Com replay (kwargs de start_replay) não usa rádio: reproduz quadros
+        sintéticos e encerra quando a reprodução termina.
+        """
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: self._stop_event.set())
+        # kill -USR1 <pid> despeja o relatório do profiler no log
+        signal.signal(signal.SIGUSR1, lambda *_: self.capture_queue.put(self.profiler.report()))
+        
+        self.start()
+        if replay is not None:
+            started = self.start_replay(on_done=lambda _: self._stop_event.set(), **replay)
+        else:
+            self.measure_qos_before_capture()
+            started = self.start_capture(interface, interval, duration)
+        if not started:
+            print(f"[ENGINE-ERRO] {self.last_error}")
+            self.shutdown()
+            return 1
+        threading.Thread(target=self._qos_loop, args=(qos_interval,), daemon=True).start()
+        print(f"[ENGINE] Monitorando {self.interface} (PID {os.getpid()})", flush=True)
+        
+        # Thread principal só drena o log; bloqueia na fila quando ocioso
+        while not self._stop_event.is_set():
+            try:
+                message = self.capture_queue.get(timeout=1)
+            except Empty:
+                continue
+            print(message.rstrip("\n"), flush=True)
         
-        # Inicializa o banco de dados
-        self.init_database()
+        print("[ENGINE] Encerrando...", flush=True)
+        self.shutdown()
+        while not self.capture_queue.empty():
+            print(self.capture_queue.get().rstrip("\n"), flush=True)
+        return 0
+
+    # ----------------- Enlace e eventos -----------------
+    def _on_deauth_attack(self, event):
+        """Alerta imediato do detector de deauth (chamado na thread de captura)"""
+        if event['event'] == 'attack_started':
+            self.capture_queue.put(f"\n🚨 ATAQUE DEAUTH DETECTADO: {event['window_count']} quadros na janela\n")
+            for pair in event['pairs']:
+                reasons = ", ".join(str(r) for r in pair['reasons']) or "N/A"
+                self.capture_queue.put(f"   {pair['src']} → {pair['dst']} (BSSID {pair['bssid']}): "
+                                       f"{pair['count']} quadros | Razões: {reasons}\n")
+            if not event['pairs']:
+                # Pares aleatórios (MACs falsificados): aponta o BSSID/origem agregado
+                for source in event['sources']:
+                    self.capture_queue.put(f"   {DEAUTH_SOURCE_NAMES[source['kind']]} {source['mac']}: "
+                                           f"{source['count']} quadros\n")
+        else:
+            self.capture_queue.put("\n✅ Ataque deauth cessou\n")
+
+    def _on_diagnosis_event(self, event):
+        """Registra no log as aberturas/resoluções do diagnóstico contínuo"""
+        if event['event'] == 'opened':
+            self.capture_queue.put(f"\n⚠️  PROBLEMA ABERTO: {event['problem_name']} "
+                                   f"({event['severity'].upper()}) às {event['timestamp']}\n")
+        else:
+            self.capture_queue.put(f"\n✅ PROBLEMA RESOLVIDO: {event['problem_name']} às {event['timestamp']}\n")
     
     def init_database(self):
         """Cria tabelas se não existirem."""
@@ -850,6 +4305,43 @@ class WirelessMonitorApp:
             )
             """)
             
+            # Colunas de rádio (RadioTap) adicionadas depois da versão inicial
+            _ensure_columns(cur, 'access_points', [
+                ('signal_min', 'INTEGER'),
+                ('signal_max', 'INTEGER'),
+                ('noise_level', 'INTEGER'),
+                ('data_rate', 'REAL')
+            ])
+            # Campos extraídos dos elementos de informação (IEs)
+            _ensure_columns(cur, 'access_points', [
+                ('security', 'TEXT'),
+                ('cipher', 'TEXT'),
+                ('channel_width', 'INTEGER'),
+                ('phy_standard', 'TEXT'),
+                ('country', 'TEXT')
+            ])
+            _ensure_columns(cur, 'clients', [
+                ('signal_strength', 'INTEGER'),
+                ('noise_level', 'INTEGER')
+            ])
+            
+            # Histórico de probes: SSIDs internados e pares (cliente, SSID)
+            cur.execute("""
+            CREATE TABLE IF NOT EXISTS ssids (
+                id INTEGER PRIMARY KEY,
+                ssid TEXT UNIQUE NOT NULL
+            )
+            """)
+            cur.execute("""
+            CREATE TABLE IF NOT EXISTS client_probes (
+                mac TEXT NOT NULL,
+                ssid_id INTEGER NOT NULL,
+                first_seen TEXT,
+                PRIMARY KEY (mac, ssid_id)
+            ) WITHOUT ROWID
+            """)
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_client_probes_ssid ON client_probes (ssid_id)")
+            
             # TABELA QoS simplificada
             cur.execute("""
             CREATE TABLE IF NOT EXISTS qos_metrics (
@@ -862,6 +4354,12 @@ class WirelessMonitorApp:
                 measurement_type TEXT
             )
             """)
+            _ensure_columns(cur, 'qos_metrics', [
+                ('latency_stddev', 'REAL'),
+                ('latency_p50', 'REAL'),
+                ('latency_p95', 'REAL'),
+                ('latency_p99', 'REAL')
+            ])
             
             conn.commit()
             conn.close()
@@ -869,30 +4367,47 @@ class WirelessMonitorApp:
         except Exception as e:
             print(f"[DB-ERRO] Falha ao inicializar DB: {e}")
 
+    def start_link_monitoring(self):
+        """Inicia o amostrador de enlace; sem nl80211/procfs usa iwconfig a cada 10s"""
+        if self.link_sampler.start():
+            print("[LINK] Amostrador nl80211/procfs ativo")
+        else:
+            self.update_wifi_info()
+            threading.Thread(target=self._poll_wifi_info, daemon=True).start()
+
+    def _poll_wifi_info(self):
+        while not self._stop_event.wait(10):  # Atualiza a cada 10 segundos
+            self.update_wifi_info()
+
+    def _on_link_change(self, changes):
+        """Recebe mudanças do amostrador (thread de fundo)"""
+        self._apply_link_changes(changes)
+
+    def _apply_link_changes(self, changes):
+        """Aplica mudanças do enlace em current_wifi_info e avisa os clientes"""
+        self.current_wifi_info.update(changes)
+        
+        # Registra o sinal no histórico no máximo a cada 10s
+        signal = self.current_wifi_info.get('signal_strength', "N/A")
+        now = time.time()
+        if 'signal_strength' in changes and signal != "N/A" and now - self._last_signal_archive >= 10:
+            self._last_signal_archive = now
+            self.qos_history.update({'signal_strength': int(signal.split()[0])})
+        
+        self._notify('wifi', changes)
+
     def update_wifi_info(self):
-        """Atualiza informações da rede WiFi conectada - APRIMORADA"""
+        """Atualiza informações da rede WiFi conectada via iwgetid/iwconfig (fallback)"""
         try:
             # Obtém informações da rede WiFi atual no Linux
-            result = subprocess.run(
-                ['iwgetid', '-r'], 
-                capture_output=True, 
-                text=True
-            )
+            result = system_commands.run(['iwgetid', '-r'], ttl=2)
             
             if result.returncode == 0 and result.stdout.strip():
                 ssid = result.stdout.strip()
                 self.current_wifi_info['ssid'] = ssid
                 
                 # Obtém mais detalhes usando iwconfig
-                iw_result = subprocess.run(
-                    ['iwconfig'], 
-                    capture_output=True, 
-                    text=True
-                )
-                
-                signal_dbm = "N/A"
-                frequency = "Desconhecido"
-                channel = 0
+                iw_result = system_commands.run(['iwconfig'], ttl=2)
                 
                 if iw_result.returncode == 0:
                     lines = iw_result.stdout.split('\n')
@@ -908,41 +4423,18 @@ class WirelessMonitorApp:
                             freq_match = re.search(r'Frequency:([\d\.]+) GHz', line)
                             if freq_match:
                                 freq = freq_match.group(1)
-                                frequency = f"{freq}GHz"
-                                self.current_wifi_info['frequency'] = frequency
-                                
-                                # Converte frequência para canal - CORRIGIDA
-                                try:
-                                    freq_float = float(freq)
-                                    if 2.4 <= freq_float <= 2.4835:
-                                        # Conversão precisa para 2.4GHz
-                                        channel = int(round((freq_float - 2.412) / 0.005)) + 1
-                                        if channel < 1:
-                                            channel = 1
-                                        elif channel > 13:
-                                            channel = 13
-                                    elif 5.0 <= freq_float <= 5.9:
-                                        # Conversão para 5GHz (simplificada)
-                                        # Canais comuns: 36,40,44,48,52,56,60,64,100,104,108,112,116,120,124,128,132,136,140,149,153,157,161,165
-                                        if 5.150 <= freq_float <= 5.250:
-                                            channel = 36 + int((freq_float - 5.150) / 0.005)
-                                        elif 5.250 <= freq_float <= 5.350:
-                                            channel = 52 + int((freq_float - 5.250) / 0.005)
-                                        elif 5.470 <= freq_float <= 5.725:
-                                            channel = 100 + int((freq_float - 5.470) / 0.005)
-                                        elif 5.725 <= freq_float <= 5.825:
-                                            channel = 149 + int((freq_float - 5.725) / 0.005)
-                                except:
-                                    channel = 0
-                                
+                                self.current_wifi_info['frequency'] = f"{freq}GHz"
+                                band, channel = frequency_mhz_to_channel(int(round(float(freq) * 1000)))
+                                self.current_wifi_info['band'] = band
                                 self.current_wifi_info['channel'] = channel
                         
                         elif 'Signal level=' in line:
                             # Extrai força do sinal em dBm
                             signal_match = re.search(r'Signal level=(-?\d+) dBm', line)
                             if signal_match:
-                                signal_dbm = f"{signal_match.group(1)} dBm"
-                                self.current_wifi_info['signal_strength'] = signal_dbm
+                                self.current_wifi_info['signal_strength'] = f"{signal_match.group(1)} dBm"
+                                self.problem_solver.signal_tracker.record(int(signal_match.group(1)))
+                                self.qos_history.update({'signal_strength': int(signal_match.group(1))})
                             else:
                                 # Tenta outros formatos
                                 signal_match = re.search(r'Signal level=(-?\d+)/(\d+)', line)
@@ -952,194 +4444,920 @@ class WirelessMonitorApp:
                                     if max_signal > 0:
                                         # Conversão aproximada para dBm
                                         dbm = -50 + (signal/max_signal * -50)  # Aproximação
-                                        signal_dbm = f"{int(dbm)} dBm"
-                                        self.current_wifi_info['signal_strength'] = signal_dbm
-                
-                # Atualiza a interface
-                if hasattr(self, 'wifi_status'):
-                    wifi_text = f"WiFi: {ssid} | Canal: {channel} | Sinal: {signal_dbm}"
-                    self.wifi_status.config(text=wifi_text)
-                    
-                    # Altera cor baseada na força do sinal
-                    try:
-                        dbm_value = int(signal_dbm.split()[0])
-                        if dbm_value >= -50:
-                            self.wifi_status.config(foreground="green")
-                        elif dbm_value >= -65:
-                            self.wifi_status.config(foreground="orange")
-                        else:
-                            self.wifi_status.config(foreground="red")
-                    except:
-                        pass
-                    
-                    # Adiciona alerta visual se canal não for padrão
-                    if channel not in [1, 6, 11] and 1 <= channel <= 13:
-                        self.wifi_status.config(font=('Arial', 9, 'bold'))
+                                        self.current_wifi_info['signal_strength'] = f"{int(dbm)} dBm"
             
             else:
                 self.current_wifi_info['ssid'] = 'Não conectado'
                 self.current_wifi_info['signal_strength'] = "N/A"
-                if hasattr(self, 'wifi_status'):
-                    self.wifi_status.config(text="WiFi: Não conectado", foreground="red")
+            
+            self._notify('wifi', self.current_wifi_info)
                     
         except Exception as e:
             print(f"Erro ao obter informações WiFi: {e}")
+
+    # ----------------- Banco de dados -----------------
+    def save_packet_to_db(self, timestamp, src_mac, dst_mac, bssid, packet_type, size, raw_log):
+        """Insere registro de pacote no DB."""
+        try:
+            conn = sqlite3.connect(self.db_manager.db_name)
+            cur = conn.cursor()
+            cur.execute("""
+                INSERT INTO packets (timestamp, src_mac, dst_mac, bssid, packet_type, size, raw_log)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (timestamp, src_mac, dst_mac, bssid, packet_type, size, raw_log))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"[DB-ERRO] Falha ao salvar pacote: {e}")
+
+    def save_qos_metrics(self, latency, jitter, packet_loss, measurement_type="normal", distribution=None):
+        """Salva métricas QoS no banco (distribution: desvio padrão e percentis)."""
+        distribution = distribution or {}
+        try:
+            conn = sqlite3.connect(self.db_manager.db_name)
+            cur = conn.cursor()
+            cur.execute("""
+                INSERT INTO qos_metrics (timestamp, latency, jitter, packet_loss, measurement_type,
+                                         latency_stddev, latency_p50, latency_p95, latency_p99)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                latency,
+                jitter,
+                packet_loss,
+                measurement_type,
+                distribution.get('latency_stddev'),
+                distribution.get('latency_p50'),
+                distribution.get('latency_p95'),
+                distribution.get('latency_p99')
+            ))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"[DB-ERRO] Falha ao salvar métricas QoS: {e}")
+
+    @staticmethod
+    def _beacon_band(ies, channel, capture_band, capture_channel):
+        """Banda do BSS: a do radiotap se o canal confere; 6 GHz se há HE 6GHz Operation"""
+        if capture_band and channel == capture_channel:
+            return capture_band
+        if ies.get('primary_channel') is not None:
+            return '6'
+        return default_band(channel) if channel else None
+
+    def _set_device_type(self, device, kind):
+        """Atualiza o tipo do dispositivo mantendo device_counts em O(1)"""
+        previous = device.get('type')
+        if previous != kind:
+            if previous in self.device_counts:
+                self.device_counts[previous] -= 1
+            self.device_counts[kind] = self.device_counts.get(kind, 0) + 1
+            device['type'] = kind
+
+    def recount_devices(self):
+        """Recalcula device_counts após mudanças em lote (restauração, simulação, limpeza)"""
+        counts = {'AP': 0, 'Client': 0}
+        for device in list(self.wireless_devices.values()):
+            kind = device.get('type')
+            if kind in counts:
+                counts[kind] += 1
+        self.device_counts.update(counts)
+        self._notify('devices')
+
+    @staticmethod
+    def _apply_ies(device, ies):
+        """Copia para o registro do AP os campos extraídos dos IEs"""
+        for key in ('security', 'cipher', 'width', 'standard', 'country'):
+            if ies[key] is not None:
+                device[key] = ies[key]
+
+    # ----------------- Funções QoS -----------------
+    def measure_qos(self):
+        """Mede latência, jitter e perda de pacotes - SÓ FUNCIONA COM REDE NORMAL"""
+        try:
+            targets = self.qos_prober.get_targets()
+            target_list = ", ".join(host for hosts in targets.values() for host in hosts)
+            self.capture_queue.put(f"[QoS] Medindo latência para {target_list}...\n")
+            
+            # Todos os alvos são sondados em paralelo
+            results = self.qos_prober.probe_all()
+            hops = QoSProbeScheduler.summarize_hops(results)
+            
+            # As métricas principais continuam vindo do primeiro alvo externo
+            wan_probes = results.get('wan') or []
+            primary = wan_probes[0] if wan_probes else None
+            
+            if primary and primary['times']:
+                times = primary['times']
+                # Alimenta a janela deslizante (perdas entram como None)
+                for rtt in times:
+                    self.latency_stats.record(rtt)
+                for _ in range(self.qos_prober.count - len(times)):
+                    self.latency_stats.record(None)
+                
+                stats = self.latency_stats.snapshot()
+                stats.pop('samples')
+                self.qos_metrics.update(stats)
+                self.qos_metrics.update({
+                    'hops': hops,
+                    'last_update': datetime.datetime.now().strftime("%H:%M:%S"),
+                    'status': "Medido"
+                })
+                
+                # Salva no banco
+                self.save_qos_metrics(stats['latency'], stats['jitter'], stats['packet_loss'],
+                                      distribution=stats)
+                self.qos_history.update({
+                    'latency': stats['latency'],
+                    'jitter': stats['jitter'],
+                    'packet_loss': stats['packet_loss']
+                })
+                
+                # Adiciona aos logs
+                qos_info = (
+                    f"[QoS] Latência: {self.qos_metrics['latency']}ms | "
+                    f"Jitter: {self.qos_metrics['jitter']}ms | "
+                    f"Perda: {self.qos_metrics['packet_loss']}% | "
+                    f"Atualizado: {self.qos_metrics['last_update']}\n"
+                )
+                self.capture_queue.put(qos_info)
+                for segment, hop in hops.items():
+                    latency = f"{hop['latency']}ms" if hop['latency'] is not None else "sem resposta"
+                    self.capture_queue.put(
+                        f"[QoS]   {QoSProbeScheduler.SEGMENT_NAMES[segment]} "
+                        f"({', '.join(hop['targets'])}): {latency} | Perda: {hop['packet_loss']}%\n"
+                    )
+                
+                # Atualiza status
+                self._notify('qos', self.qos_metrics)
+                
+                self.qos_measurement_count += 1
+                return True
+            else:
+                self.qos_metrics['hops'] = hops
+                if primary and primary['error'] in (None, "timeout"):
+                    # Queda total: as sondas perdidas entram na janela como perdas,
+                    # senão a perda (e o diagnóstico) ignoraria justamente a queda
+                    for _ in range(self.qos_prober.count):
+                        self.latency_stats.record(None)
+                    self.qos_metrics['packet_loss'] = round(self.latency_stats.packet_loss, 2)
+                if primary and primary['error'] == "timeout":
+                    self.capture_queue.put(f"[QoS] Timeout na medição ({self.qos_prober.timeout}s)\n")
+                    self.qos_metrics['status'] = "Timeout"
+                elif primary and primary['error']:
+                    self.capture_queue.put(f"[QoS] Erro no comando ping: {primary['error']}\n")
+                    self.qos_metrics['status'] = "Falha na medição"
+                else:
+                    self.capture_queue.put("[QoS] Nenhum pacote recebido no ping\n")
+                    self.qos_metrics['status'] = "Falha na medição"
+                    
+        except Exception as e:
+            self.capture_queue.put(f"[QoS] Erro: {str(e)}\n")
+            self.qos_metrics['status'] = "Erro"
+            
+        return False
+
+    def measure_qos_before_capture(self):
+        """Mede QoS antes de iniciar o monitoramento (rede normal)"""
+        self.capture_queue.put("\n📊 MEDINDO QoS ANTES DO MONITORAMENTO...\n")
+        if self.measure_qos():
+            self.last_qos_before_capture = self.qos_metrics.copy()
+            self.save_qos_metrics(
+                self.qos_metrics['latency'],
+                self.qos_metrics['jitter'], 
+                self.qos_metrics['packet_loss'],
+                "before_capture",
+                distribution=self.qos_metrics
+            )
+            return True
+        return False
+
+    def measure_qos_after_capture(self):
+        """Mede QoS após parar o monitoramento (rede restaurada)"""
+        self.capture_queue.put("\n📊 MEDINDO QoS APÓS O MONITORAMENTO...\n")
+        if self.measure_qos():
+            after_metrics = self.qos_metrics.copy()
+            self.save_qos_metrics(
+                after_metrics['latency'],
+                after_metrics['jitter'],
+                after_metrics['packet_loss'],
+                "after_capture",
+                distribution=after_metrics
+            )
+            
+            # Compara com medição anterior se disponível
+            if self.last_qos_before_capture:
+                self._compare_qos_measurements()
+            
+            return True
+        return False
+
+    def _compare_qos_measurements(self):
+        """Compara medições QoS antes e depois do monitoramento"""
+        before = self.last_qos_before_capture
+        after = self.qos_metrics
+        
+        latency_diff = before['latency'] - after['latency']
+        latency_change = "melhorou" if latency_diff > 0 else "piorou"
+        
+        packet_loss_diff = before['packet_loss'] - after['packet_loss']
+        packet_loss_change = "melhorou" if packet_loss_diff > 0 else "piorou"
         
-        # Agenda próxima atualização
-        self.root.after(10000, self.update_wifi_info)  # Atualiza a cada 10 segundos
+        comparison = (
+            f"\n📈 COMPARAÇÃO QoS (Antes vs Depois):\n"
+            f"   Latência: {before['latency']}ms → {after['latency']}ms ({latency_change})\n"
+            f"   Perda: {before['packet_loss']}% → {after['packet_loss']}% ({packet_loss_change})\n"
+            f"   Jitter: {before['jitter']}ms → {after['jitter']}ms\n"
+        )
+        
+        self.capture_queue.put(comparison)
+
+    # ----------------- Captura -----------------
+    def set_monitor_mode(self, interface):
+        """Ativa o modo monitor no Linux usando airmon-ng"""
+        try:
+            # Verifica se a interface existe
+            if system_commands.run(["iwconfig", interface], ttl=2).returncode != 0:
+                self._fail(f"Interface {interface} não encontrada!")
+                return None
+
+            # Para processos interferentes
+            system_commands.run(["sudo", "airmon-ng", "check", "kill"], timeout=30)
+
+            # Ativa modo monitor
+            result = system_commands.run(["sudo", "airmon-ng", "start", interface], timeout=30)
+            # O estado das interfaces mudou: saídas em cache do iwconfig são inválidas
+            system_commands.invalidate('iwconfig')
+            
+            if result.returncode != 0:
+                self._fail(f"Falha ao ativar modo monitor: {result.stderr}")
+                return None
+
+            # Procura pela interface em modo monitor
+            iwconfig_result = system_commands.run(["iwconfig"], ttl=2)
+            
+            for line in iwconfig_result.stdout.split('\n'):
+                if "IEEE 802.11" in line and "Mode:Monitor" in line:
+                    iface_name = line.split()[0]
+                    return iface_name
+            
+            # Tenta nomes comuns
+            for name in [f"{interface}mon", "mon0", "wlan0mon"]:
+                if system_commands.run(["iwconfig", name], ttl=2).returncode == 0:
+                    return name
+            
+            self._fail("Não foi possível encontrar interface em modo monitor")
+            return None
+            
+        except Exception as e:
+            self._fail(f"Erro inesperado: {str(e)}")
+            return None
+    
+    def stop_monitor_mode(self, interface):
+        """Desativa o modo monitor e restaura o NetworkManager"""
+        try:
+            # Primeiro para o modo monitor
+            if interface:
+                result = system_commands.run(["sudo", "airmon-ng", "stop", interface], timeout=30)
+                system_commands.invalidate('iwconfig')
+                if result.returncode != 0:
+                    raise subprocess.CalledProcessError(result.returncode, "airmon-ng", stderr=result.stderr)
+            
+            # Restaura o NetworkManager
+            self.capture_queue.put("[SISTEMA] Restaurando NetworkManager...\n")
+            result = system_commands.run(["sudo", "systemctl", "start", "NetworkManager"], timeout=10)
+            
+            if result.timed_out:
+                raise subprocess.TimeoutExpired("systemctl", 10)
+            if result.returncode == 0:
+                self.capture_queue.put("[SISTEMA] NetworkManager reiniciado com sucesso\n")
+                self.capture_queue.put("[SISTEMA] Conectividade normal restaurada\n")
+            else:
+                self.capture_queue.put(f"[AVISO] NetworkManager não pôde ser reiniciado: {result.stderr}\n")
+            
+            return True
+            
+        except subprocess.TimeoutExpired:
+            self.capture_queue.put("[AVISO] Timeout ao restaurar NetworkManager\n")
+            return False
+        except subprocess.CalledProcessError as e:
+            self.capture_queue.put(f"[AVISO] Erro ao restaurar NetworkManager: {e.stderr}\n")
+            return False
+        except Exception as e:
+            self.capture_queue.put(f"[AVISO] Erro inesperado ao restaurar NetworkManager: {str(e)}\n")
+            return False
+    
+    def packet_handler(self, packet):
+        try:
+            if packet.haslayer(Dot11):
+                started = stage = self.profiler.begin()
+                now = time.time()
+                # Sob atraso, quadros de alto volume são amostrados; weight = 1/p
+                weight = self.sampler.admit(packet.type, packet.subtype, float(packet.time), now)
+                if not weight:
+                    return
+                self.frames_processed += 1
+                
+                mac_src = packet.addr2 if packet.addr2 else "Desconhecido"
+                mac_dst = packet.addr1 if packet.addr1 else "Desconhecido"
+                bssid = packet.addr3 if packet.addr3 else "Desconhecido"
+                signal, noise, rate, ht, capture_band, capture_channel = self._radio_fields(packet)
+                if stage:
+                    stage = self.profiler.mark('dissect', stage)
+                
+                if packet.type in (1, 2):
+                    # Controle e dados: só contadores, sinal e airtime (sem banco, log ou eventos)
+                    self.network_stats['data_count' if packet.type == 2 else 'control_count'] += weight
+                    if mac_src in self.wireless_devices:
+                        fold_radio_sample(self.wireless_devices[mac_src], signal, noise, rate)
+                    self._record_airtime(packet, weight, bssid, rate, ht, capture_band, capture_channel)
+                    if stage:
+                        self.profiler.mark('airtime', stage)
+                        self.profiler.mark('total', started)
+                    return
+                
+                self.frames_logged += 1
+                timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+                packet_type = "Desconhecido"
+                packet_info = f"\n[{timestamp}] "
+                
+                # Contagem de tipos de pacotes
+                if packet.haslayer(Dot11Beacon):
+                    packet_type = "Beacon"
+                    self.network_stats['beacon_count'] += weight
+                    beacon = packet[Dot11Beacon]
+                    ies = parse_information_elements(bytes(beacon.payload), int(beacon.cap) & 0x10)
+                    ssid = ies['ssid'] or "Hidden"
+                    channel = ies['channel'] or capture_channel
+                    
+                    device = self.wireless_devices[bssid]
+                    self._set_device_type(device, "AP")
+                    device['ssid'] = ssid
+                    device['channel'] = channel
+                    device['band'] = self._beacon_band(ies, channel, capture_band, capture_channel)
+                    device['last_seen'] = now
+                    self._apply_ies(device, ies)
+                    fold_radio_sample(device, signal, noise, rate)
+                    
+                    # Temporização: TSF, intervalo anunciado e número de sequência
+                    self.problem_solver.beacon_analyzer.observe(
+                        bssid, float(packet.time), beacon.timestamp, beacon.beacon_interval,
+                        packet[Dot11].SC >> 4 if packet[Dot11].SC is not None else None)
+                    
+                    packet_info += f"📡 Beacon | SSID: {ssid} | BSSID: {bssid} | Canal: {channel} | "
+                    packet_info += f"{device['security']} | {device.get('width', 20)}MHz | "
+                    if signal is not None:
+                        packet_info += f"Sinal: {signal}dBm | "
+                    self.inventory.touch_ap(bssid, device, now)
+                
+                elif packet.haslayer(Dot11ProbeReq):
+                    packet_type = "ProbeReq"
+                    self.network_stats['probereq_count'] += weight
+                    ssid = parse_information_elements(bytes(packet[Dot11ProbeReq].payload))['ssid'] or "Any"
+                    device = self.wireless_devices[mac_src]
+                    self._set_device_type(device, "Client")
+                    device['probed_ssid'] = ssid
+                    device['last_seen'] = now
+                    fold_radio_sample(device, signal, noise, rate)
+                    if ssid != "Any":
+                        self.inventory.probes.record(mac_src, ssid, now)
+                    
+                    packet_info += f"🔍 ProbeReq | Client: {mac_src} | Procurando: {ssid} | "
+                    self.inventory.touch_client(mac_src, device, now)
+                
+                elif packet.haslayer(Dot11ProbeResp):
+                    packet_type = "ProbeResp"
+                    self.network_stats['proberesp_count'] += weight
+                    response = packet[Dot11ProbeResp]
+                    ies = parse_information_elements(bytes(response.payload), int(response.cap) & 0x10)
+                    ssid = ies['ssid'] or "Hidden"
+                    device = self.wireless_devices[bssid]
+                    self._set_device_type(device, "AP")
+                    device['ssid'] = ssid
+                    device['last_seen'] = now
+                    if ies['channel'] and not device.get('channel'):
+                        device['channel'] = ies['channel']
+                        device['band'] = self._beacon_band(ies, ies['channel'], capture_band, capture_channel)
+                    self._apply_ies(device, ies)
+                    fold_radio_sample(device, signal, noise, rate)
+                    
+                    packet_info += f"📨 ProbeResp | AP: {bssid} | SSID: {ssid} | "
+                    self.inventory.touch_ap(bssid, device, now)
+                
+                elif packet.haslayer(Dot11Deauth):
+                    packet_type = "Deauth"
+                    self.network_stats['deauth_count'] += weight
+                    reason = packet.reason if hasattr(packet, 'reason') else "N/A"
+                    self.problem_solver.deauth_detector.record(mac_src, mac_dst, bssid, reason, now)
+                    packet_info += f"🚨 DEAUTH | De: {mac_src} | Para: {mac_dst} | Razão: {reason} | "
+                
+                elif packet.haslayer(Dot11Auth):
+                    packet_type = "Auth"
+                    self.network_stats['auth_count'] += weight
+                    packet_info += f"🔐 Auth | De: {mac_src} | Para: {mac_dst} | "
+                
+                elif packet.haslayer(Dot11AssoReq):
+                    packet_type = "AssoReq"
+                    self.network_stats['assocreq_count'] += weight
+                    packet_info += f"🤝 AssoReq | Client: {mac_src} | AP: {bssid} | "
+                
+                elif packet.haslayer(Dot11AssoResp):
+                    packet_type = "AssoResp"
+                    self.network_stats['assocresp_count'] += weight
+                    packet_info += f"✅ AssoResp | AP: {bssid} | Client: {mac_src} | "
+                
+                if stage:
+                    stage = self.profiler.mark('classify', stage)
+                
+                # Demais quadros só atualizam dispositivos já conhecidos
+                if packet_type not in ("Beacon", "ProbeReq", "ProbeResp") and mac_src in self.wireless_devices:
+                    fold_radio_sample(self.wireless_devices[mac_src], signal, noise, rate)
+                
+                self._record_airtime(packet, weight, bssid, rate, ht, capture_band, capture_channel)
+                if stage:
+                    stage = self.profiler.mark('airtime', stage)
+                
+                packet_info += f"Tipo: {packet_type} | Tamanho: {len(packet)} bytes"
+                if stage:
+                    stage = self.profiler.mark('format', stage)
+                
+                try:
+                    self.save_packet_to_db(timestamp, mac_src, mac_dst, bssid, packet_type, len(packet), packet_info)
+                except Exception as e:
+                    print(f"[DB-ERRO] ao salvar pacote: {e}")
+                if stage:
+                    stage = self.profiler.mark('db', stage)
+                
+                if self.log_packets:
+                    self.capture_queue.put(packet_info)
+                self._notify('devices')
+                
+                # Atualiza estatísticas a cada 50 quadros registrados
+                if self.frames_logged % 50 == 0:
+                    self.show_network_stats()
+                if stage:
+                    self.profiler.mark('queue', stage)
+                    self.profiler.mark('total', started)
+                    self.profiler.measure_dissection(packet)
+                    
+        except Exception as e:
+            error_msg = f"\n[ERRO] Falha ao processar pacote: {str(e)}"
+            self.capture_queue.put(error_msg)
+
+    @staticmethod
+    def _radio_fields(packet):
+        """Sinal/ruído/taxa/HT/banda/canal do cabeçalho RadioTap (None se o driver não informa)"""
+        signal = noise = rate = capture_band = capture_channel = None
+        ht = False
+        if packet.haslayer(RadioTap):
+            radiotap = packet[RadioTap]
+            signal = getattr(radiotap, 'dBm_AntSignal', None)
+            noise = getattr(radiotap, 'dBm_AntNoise', None)
+            rate = getattr(radiotap, 'Rate', None)
+            if rate is not None:
+                rate = rate / 2  # Unidades de 500 kbps -> Mbps
+            else:
+                rate = ht_mcs_rate(getattr(radiotap, 'MCS_index', None),
+                                   getattr(radiotap, 'MCS_bandwidth', 0),
+                                   getattr(radiotap, 'guard_interval', 0) == 1)
+                ht = rate is not None
+            frequency = getattr(radiotap, 'ChannelFrequency', None)
+            if frequency:
+                capture_band, capture_channel = frequency_mhz_to_channel(frequency)
+        return signal, noise, rate, ht, capture_band, capture_channel
+
+    def _record_airtime(self, packet, weight, bssid, rate, ht, capture_band, capture_channel):
+        """Airtime: canal do radiotap ou, sem ele, o canal do BSS"""
+        bss = self.wireless_devices.get(bssid)
+        if capture_channel is None and bss is not None:
+            capture_band, capture_channel = bss.get('band'), bss.get('channel')
+        self.problem_solver.airtime.record(
+            capture_channel, len(packet[Dot11]), rate, packet[Dot11].ID or 0, float(packet.time), ht,
+            weight, capture_band, bssid if bss is not None else None)
+
+    def show_network_stats(self):
+        """Mostra estatísticas da rede"""
+        stats_text = (
+            f"\n📊 ESTATÍSTICAS DA REDE:\n"
+            f"   📡 Beacons: {self.network_stats['beacon_count']}\n"
+            f"   🔍 ProbeReqs: {self.network_stats['probereq_count']}\n"
+            f"   📨 ProbeResps: {self.network_stats['proberesp_count']}\n"
+            f"   🚨 Deauths: {self.network_stats['deauth_count']}\n"
+            f"   🔐 Auths: {self.network_stats['auth_count']}\n"
+            f"   🤝 AssocReqs: {self.network_stats['assocreq_count']}\n"
+            f"   ✅ AssocResps: {self.network_stats['assocresp_count']}\n"
+            f"   📦 Data: {self.network_stats['data_count']}\n"
+            f"   🎛️ Controle: {self.network_stats['control_count']}\n"
+        )
+        if self.sampler.level:
+            stats_text += "   🎚️ Amostragem (atraso {:.2f}s): ".format(self.sampler.lag) + ", ".join(
+                f"{frame_class} {rate:.0%}" for frame_class, rate in self.sampler.rates().items()) + "\n"
+        utilization = self.problem_solver.airtime.utilization_by_channel(window=10)
+        if utilization:
+            stats_text += "   ⏱️ Ocupação (10s): " + ", ".join(
+                f"canal {channel} ({band}GHz): {busy:.0f}%"
+                for (band, channel), busy in sorted(utilization.items())) + "\n"
+        self.capture_queue.put(stats_text)
 
-    def frequency_to_channel_24(self, frequency):
-        """Converte frequência para canal na banda 2.4GHz - CORRIGIDA"""
+    def _collect_kernel_drops(self, capture_socket):
+        """Acumula tp_packets/tp_drops do socket PF_PACKET (o kernel zera a cada leitura)"""
         try:
-            # Remove 'GHz' e converte para float
-            freq_ghz = float(frequency.replace('GHz', '').strip())
-            
-            # Tabela de frequência para canal 2.4GHz
-            # Canal 1: 2.412 GHz
-            # Canal 2: 2.417 GHz
-            # ...
-            # Canal 13: 2.472 GHz
-            
-            if freq_ghz >= 2.412 and freq_ghz <= 2.484:
-                # Fórmula: canal = ((freq_ghz - 2.412) / 0.005) + 1
-                channel = int(((freq_ghz - 2.412) / 0.005) + 1)
+            raw = capture_socket.ins.getsockopt(SOL_PACKET, PACKET_STATISTICS, TPACKET_STATS.size)
+        except (AttributeError, OSError):
+            return  # Fora do Linux ou socket sem PF_PACKET
+        packets, drops = TPACKET_STATS.unpack(raw)
+        self.kernel_packets += packets
+        self.kernel_drops += drops
+        if drops:
+            self.capture_queue.put(f"[CAPTURA] Kernel descartou {drops} de {packets} quadros neste ciclo\n")
+
+    def run_periodic_capture(self):
+        while self.is_capturing:
+            try:
+                start_time = time.time()
+                self.capture_queue.put(f"\n[CAPTURA] Iniciando captura por {self.capture_duration} segundos...\n")
                 
-                # Arredonda para o canal mais próximo
-                channel = round(channel)
+                # O socket é aberto aqui (e não pelo sniff) para ler as perdas do kernel
+                from scapy.config import conf
+                capture_socket = conf.L2listen(
+                    iface=self.interface,
+                    monitor=True,
+                    # Dados ocupam a maior parte do airtime; controle/dados seguem o caminho leve do handler
+                    filter="type mgt or type ctl or type data"
+                )
+                try:
+                    sniff(
+                        opened_socket=capture_socket,
+                        prn=self.packet_handler,
+                        store=0,
+                        timeout=self.capture_duration,
+                        stop_filter=lambda _: not self.is_capturing
+                    )
+                finally:
+                    self._collect_kernel_drops(capture_socket)
+                    capture_socket.close()
                 
-                # Limita aos canais válidos
-                if channel < 1:
-                    channel = 1
-                elif channel > 13:
-                    channel = 13
-                    
-                return channel
-        except:
-            pass
-        return 0
-    
-    def frequency_to_channel_5(self, frequency):
-        """Converte frequência para canal na banda 5GHz - CORRIGIDA"""
-        try:
-            freq_ghz = float(frequency.replace('GHz', '').strip())
-            
-            # Tabela de canais 5GHz
-            if 5.180 <= freq_ghz <= 5.200:
-                return 36
-            elif 5.200 <= freq_ghz <= 5.220:
-                return 40
-            elif 5.220 <= freq_ghz <= 5.240:
-                return 44
-            elif 5.240 <= freq_ghz <= 5.260:
-                return 48
-            elif 5.260 <= freq_ghz <= 5.280:
-                return 52
-            elif 5.280 <= freq_ghz <= 5.300:
-                return 56
-            elif 5.300 <= freq_ghz <= 5.320:
-                return 60
-            elif 5.320 <= freq_ghz <= 5.340:
-                return 64
-            elif 5.500 <= freq_ghz <= 5.520:
-                return 100
-            elif 5.520 <= freq_ghz <= 5.540:
-                return 104
-            elif 5.540 <= freq_ghz <= 5.560:
-                return 108
-            elif 5.560 <= freq_ghz <= 5.580:
-                return 112
-            elif 5.580 <= freq_ghz <= 5.600:
-                return 116
-            elif 5.600 <= freq_ghz <= 5.620:
-                return 120
-            elif 5.620 <= freq_ghz <= 5.640:
-                return 124
-            elif 5.640 <= freq_ghz <= 5.660:
-                return 128
-            elif 5.660 <= freq_ghz <= 5.680:
-                return 132
-            elif 5.680 <= freq_ghz <= 5.700:
-                return 136
-            elif 5.700 <= freq_ghz <= 5.720:
-                return 140
-            elif 5.745 <= freq_ghz <= 5.765:
-                return 149
-            elif 5.765 <= freq_ghz <= 5.785:
-                return 153
-            elif 5.785 <= freq_ghz <= 5.805:
-                return 157
-            elif 5.805 <= freq_ghz <= 5.825:
-                return 161
-            elif 5.825 <= freq_ghz <= 5.845:
-                return 165
+                self.capture_queue.put(f"\n[CAPTURA] Captura concluída. Aguardando próximo ciclo...\n")
                 
-        except:
-            pass
-        return 0
+                elapsed = time.time() - start_time
+                sleep_time = max(0, self.capture_interval - elapsed)
+                
+                # Espera interrompível (stop_capture/SIGTERM)
+                self._capture_wakeup.wait(sleep_time)
+                    
+            except Exception as e:
+                error_msg = f"\n[ERRO GRAVE] Falha na captura: {str(e)}\n"
+                self.capture_queue.put(error_msg)
+                self._capture_wakeup.wait(5)
 
-    # ----------------- Banco de dados -----------------
-    def save_packet_to_db(self, timestamp, src_mac, dst_mac, bssid, packet_type, size, raw_log):
-        """Insere registro de pacote no DB."""
-        try:
-            conn = sqlite3.connect(self.db_manager.db_name)
-            cur = conn.cursor()
-            cur.execute("""
-                INSERT INTO packets (timestamp, src_mac, dst_mac, bssid, packet_type, size, raw_log)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (timestamp, src_mac, dst_mac, bssid, packet_type, size, raw_log))
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"[DB-ERRO] Falha ao salvar pacote: {e}")
 
-    def save_qos_metrics(self, latency, jitter, packet_loss, measurement_type="normal"):
-        """Salva métricas QoS no banco."""
-        try:
-            conn = sqlite3.connect(self.db_manager.db_name)
-            cur = conn.cursor()
-            cur.execute("""
-                INSERT INTO qos_metrics (timestamp, latency, jitter, packet_loss, measurement_type)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                latency,
-                jitter,
-                packet_loss,
-                measurement_type
-            ))
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"[DB-ERRO] Falha ao salvar métricas QoS: {e}")
+class PipelineBenchmark:
+    """Benchmark reprodutível do pipeline de monitoramento
+
+    Gera cargas 802.11 sintéticas determinísticas com o scapy (offline, sem
+    interface), mede quadros/s e latência por quadro no packet_handler e
+    também a taxa de INSERT em packets, a latência do analyze_network_health
+    e os tempos de exportação/consulta com o banco em tamanhos fixos. Tudo
+    roda em um diretório temporário; o resultado é um dict JSON comparável
+    entre execuções (compare()).
+    """
+
+    WORKLOADS = ('beacon_heavy', 'probe_storm', 'deauth_flood', 'mixed')
+    DB_SIZES = (1000, 10000)
+    REGRESSION_TOLERANCE = 0.10  # 10%
+
+    def __init__(self, frames=2000, seed=42):
+        self.frames = frames
+        self.seed = seed
+
+    # ----------------- Cargas sintéticas -----------------
+    @staticmethod
+    def _mac(rng, prefix="02"):
+        return prefix + "".join(f":{rng.randrange(256):02x}" for _ in range(5))
+
+    def _beacon(self, rng, bssid, ssid, channel, seq):
+        return (RadioTap(present='Flags+Rate+Channel+dBm_AntSignal', Rate=2,
+                         ChannelFrequency=channel_to_frequency_mhz(channel), dBm_AntSignal=-rng.randint(30, 90)) /
+                Dot11(type=0, subtype=8, addr1='ff:ff:ff:ff:ff:ff', addr2=bssid, addr3=bssid, SC=(seq % 4096) << 4) /
+                Dot11Beacon(cap=0x1111, timestamp=seq * 102400) /
+                Dot11Elt(ID=0, info=ssid.encode()) / Dot11Elt(ID=3, info=bytes([channel])) /
+                Dot11Elt(ID=48, info=bytes.fromhex('0100000fac040100000fac040100000fac020000')))
+
+    def _probe(self, rng, client, ssid):
+        return (RadioTap(present='Flags+Rate+dBm_AntSignal', Rate=2, dBm_AntSignal=-rng.randint(40, 90)) /
+                Dot11(type=0, subtype=4, addr1='ff:ff:ff:ff:ff:ff', addr2=client, addr3='ff:ff:ff:ff:ff:ff') /
+                Dot11ProbeReq() / Dot11Elt(ID=0, info=ssid.encode()))
+
+    def _deauth(self, rng, attacker, target):
+        return (RadioTap(present='Flags+Rate', Rate=2) /
+                Dot11(type=0, subtype=12, addr1=target, addr2=attacker, addr3=attacker) /
+                Dot11Deauth(reason=rng.choice((1, 3, 7))))
+
+    def generate(self, workload):
+        """Lista determinística de quadros (bytes) para a carga pedida"""
+        _load_scapy()
+        rng = random.Random(f"{self.seed}:{workload}")
+        aps = [(self._mac(rng), f"Rede_{i}", rng.choice((1, 6, 11, 36, 44, 149))) for i in range(30)]
+        clients = [self._mac(rng, "06") for _ in range(200)]
+        attacker = self._mac(rng, "0a")
+        frames = []
+        for i in range(self.frames):
+            if workload == 'mixed':
+                kind = rng.choices(('beacon', 'probe', 'deauth'), weights=(70, 25, 5))[0]
+            else:
+                kind = {'beacon_heavy': 'beacon', 'probe_storm': 'probe', 'deauth_flood': 'deauth'}[workload]
+            if kind == 'beacon':
+                bssid, ssid, channel = rng.choice(aps)
+                frame = self._beacon(rng, bssid, ssid, channel, i)
+            elif kind == 'probe':
+                frame = self._probe(rng, rng.choice(clients), rng.choice(("", rng.choice(aps)[1])))
+            else:
+                frame = self._deauth(rng, attacker, rng.choice(clients))
+            frames.append(bytes(frame))
+        return frames
+
+    # ----------------- Medições -----------------
+    @staticmethod
+    def _latency_summary(histogram, elapsed, count):
+        return {
+            'frames': count,
+            'seconds': round(elapsed, 4),
+            'fps': round(count / elapsed, 1) if elapsed else 0,
+            'p50_us': round(histogram.percentile(50), 1),
+            'p99_us': round(histogram.percentile(99), 1)
+        }
+
+    def bench_workload(self, engine, workload):
+        """Dissecação (scapy) e packet_handler, quadro a quadro"""
+        raw_frames = self.generate(workload)
+        start = time.perf_counter()
+        packets = [RadioTap(raw) for raw in raw_frames]
+        dissect_seconds = time.perf_counter() - start
+
+        histogram = LatencyHistogram(min_value=0.1, max_value=1000000.0)
+        handler = engine.packet_handler
+        elapsed = 0.0
+        for packet in packets:
+            packet.time = time.time()  # Evita que a amostragem veja atraso artificial
+            t0 = time.perf_counter()
+            handler(packet)
+            spent = time.perf_counter() - t0
+            histogram.record(spent * 1000000)
+            elapsed += spent
+        result = self._latency_summary(histogram, elapsed, len(packets))
+        result['dissect_fps'] = round(len(packets) / dissect_seconds, 1) if dissect_seconds else 0
+        return result
+
+    def bench_db_inserts(self, engine, rows=2000):
+        start = time.perf_counter()
+        for i in range(rows):
+            engine.save_packet_to_db("2025-01-01 00:00:00.000", "02:00:00:00:00:01", "ff:ff:ff:ff:ff:ff",
+                                     "02:00:00:00:00:01", "Beacon", 120, f"bench {i}")
+        elapsed = time.perf_counter() - start
+        return {'rows': rows, 'seconds': round(elapsed, 4), 'rows_per_second': round(rows / elapsed, 1)}
+
+    def bench_diagnosis(self, engine, runs=50):
+        histogram = LatencyHistogram(min_value=0.001, max_value=100000.0)
+        sink = Queue()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(runs):
+                start = time.perf_counter()
+                engine.problem_solver.analyze_network_health(
+                    engine.qos_metrics, engine.wireless_devices, sink, engine.network_stats,
+                    engine.current_wifi_info, persist=False)
+                histogram.record((time.perf_counter() - start) * 1000)
+        return {'runs': runs, 'devices': len(engine.wireless_devices),
+                'p50_ms': round(histogram.percentile(50), 3), 'p99_ms': round(histogram.percentile(99), 3)}
+
+    @staticmethod
+    def bench_channel_lookup(lookups=100000):
+        """Consultas frequência -> (banda, canal), feitas uma vez por quadro capturado"""
+        frequencies = [2412, 2484, 5180, 5825, 5955, 7115, 2400] * (lookups // 7)
+        start = time.perf_counter()
+        for mhz in frequencies:
+            frequency_mhz_to_channel(mhz)
+        elapsed = time.perf_counter() - start
+        return {'lookups': len(frequencies), 'seconds': round(elapsed, 4),
+                'lookups_per_second': round(len(frequencies) / elapsed, 1) if elapsed else 0}
+
+    def bench_export_query(self, engine, workdir, size):
+        """Exportação JSON e consultas com a tabela packets em tamanho fixo"""
+        conn = sqlite3.connect(engine.db_manager.db_name)
+        with conn:
+            conn.execute("DELETE FROM packets")
+            conn.executemany(
+                "INSERT INTO packets (timestamp, src_mac, dst_mac, bssid, packet_type, size, raw_log) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((f"2025-01-01 00:{i // 60 % 60:02d}:{i % 60:02d}.000", f"02:00:00:00:{i // 256 % 256:02x}:{i % 256:02x}",
+                  "ff:ff:ff:ff:ff:ff", "02:00:00:00:00:01", ("Beacon", "ProbeReq", "Deauth")[i % 3], 100 + i % 200,
+                  f"bench {i}") for i in range(size)))
+        conn.close()
+
+        timings = {}
+        start = time.perf_counter()
+        engine.db_manager.export_data_to_json('packets', os.path.join(workdir, f"packets_{size}.json"))
+        timings['export_json_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        start = time.perf_counter()
+        engine.db_manager.execute_custom_query("SELECT packet_type, COUNT(*), AVG(size) FROM packets GROUP BY packet_type")
+        timings['group_query_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        start = time.perf_counter()
+        engine.db_manager.get_table_stats()
+        timings['table_stats_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return timings
+
+    def run(self, workloads=None):
+        """Executa a suíte completa; retorna o resultado serializável em JSON"""
+        import platform
+        import scapy
+        _load_scapy()
+        results = {
+            'meta': {
+                'seed': self.seed, 'frames': self.frames, 'python': platform.python_version(),
+                'scapy': getattr(scapy, 'VERSION', '?'), 'platform': platform.platform(),
+                'timestamp': datetime.datetime.now().isoformat(timespec='seconds')
+            },
+            'workloads': {}, 'db_sizes': {}
+        }
+        with tempfile.TemporaryDirectory() as workdir:
+            with contextlib.redirect_stdout(io.StringIO()):
+                engine = MonitorEngine(os.path.join(workdir, "bench.db"), log_packets=False, snapshot_interval=0)
+            engine.sampler.enabled = False  # Medir o processamento completo
+            engine.problem_solver.deauth_detector.on_attack = None
+            for workload in workloads or self.WORKLOADS:
+                results['workloads'][workload] = self.bench_workload(engine, workload)
+            results['db_insert'] = self.bench_db_inserts(engine)
+            results['diagnosis'] = self.bench_diagnosis(engine)
+            results['channel_lookup'] = self.bench_channel_lookup()
+            for size in self.DB_SIZES:
+                results['db_sizes'][str(size)] = self.bench_export_query(engine, workdir, size)
+        return results
+
+    @classmethod
+    def _flatten(cls, data, prefix=""):
+        for key, value in data.items():
+            if isinstance(value, dict):
+                yield from cls._flatten(value, f"{prefix}{key}.")
+            elif isinstance(value, (int, float)) and key not in ('frames', 'rows', 'runs', 'devices', 'seed', 'lookups'):
+                yield f"{prefix}{key}", value
+
+    @classmethod
+    def compare(cls, baseline, current):
+        """Lista de regressões (> REGRESSION_TOLERANCE) entre dois resultados
+
+        Métricas de taxa (fps, *_per_second) pioram quando caem; tempos e
+        latências (segundos, *_ms, *_us) pioram quando sobem.
+        """
+        before = dict(cls._flatten({k: v for k, v in baseline.items() if k != 'meta'}))
+        regressions = []
+        for name, value in cls._flatten({k: v for k, v in current.items() if k != 'meta'}):
+            old = before.get(name)
+            if not old:
+                continue
+            higher_is_better = name.endswith(('fps', 'per_second'))
+            change = (value - old) / old
+            if (higher_is_better and change < -cls.REGRESSION_TOLERANCE) or \
+                    (not higher_is_better and change > cls.REGRESSION_TOLERANCE):
+                regressions.append({'metric': name, 'baseline': old, 'current': value,
+                                    'change_percent': round(change * 100, 1)})
+        return regressions
+
+    @staticmethod
+    def summary(results):
+        lines = [f"📏 BENCHMARK ({results['meta']['frames']} quadros/carga, seed {results['meta']['seed']})"]
+        for workload, data in results['workloads'].items():
+            lines.append(f"   {workload:<14} {data['fps']:>10} quadros/s | p50 {data['p50_us']} µs | "
+                         f"p99 {data['p99_us']} µs | scapy {data['dissect_fps']} quadros/s")
+        lines.append(f"   INSERT packets: {results['db_insert']['rows_per_second']} linhas/s")
+        lines.append(f"   Diagnóstico: p50 {results['diagnosis']['p50_ms']} ms | p99 {results['diagnosis']['p99_ms']} ms")
+        if 'channel_lookup' in results:  # Ausente em baselines antigos
+            lines.append(f"   Frequência -> canal: {results['channel_lookup']['lookups_per_second']} consultas/s")
+        for size, data in results['db_sizes'].items():
+            lines.append(f"   DB {size:>6} linhas: export {data['export_json_ms']} ms | "
+                         f"GROUP BY {data['group_query_ms']} ms | stats {data['table_stats_ms']} ms")
+        return "\n".join(lines)
+
+
+class WirelessMonitorApp:
+    def __init__(self, root, engine=None):
+        self.root = root
+        self.root.title("Monitor de Rede Sem Fio com Diagnóstico - Linux")
+        self.root.geometry("1100x800")
+        
+        # A GUI é cliente do engine: compartilha as mesmas estruturas em memória
+        self.engine = engine or MonitorEngine()
+        self.packets = []
+        self.qos_thread = None
+        self.capture_queue = self.engine.capture_queue
+        self.wireless_devices = self.engine.wireless_devices
+        self.network_stats = self.engine.network_stats
+        self.sampler = self.engine.sampler
+        self.interface_map = {}
+        
+        # ====== SISTEMA DE DIAGNÓSTICO ======
+        self.problem_solver = self.engine.problem_solver
+        self.history_evaluator = self.engine.history_evaluator
+        self.diagnosis_monitor = self.engine.diagnosis_monitor
+        self.last_diagnosis = []
+        
+        # ====== SIMULADOR DE PROBLEMAS ======
+        self.simulator = self.engine.simulator
+        self.original_metrics = None
+        
+        # ====== GERENCIADOR DE BANCO DE DADOS ======
+        self.db_manager = self.engine.db_manager
+        self.qos_history = self.engine.qos_history
+        self.inventory = self.engine.inventory
+        # ===========================================
+        
+        # ====== MÉTRICAS QoS E WIFI CONECTADA ======
+        self.qos_metrics = self.engine.qos_metrics
+        self.latency_stats = self.engine.latency_stats
+        self.qos_prober = self.engine.qos_prober
+        self.current_wifi_info = self.engine.current_wifi_info
+        # ================================================
+        
+        self.create_widgets()
+        self.setup_styles()
+        self._devices_dirty = False
+        self.engine.add_listener(self._on_engine_event)
+        
+        # A janela aparece antes das sondas (iwconfig, enlace, scapy): elas
+        # rodam em segundo plano a partir do primeiro ciclo ocioso do Tk
+        self.startup_timings = {}
+        self.root.after_idle(self._on_first_paint)
+
+    def _startup_elapsed_ms(self):
+        return round((time.perf_counter() - STARTUP_T0) * 1000, 1)
 
-    def save_ap_to_db(self, ssid, bssid, channel, last_seen, signal_strength=-65):
-        """Insere/atualiza AP no DB."""
+    def _on_first_paint(self):
+        self.startup_timings['first_paint_ms'] = self._startup_elapsed_ms()
+        threading.Thread(target=self._startup_probes, daemon=True).start()
+
+    def _startup_probes(self):
+        """Interfaces, serviços do engine e scapy, fora da thread do Tk"""
+        self.root.after(0, self._apply_interfaces, *self._probe_interfaces())
+        self.startup_timings['interfaces_ms'] = self._startup_elapsed_ms()
+        
+        # Inicia enlace, diagnóstico contínuo e inventário
+        self.engine.start()
+        self.startup_timings['services_ms'] = self._startup_elapsed_ms()
+        
+        # Pré-carrega o scapy para o botão Iniciar não esperar pela importação
         try:
-            conn = sqlite3.connect(self.db_manager.db_name)
-            cur = conn.cursor()
-            cur.execute("""
-                INSERT OR REPLACE INTO access_points (ssid, bssid, channel, signal_strength, last_seen)
-                VALUES (?, ?, ?, ?, ?)
-            """, (ssid, bssid, channel, signal_strength, last_seen))
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"[DB-ERRO] Falha ao salvar AP: {e}")
+            _load_scapy()
+        except ImportError as e:
+            print(f"[STARTUP-ERRO] scapy indisponível: {e}")
+        self.startup_timings['scapy_ms'] = self._startup_elapsed_ms()
+        
+        summary = ("⏱️ Inicialização: janela em {first_paint_ms} ms | interfaces {interfaces_ms} ms | "
+                   "serviços {services_ms} ms | scapy {scapy_ms} ms").format(**self.startup_timings)
+        print(f"[STARTUP] {summary}")
+        self.capture_queue.put(f"\n{summary}\n")
+
+    def _on_engine_event(self, event, data):
+        """Eventos do engine (threads de fundo) repassados à thread do Tk"""
+        if event == 'wifi':
+            self.root.after(0, self.refresh_wifi_status)
+        elif event == 'qos':
+            self.root.after(0, self.update_qos_status)
+        elif event == 'devices':
+            # Chega a cada quadro: só marca; o tick de 100 ms do update_ui redesenha
+            self._devices_dirty = True
 
-    def save_client_to_db(self, mac, probed_ssid, last_seen):
-        """Insere/atualiza cliente no DB."""
+    def refresh_wifi_status(self):
+        """Atualiza o rótulo de status da WiFi conectada"""
+        if not hasattr(self, 'wifi_status'):
+            return
+        
+        ssid = self.current_wifi_info.get('ssid')
+        if ssid in ('Não conectado', 'Desconhecido'):
+            self.wifi_status.config(text="WiFi: Não conectado", foreground="red")
+            return
+        
+        channel = self.current_wifi_info.get('channel', 0)
+        signal_dbm = self.current_wifi_info.get('signal_strength', "N/A")
+        wifi_text = f"WiFi: {ssid} | Canal: {channel} | Sinal: {signal_dbm}"
+        self.wifi_status.config(text=wifi_text)
+        
+        # Altera cor baseada na força do sinal
         try:
-            conn = sqlite3.connect(self.db_manager.db_name)
-            cur = conn.cursor()
-            cur.execute("""
-                INSERT OR REPLACE INTO clients (mac, probed_ssid, last_seen)
-                VALUES (?, ?, ?)
-            """, (mac, probed_ssid, last_seen))
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"[DB-ERRO] Falha ao salvar client: {e}")
+            dbm_value = int(signal_dbm.split()[0])
+            if dbm_value >= -50:
+                self.wifi_status.config(foreground="green")
+            elif dbm_value >= -65:
+                self.wifi_status.config(foreground="orange")
+            else:
+                self.wifi_status.config(foreground="red")
+        except:
+            pass
+        
+        # Adiciona alerta visual se canal não for padrão
+        if self.problem_solver._detect_non_standard_channel(channel, self.current_wifi_info.get('band')):
+            self.wifi_status.config(font=('Arial', 9, 'bold'))
+        else:
+            self.wifi_status.config(font=('Arial', 9))
 
+    # ----------------- Banco de dados -----------------
     def show_database_manager(self):
         """Interface para gerenciar o banco de dados"""
         db_window = tk.Toplevel(self.root)
@@ -1192,6 +5410,31 @@ class WirelessMonitorApp:
         ttk.Button(export_frame, text="Exportar para JSON", 
                   command=export_data, style='Green.TButton').grid(row=0, column=2, padx=5)
         
+        # Reprocessamento do histórico com as regras de diagnóstico
+        backfill_frame = ttk.LabelFrame(main_frame, text="📜 Diagnóstico do Histórico", padding=10)
+        backfill_frame.pack(fill=tk.X, pady=5)
+        
+        def run_backfill(source):
+            try:
+                started = time.time()
+                self.qos_history.flush()  # Rollups ainda em memória
+                rows, episodes = self.history_evaluator.backfill(source)
+                elapsed = time.time() - started
+            except Exception as e:
+                messagebox.showerror("Erro no Reprocessamento", str(e))
+                return
+            summary = (f"{rows} amostras avaliadas em {elapsed:.2f}s\n"
+                       f"{len(episodes)} episódios gravados em network_diagnostics\n\n")
+            for ep in episodes[-10:]:
+                name = self.problem_solver.problem_knowledge_base[ep['problem_type']]['name']
+                summary += f"• {name}: {ep['started_at']} → {ep['ended_at']}\n"
+            messagebox.showinfo("Reprocessamento Concluído", summary)
+        
+        ttk.Button(backfill_frame, text="Reprocessar medições QoS",
+                  command=lambda: run_backfill('qos_metrics'), style='Orange.TButton').pack(side=tk.LEFT, padx=5)
+        ttk.Button(backfill_frame, text="Reprocessar rollups (30 dias)",
+                  command=lambda: run_backfill('rollup'), style='Orange.TButton').pack(side=tk.LEFT, padx=5)
+        
         # Consulta personalizada
         query_frame = ttk.LabelFrame(main_frame, text="🔍 Consulta SQL Personalizada", padding=10)
         query_frame.pack(fill=tk.BOTH, expand=True, pady=5)
@@ -1212,156 +5455,33 @@ class WirelessMonitorApp:
                 if columns:  # É uma consulta SELECT
                     result_text.insert(tk.END, " | ".join(columns) + "\n")
                     result_text.insert(tk.END, "-" * 80 + "\n")
-                    for row in results[:100]:  # Limita a 100 linhas
-                        result_text.insert(tk.END, " | ".join(map(str, row)) + "\n")
-                    if len(results) > 100:
-                        result_text.insert(tk.END, f"\n... e mais {len(results) - 100} linhas")
-                else:
-                    result_text.insert(tk.END, str(results))
-            else:
-                result_text.insert(tk.END, f"ERRO: {results}")
-        
-        ttk.Button(query_frame, text="Executar Consulta", 
-                  command=execute_query, style='Blue.TButton').pack(pady=5)
-
-    # ----------------- Funções QoS -----------------
-    def measure_qos(self):
-        """Mede latência, jitter e perda de pacotes - SÓ FUNCIONA COM REDE NORMAL"""
-        try:
-            target = '8.8.8.8'  # Google DNS
-            
-            self.capture_queue.put(f"[QoS] Medindo latência para {target}...\n")
-            
-            ping_result = subprocess.run(
-                ['ping', '-c', '4', target],
-                capture_output=True, 
-                text=True,
-                timeout=10
-            )
-            
-            if ping_result.returncode == 0:
-                times = []
-                for line in ping_result.stdout.split('\n'):
-                    if 'time=' in line:
-                        try:
-                            time_str = line.split('time=')[1].split(' ')[0]
-                            times.append(float(time_str))
-                        except (IndexError, ValueError):
-                            continue
-                
-                if times:
-                    latency = sum(times) / len(times)
-                    jitter = max(times) - min(times) if len(times) > 1 else 0
-                    packet_loss = ((4 - len(times)) / 4) * 100
-                    
-                    self.qos_metrics.update({
-                        'latency': round(latency, 2),
-                        'jitter': round(jitter, 2),
-                        'packet_loss': round(packet_loss, 2),
-                        'last_update': datetime.datetime.now().strftime("%H:%M:%S"),
-                        'status': "Medido"
-                    })
-                    
-                    # Salva no banco
-                    self.save_qos_metrics(latency, jitter, packet_loss)
-                    
-                    # Adiciona aos logs
-                    qos_info = (
-                        f"[QoS] Latência: {self.qos_metrics['latency']}ms | "
-                        f"Jitter: {self.qos_metrics['jitter']}ms | "
-                        f"Perda: {self.qos_metrics['packet_loss']}% | "
-                        f"Atualizado: {self.qos_metrics['last_update']}\n"
-                    )
-                    self.capture_queue.put(qos_info)
-                    
-                    # Atualiza status
-                    self.update_qos_status()
-                    
-                    self.qos_measurement_count += 1
-                    return True
-                else:
-                    self.capture_queue.put("[QoS] Nenhum pacote recebido no ping\n")
-                    self.qos_metrics['status'] = "Falha na medição"
-            else:
-                self.capture_queue.put(f"[QoS] Erro no comando ping: {ping_result.stderr}\n")
-                self.qos_metrics['status'] = "Falha na medição"
-                    
-        except subprocess.TimeoutExpired:
-            self.capture_queue.put("[QoS] Timeout na medição (10s)\n")
-            self.qos_metrics['status'] = "Timeout"
-        except Exception as e:
-            self.capture_queue.put(f"[QoS] Erro: {str(e)}\n")
-            self.qos_metrics['status'] = "Erro"
-            
-        return False
-
-    def update_qos_status(self):
-        """Atualiza o status das métricas QoS na interface."""
-        if self.qos_metrics['status'] == "Não medido":
-            status_text = "QoS: Não medido"
-        elif self.qos_metrics['status'] == "Medido":
-            status_text = (
-                f"QoS: {self.qos_metrics['latency']}ms | "
-                f"Jitter: {self.qos_metrics['jitter']}ms | "
-                f"Perda: {self.qos_metrics['packet_loss']}%"
-            )
-        else:
-            status_text = f"QoS: {self.qos_metrics['status']}"
-        
-        self.qos_status.config(text=status_text)
-
-    def measure_qos_before_capture(self):
-        """Mede QoS antes de iniciar o monitoramento (rede normal)"""
-        self.capture_queue.put("\n📊 MEDINDO QoS ANTES DO MONITORAMENTO...\n")
-        if self.measure_qos():
-            self.last_qos_before_capture = self.qos_metrics.copy()
-            self.save_qos_metrics(
-                self.qos_metrics['latency'],
-                self.qos_metrics['jitter'], 
-                self.qos_metrics['packet_loss'],
-                "before_capture"
-            )
-            return True
-        return False
-
-    def measure_qos_after_capture(self):
-        """Mede QoS após parar o monitoramento (rede restaurada)"""
-        self.capture_queue.put("\n📊 MEDINDO QoS APÓS O MONITORAMENTO...\n")
-        if self.measure_qos():
-            after_metrics = self.qos_metrics.copy()
-            self.save_qos_metrics(
-                after_metrics['latency'],
-                after_metrics['jitter'],
-                after_metrics['packet_loss'],
-                "after_capture"
-            )
-            
-            # Compara com medição anterior se disponível
-            if self.last_qos_before_capture:
-                self._compare_qos_measurements()
-            
-            return True
-        return False
-
-    def _compare_qos_measurements(self):
-        """Compara medições QoS antes e depois do monitoramento"""
-        before = self.last_qos_before_capture
-        after = self.qos_metrics
-        
-        latency_diff = before['latency'] - after['latency']
-        latency_change = "melhorou" if latency_diff > 0 else "piorou"
-        
-        packet_loss_diff = before['packet_loss'] - after['packet_loss']
-        packet_loss_change = "melhorou" if packet_loss_diff > 0 else "piorou"
+                    for row in results[:100]:  # Limita a 100 linhas
+                        result_text.insert(tk.END, " | ".join(map(str, row)) + "\n")
+                    if len(results) > 100:
+                        result_text.insert(tk.END, f"\n... e mais {len(results) - 100} linhas")
+                else:
+                    result_text.insert(tk.END, str(results))
+            else:
+                result_text.insert(tk.END, f"ERRO: {results}")
         
-        comparison = (
-            f"\n📈 COMPARAÇÃO QoS (Antes vs Depois):\n"
-            f"   Latência: {before['latency']}ms → {after['latency']}ms ({latency_change})\n"
-            f"   Perda: {before['packet_loss']}% → {after['packet_loss']}% ({packet_loss_change})\n"
-            f"   Jitter: {before['jitter']}ms → {after['jitter']}ms\n"
-        )
+        ttk.Button(query_frame, text="Executar Consulta", 
+                  command=execute_query, style='Blue.TButton').pack(pady=5)
+
+    # ----------------- Funções QoS -----------------
+    def update_qos_status(self):
+        """Atualiza o status das métricas QoS na interface."""
+        if self.qos_metrics['status'] == "Não medido":
+            status_text = "QoS: Não medido"
+        elif self.qos_metrics['status'] == "Medido":
+            status_text = (
+                f"QoS: {self.qos_metrics['latency']}ms | "
+                f"Jitter: {self.qos_metrics['jitter']}ms | "
+                f"Perda: {self.qos_metrics['packet_loss']}%"
+            )
+        else:
+            status_text = f"QoS: {self.qos_metrics['status']}"
         
-        self.capture_queue.put(comparison)
+        self.qos_status.config(text=status_text)
 
     # ----------------- Sistema de Diagnóstico -----------------
     def run_network_diagnosis(self):
@@ -1383,12 +5503,14 @@ class WirelessMonitorApp:
         current_qos = self.qos_metrics.copy()
         
         # Executa diagnóstico incluindo informações da WiFi conectada
+        # (o monitor contínuo é quem grava as transições no banco)
         problems = self.problem_solver.analyze_network_health(
             current_qos, 
             self.wireless_devices,
             self.capture_queue,
             self.network_stats,
-            self.current_wifi_info
+            self.current_wifi_info,
+            persist=False
         )
         
         self.last_diagnosis = problems
@@ -1396,6 +5518,14 @@ class WirelessMonitorApp:
         # Mostra relatório
         report = self.problem_solver.generate_detailed_report(problems, self.current_wifi_info)
         
+        # Ciclo de vida recente dos problemas registrados pelo monitor contínuo
+        lifecycles = self.diagnosis_monitor.get_lifecycles(limit=10)
+        if lifecycles:
+            report += "\n🕒 HISTÓRICO DE PROBLEMAS (monitor contínuo):\n"
+            for episode in lifecycles:
+                end = episode['ended_at'] or "em andamento"
+                report += f"   • {episode['problem_name']}: {episode['started_at']} → {end}\n"
+        
         # Cria janela de resultados
         self.show_diagnosis_results(report, problems)
 
@@ -1421,7 +5551,8 @@ class WirelessMonitorApp:
         
         # Verifica qualidade do canal
         if self.current_wifi_info['channel']:
-            quality, reason = self.problem_solver.check_channel_quality(self.current_wifi_info['channel'])
+            quality, reason = self.problem_solver.check_channel_quality(self.current_wifi_info['channel'],
+                                                                        self.current_wifi_info.get('band'))
             wifi_info += f"📊 Qualidade do canal {self.current_wifi_info['channel']}: {quality}\n"
             wifi_info += f"   💡 {reason}\n\n"
         
@@ -1489,22 +5620,29 @@ class WirelessMonitorApp:
 
     def show_recommended_channel(self):
         """Mostra o canal recomendado baseado na análise"""
-        best_channel, congestion = self.problem_solver.get_recommended_channel(
-            self.wireless_devices, 
-            self.current_wifi_info.get('channel')
-        )
-        
         current_channel = self.current_wifi_info.get('channel', 0)
+        current_band = self.current_wifi_info.get('band')
+        ranked = self.problem_solver.get_recommended_channel(self.wireless_devices, current_channel, current_band)
+        if not ranked:
+            messagebox.showinfo("Canal Recomendado", "Nenhum canal disponível para análise.")
+            return
+        best_channel = ranked[0]['channel']
         
         channel_info = (
             f"📊 ANÁLISE DE CANAIS\n\n"
             f"🎯 Canal Atual: {current_channel}\n"
             f"⭐ Canal Recomendado: {best_channel}\n"
-            f"📶 Redes no canal recomendado: {congestion}\n"
+            f"📶 Redes no canal recomendado: {ranked[0]['networks']}\n"
             f"💡 Canais não-sobrepostos (2.4GHz): 1, 6, 11\n\n"
+            f"🏆 RANKING (interferência em dB, menor é melhor):\n"
         )
+        for position, item in enumerate(ranked[:5], 1):
+            dfs = " [DFS]" if item['dfs'] else ""
+            channel_info += (f"   {position}. Canal {item['channel']} ({item['band']}GHz){dfs}: "
+                             f"{item['score']:.1f} dB - {item['networks']} redes\n")
+        channel_info += "\n"
         
-        if current_channel not in [1, 6, 11] and 1 <= current_channel <= 13:
+        if self.problem_solver._detect_non_standard_channel(current_channel, current_band):
             channel_info += (
                 f"⚠️  SEU CANAL ATUAL ({current_channel}) NÃO É RECOMENDADO!\n"
                 f"   • Canais 2,3,4,5 interferem com canal 1\n"
@@ -1533,7 +5671,7 @@ class WirelessMonitorApp:
             messagebox.showinfo("Informações do Canal", "Canal não detectado.")
             return
         
-        quality, reason = self.problem_solver.check_channel_quality(channel)
+        quality, reason = self.problem_solver.check_channel_quality(channel, self.current_wifi_info.get('band'))
         
         details = (
             f"📡 DETALHES DO CANAL {channel}\n\n"
@@ -1543,9 +5681,12 @@ class WirelessMonitorApp:
         )
         
         # Adiciona informações específicas baseadas no canal
-        if 1 <= channel <= 13:
+        info = channel_info(channel, self.current_wifi_info.get('band'))
+        if info is None:
+            details += f"\n🌐 Banda: desconhecida\n"
+        elif info.band == '2.4':
             details += f"\n🌐 Banda: 2.4GHz\n"
-            if channel in [1, 6, 11]:
+            if channel in ChannelPlanner.NON_OVERLAPPING_24:
                 details += f"✅ Este é um canal não-sobreposto (ideal)\n"
             else:
                 details += f"⚠️  Este é um canal sobreposto (não ideal)\n"
@@ -1558,10 +5699,16 @@ class WirelessMonitorApp:
             elif channel == 12 or channel == 13:
                 details += f"📡 Interfere com: Canal 11\n"
                 
-        elif channel >= 36:
+        elif info.band == '5':
             details += f"\n🌐 Banda: 5GHz\n"
             details += f"✅ Menos interferência que 2.4GHz\n"
             details += f"💡 Melhor para streaming e jogos\n"
+            if info.dfs:
+                details += f"⚠️  Canal DFS: pode mudar ao detectar radar\n"
+        else:
+            details += f"\n🌐 Banda: 6GHz\n"
+            details += f"✅ Espectro limpo, só dispositivos Wi-Fi 6E/7\n"
+            details += f"💡 Alcance menor que 5GHz\n"
         
         # Recomendação de sinal
         try:
@@ -1662,11 +5809,14 @@ class WirelessMonitorApp:
             problem_type, 
             self.qos_metrics, 
             self.wireless_devices,
-            self.network_stats
+            self.network_stats,
+            self.problem_solver.deauth_detector,
+            self.problem_solver.airtime
         )
         
         self.simulator.simulation_active = True
         self.simulator.simulation_type = problem_type
+        self.engine.recount_devices()
         
         self.capture_queue.put(f"\n{result}\n")
         self.sim_status.config(text=f"Status: Simulando {problem_type}", foreground="red")
@@ -1690,98 +5840,22 @@ class WirelessMonitorApp:
             self.update_qos_status()
             
             # Limpa redes falsas da simulação
-            fake_bssids = [bssid for bssid, info in self.wireless_devices.items() 
+            fake_bssids = [bssid for bssid, info in list(self.wireless_devices.items())
                           if info.get('ssid', '').startswith('Fake_Network_')]
             for bssid in fake_bssids:
-                del self.wireless_devices[bssid]
+                self.wireless_devices.pop(bssid, None)
+            self.engine.recount_devices()
                 
             # Reseta estatísticas de deauth se era uma simulação
             if self.simulator.simulation_type == 'deauth_attack':
                 self.network_stats['deauth_count'] = 0
+                self.problem_solver.deauth_detector.reset()
+            if self.simulator.simulation_type == 'channel_congestion':
+                self.problem_solver.airtime.reset()
         else:
             messagebox.showerror("Erro", "Não foi possível restaurar métricas originais!")
 
     # ----------------- Funções de Rede -----------------
-    def set_monitor_mode(self, interface):
-        """Ativa o modo monitor no Linux usando airmon-ng"""
-        try:
-            # Verifica se a interface existe
-            try:
-                subprocess.run(["iwconfig", interface], check=True, capture_output=True)
-            except:
-                messagebox.showerror("Erro", f"Interface {interface} não encontrada!")
-                return None
-
-            # Para processos interferentes
-            subprocess.run(["sudo", "airmon-ng", "check", "kill"], capture_output=True)
-
-            # Ativa modo monitor
-            result = subprocess.run(
-                ["sudo", "airmon-ng", "start", interface],
-                capture_output=True, text=True
-            )
-            
-            if result.returncode != 0:
-                messagebox.showerror("Erro", f"Falha ao ativar modo monitor: {result.stderr}")
-                return None
-
-            # Procura pela interface em modo monitor
-            iwconfig_result = subprocess.run(["iwconfig"], capture_output=True, text=True)
-            
-            for line in iwconfig_result.stdout.split('\n'):
-                if "IEEE 802.11" in line and "Mode:Monitor" in line:
-                    iface_name = line.split()[0]
-                    return iface_name
-            
-            # Tenta nomes comuns
-            for name in [f"{interface}mon", "mon0", "wlan0mon"]:
-                try:
-                    subprocess.run(["iwconfig", name], check=True, capture_output=True)
-                    return name
-                except:
-                    continue
-            
-            messagebox.showerror("Erro", "Não foi possível encontrar interface em modo monitor")
-            return None
-            
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro inesperado: {str(e)}")
-            return None
-    
-    def stop_monitor_mode(self, interface):
-        """Desativa o modo monitor e restaura o NetworkManager"""
-        try:
-            # Primeiro para o modo monitor
-            if interface:
-                subprocess.run(["sudo", "airmon-ng", "stop", interface], check=True)
-            
-            # Restaura o NetworkManager
-            self.capture_queue.put("[SISTEMA] Restaurando NetworkManager...\n")
-            result = subprocess.run(
-                ["sudo", "systemctl", "start", "NetworkManager"],
-                capture_output=True, 
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode == 0:
-                self.capture_queue.put("[SISTEMA] NetworkManager reiniciado com sucesso\n")
-                self.capture_queue.put("[SISTEMA] Conectividade normal restaurada\n")
-            else:
-                self.capture_queue.put(f"[AVISO] NetworkManager não pôde ser reiniciado: {result.stderr}\n")
-            
-            return True
-            
-        except subprocess.TimeoutExpired:
-            self.capture_queue.put("[AVISO] Timeout ao restaurar NetworkManager\n")
-            return False
-        except subprocess.CalledProcessError as e:
-            self.capture_queue.put(f"[AVISO] Erro ao restaurar NetworkManager: {e.stderr}\n")
-            return False
-        except Exception as e:
-            self.capture_queue.put(f"[AVISO] Erro inesperado ao restaurar NetworkManager: {str(e)}\n")
-            return False
-    
     def setup_styles(self):
         self.style = ttk.Style()
         self.style.configure('TFrame', background='#f0f0f0')
@@ -1859,7 +5933,7 @@ class WirelessMonitorApp:
         ttk.Button(
             monitor_btn_frame, 
             text="🧪 Medir QoS", 
-            command=self.measure_qos,
+            command=self.engine.measure_qos,
             style='Green.TButton'
         ).pack(side=tk.LEFT, padx=5)
         
@@ -1885,6 +5959,13 @@ class WirelessMonitorApp:
             style='Blue.TButton'
         ).pack(side=tk.LEFT, padx=5)
         
+        ttk.Button(
+            monitor_btn_frame, 
+            text="⏱ Profiler", 
+            command=self.show_profiler_panel,
+            style='Blue.TButton'
+        ).pack(side=tk.LEFT, padx=5)
+        
         ttk.Button(
             monitor_btn_frame, 
             text="🗑 Limpar", 
@@ -1931,165 +6012,103 @@ class WirelessMonitorApp:
         self.log_area.insert(tk.END, "📶  Monitoramento da WiFi conectada ativo\n")
         self.log_area.insert(tk.END, "⚠️  Alerta: Canais não-padrão (2,3,4,5,7,8,9,10,12,13) serão detectados\n")
     
-    def update_interfaces(self):
-        """Lista interfaces Wi-Fi no Linux"""
-        self.interface_map.clear()
-        display_names = []
+    def show_profiler_panel(self):
+        """Painel do profiler: liga/desliga, amostragem N/M e relatório ao vivo"""
+        profiler = self.engine.profiler
+        panel = tk.Toplevel(self.root)
+        panel.title("Profiler do Handler de Pacotes")
+        panel.geometry("760x420")
+        
+        controls = ttk.Frame(panel)
+        controls.pack(fill=tk.X, padx=10, pady=5)
+        
+        enabled_var = tk.BooleanVar(value=profiler.enabled)
+        ttk.Checkbutton(controls, text="Ativo", variable=enabled_var,
+                        command=lambda: profiler.set_enabled(enabled_var.get())).pack(side=tk.LEFT)
+        
+        ttk.Label(controls, text="Cronometrar 1 a cada").pack(side=tk.LEFT, padx=(15, 5))
+        sample_var = tk.StringVar(value=str(profiler.sample_m))
+        
+        def apply_sampling(*_):
+            try:
+                profiler.sample_m = max(1, int(sample_var.get()))
+            except ValueError:
+                pass
+        ttk.Spinbox(controls, from_=1, to=10000, textvariable=sample_var, width=6,
+                    command=apply_sampling).pack(side=tk.LEFT)
+        ttk.Label(controls, text="quadros").pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(controls, text="Zerar", command=profiler.reset).pack(side=tk.LEFT, padx=15)
         
+        def dump_report():
+            filename = f"profiler_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(profiler.report())
+            self.capture_queue.put(f"\n⏱️ Relatório do profiler salvo em {filename}\n")
+        ttk.Button(controls, text="Salvar relatório", command=dump_report).pack(side=tk.LEFT)
+        
+        report_area = scrolledtext.ScrolledText(panel, wrap=tk.NONE, font=('Consolas', 9))
+        report_area.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        def refresh():
+            if not panel.winfo_exists():
+                return
+            apply_sampling()
+            report_area.delete(1.0, tk.END)
+            report_area.insert(tk.END, profiler.report())
+            panel.after(1000, refresh)
+        refresh()
+
+    def update_interfaces(self):
+        """Lista interfaces Wi-Fi no Linux (iwconfig fora da thread do Tk)"""
+        threading.Thread(target=lambda: self.root.after(0, self._apply_interfaces, *self._probe_interfaces()),
+                         daemon=True).start()
+    
+    def _probe_interfaces(self):
+        """Retorna ({nome exibido: interface}, erro); pode rodar em qualquer thread"""
+        interfaces = {}
         try:
-            result = subprocess.run(["iwconfig"], capture_output=True, text=True, check=True)
+            result = system_commands.run(["iwconfig"], ttl=2)
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip() or f"iwconfig retornou {result.returncode}")
             
             for line in result.stdout.split('\n'):
                 if "IEEE 802.11" in line:
                     iface_name = line.split()[0]
-                    display_name = f"{iface_name} (Wi-Fi)"
-                    self.interface_map[display_name] = iface_name
-                    display_names.append(display_name)
-            
-            display_names.sort()
-            self.interface_combo['values'] = display_names
-            
-            if display_names:
-                self.interface_combo.set(display_names[0])
-                self.log_area.insert(tk.END, "\nInterfaces disponíveis atualizadas.\n")
-            else:
-                self.log_area.insert(tk.END, "\nNenhuma interface wireless encontrada!\n")
-                
+                    interfaces[f"{iface_name} (Wi-Fi)"] = iface_name
+            return interfaces, None
         except Exception as e:
-            error_msg = f"\n[ERRO] Falha ao listar interfaces: {str(e)}\n"
-            self.log_area.insert(tk.END, error_msg)
+            return interfaces, str(e)
+    
+    def _apply_interfaces(self, interfaces, error):
+        if error:
+            self.log_area.insert(tk.END, f"\n[ERRO] Falha ao listar interfaces: {error}\n")
+            return
+        
+        self.interface_map.clear()
+        self.interface_map.update(interfaces)
+        display_names = sorted(interfaces)
+        self.interface_combo['values'] = display_names
+        
+        if display_names:
+            self.interface_combo.set(display_names[0])
+            self.log_area.insert(tk.END, "\nInterfaces disponíveis atualizadas.\n")
+        else:
+            self.log_area.insert(tk.END, "\nNenhuma interface wireless encontrada!\n")
     
     def get_selected_interface(self):
         display_name = self.interface_var.get()
         return self.interface_map.get(display_name)
     
-    def packet_handler(self, packet):
-        try:
-            if packet.haslayer(Dot11):
-                timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-                
-                mac_src = packet.addr2 if packet.addr2 else "Desconhecido"
-                mac_dst = packet.addr1 if packet.addr1 else "Desconhecido"
-                bssid = packet.addr3 if packet.addr3 else "Desconhecido"
-                
-                packet_type = "Desconhecido"
-                packet_info = f"\n[{timestamp}] "
-                
-                # Contagem de tipos de pacotes
-                if packet.haslayer(Dot11Beacon):
-                    packet_type = "Beacon"
-                    self.network_stats['beacon_count'] += 1
-                    ssid = packet[Dot11Beacon].info.decode('utf-8', errors='ignore') if packet[Dot11Beacon].info else "Hidden"
-                    try:
-                        # Extrai canal do elemento DS Parameter
-                        channel = None
-                        if packet.haslayer(Dot11Elt):
-                            for i in range(0, len(packet[Dot11Elt])):
-                                if packet[Dot11Elt][i].ID == 3:  # DS Parameter
-                                    channel = int(packet[Dot11Elt][i].info.hex(), 16)
-                                    break
-                    except Exception:
-                        channel = None
-                    
-                    self.wireless_devices[bssid]['type'] = "AP"
-                    self.wireless_devices[bssid]['ssid'] = ssid
-                    self.wireless_devices[bssid]['channel'] = channel
-                    self.wireless_devices[bssid]['last_seen'] = time.time()
-                    
-                    packet_info += f"📡 Beacon | SSID: {ssid} | BSSID: {bssid} | Canal: {channel} | "
-                    self.save_ap_to_db(ssid, bssid, channel, timestamp)
-                
-                elif packet.haslayer(Dot11ProbeReq):
-                    packet_type = "ProbeReq"
-                    self.network_stats['probereq_count'] += 1
-                    ssid = packet[Dot11ProbeReq].info.decode('utf-8', errors='ignore') if packet[Dot11ProbeReq].info else "Any"
-                    self.wireless_devices[mac_src]['type'] = "Client"
-                    self.wireless_devices[mac_src]['probed_ssid'] = ssid
-                    self.wireless_devices[mac_src]['last_seen'] = time.time()
-                    
-                    packet_info += f"🔍 ProbeReq | Client: {mac_src} | Procurando: {ssid} | "
-                    self.save_client_to_db(mac_src, ssid, timestamp)
-                
-                elif packet.haslayer(Dot11ProbeResp):
-                    packet_type = "ProbeResp"
-                    self.network_stats['proberesp_count'] += 1
-                    ssid = packet[Dot11ProbeResp].info.decode('utf-8', errors='ignore') if packet[Dot11ProbeResp].info else "Hidden"
-                    self.wireless_devices[bssid]['type'] = "AP"
-                    self.wireless_devices[bssid]['ssid'] = ssid
-                    self.wireless_devices[bssid]['last_seen'] = time.time()
-                    
-                    packet_info += f"📨 ProbeResp | AP: {bssid} | SSID: {ssid} | "
-                    self.save_ap_to_db(ssid, bssid, None, timestamp)
-                
-                elif packet.haslayer(Dot11Deauth):
-                    packet_type = "Deauth"
-                    self.network_stats['deauth_count'] += 1
-                    reason = packet.reason if hasattr(packet, 'reason') else "N/A"
-                    packet_info += f"🚨 DEAUTH | De: {mac_src} | Para: {mac_dst} | Razão: {reason} | "
-                
-                elif packet.haslayer(Dot11Auth):
-                    packet_type = "Auth"
-                    self.network_stats['auth_count'] += 1
-                    packet_info += f"🔐 Auth | De: {mac_src} | Para: {mac_dst} | "
-                
-                elif packet.haslayer(Dot11AssoReq):
-                    packet_type = "AssoReq"
-                    self.network_stats['assocreq_count'] += 1
-                    packet_info += f"🤝 AssoReq | Client: {mac_src} | AP: {bssid} | "
-                
-                elif packet.haslayer(Dot11AssoResp):
-                    packet_type = "AssoResp"
-                    self.network_stats['assocresp_count'] += 1
-                    packet_info += f"✅ AssoResp | AP: {bssid} | Client: {mac_src} | "
-                
-                else:
-                    # Pacotes de dados
-                    if packet.type == 2:  # Data frames
-                        self.network_stats['data_count'] += 1
-                        packet_type = "Data"
-                        packet_info += f"📦 Data | De: {mac_src} | Para: {mac_dst} | "
-                
-                packet_info += f"Tipo: {packet_type} | Tamanho: {len(packet)} bytes"
-                
-                try:
-                    self.save_packet_to_db(timestamp, mac_src, mac_dst, bssid, packet_type, len(packet), packet_info)
-                except Exception as e:
-                    print(f"[DB-ERRO] ao salvar pacote: {e}")
-                
-                self.capture_queue.put(packet_info)
-                self.update_device_counts()
-                
-                # Atualiza estatísticas a cada 50 pacotes
-                if sum(self.network_stats.values()) % 50 == 0:
-                    self.show_network_stats()
-                    
-        except Exception as e:
-            error_msg = f"\n[ERRO] Falha ao processar pacote: {str(e)}"
-            self.capture_queue.put(error_msg)
-
-    def show_network_stats(self):
-        """Mostra estatísticas da rede"""
-        stats_text = (
-            f"\n📊 ESTATÍSTICAS DA REDE:\n"
-            f"   📡 Beacons: {self.network_stats['beacon_count']}\n"
-            f"   🔍 ProbeReqs: {self.network_stats['probereq_count']}\n"
-            f"   📨 ProbeResps: {self.network_stats['proberesp_count']}\n"
-            f"   🚨 Deauths: {self.network_stats['deauth_count']}\n"
-            f"   🔐 Auths: {self.network_stats['auth_count']}\n"
-            f"   🤝 AssocReqs: {self.network_stats['assocreq_count']}\n"
-            f"   ✅ AssocResps: {self.network_stats['assocresp_count']}\n"
-            f"   📦 Data: {self.network_stats['data_count']}\n"
-        )
-        self.capture_queue.put(stats_text)
-
     def update_device_counts(self):
-        aps = sum(1 for dev in self.wireless_devices.values() if dev.get('type') == "AP")
-        clients = sum(1 for dev in self.wireless_devices.values() if dev.get('type') == "Client")
-        
-        self.root.after(0, self.network_count.config, {'text': f"Redes detectadas: {aps}"})
-        self.root.after(0, self.device_count.config, {'text': f"Dispositivos: {clients}"})
+        self._devices_dirty = False
+        counts = self.engine.device_counts
+        self.network_count.config(text=f"Redes detectadas: {counts['AP']}")
+        self.device_count.config(text=f"Dispositivos: {counts['Client']}")
     
     def update_ui(self):
+        if self._devices_dirty:
+            self.update_device_counts()
         while not self.capture_queue.empty():
             packet_info = self.capture_queue.get()
             self.packets.append(packet_info)
@@ -2099,21 +6118,21 @@ class WirelessMonitorApp:
         self.root.after(100, self.update_ui)
     
     def start_capture(self):
-        if not self.is_capturing:
-            self.interface = self.get_selected_interface()
-            if not self.interface:
+        if not self.engine.is_capturing:
+            interface = self.get_selected_interface()
+            if not interface:
                 messagebox.showwarning("Aviso", "Selecione uma interface válida!")
                 return
                 
             try:
-                self.capture_interval = int(self.interval_var.get())
-                self.capture_duration = int(self.duration_var.get())
+                capture_interval = int(self.interval_var.get())
+                capture_duration = int(self.duration_var.get())
                 
-                if self.capture_interval < 5 or self.capture_interval > 300:
+                if capture_interval < 5 or capture_interval > 300:
                     raise ValueError("Intervalo deve ser entre 5 e 300 segundos")
-                if self.capture_duration < 5 or self.capture_duration > 60:
+                if capture_duration < 5 or capture_duration > 60:
                     raise ValueError("Duração deve ser entre 5 e 60 segundos")
-                if self.capture_duration > self.capture_interval:
+                if capture_duration > capture_interval:
                     raise ValueError("Duração não pode ser maior que o intervalo")
                     
             except ValueError as e:
@@ -2132,87 +6151,58 @@ class WirelessMonitorApp:
             self.capture_queue.put(wifi_info)
             
             # Verifica canal não-padrão
-            if self.current_wifi_info['channel'] not in [1, 6, 11] and 1 <= self.current_wifi_info['channel'] <= 13:
+            if self.problem_solver._detect_non_standard_channel(self.current_wifi_info['channel'],
+                                                                self.current_wifi_info.get('band')):
                 self.capture_queue.put(f"⚠️  ALERTA: Canal {self.current_wifi_info['channel']} não é recomendado!\n")
                 self.capture_queue.put(f"   Use canal 1, 6 ou 11 para melhor performance\n")
             
             # Mede QoS ANTES de iniciar o monitoramento (rede normal)
             self.capture_queue.put("\n📊 MEDIÇÃO QoS ANTES DO MONITORAMENTO...\n")
-            self.measure_qos_before_capture()
-                
-            self.is_capturing = True
-            self.start_button.config(state=tk.DISABLED)
-            self.stop_button.config(state=tk.NORMAL)
-            self.capture_status.config(text="Monitoramento: Ativo", foreground="green")
+            self.engine.measure_qos_before_capture()
             
-            monitor_iface = self.set_monitor_mode(self.interface)
+            monitor_iface = self.engine.start_capture(interface, capture_interval, capture_duration)
             if not monitor_iface:
-                self.is_capturing = False
-                self.start_button.config(state=tk.NORMAL)
-                self.stop_button.config(state=tk.DISABLED)
-                self.capture_status.config(text="Monitoramento: Inativo", foreground="red")
+                messagebox.showerror("Erro", self.engine.last_error)
                 return
             
-            self.interface = monitor_iface
-            self.log_area.insert(tk.END, f"\nIniciando monitoramento na interface {self.interface}...\n")
+            self.start_button.config(state=tk.DISABLED)
+            self.stop_button.config(state=tk.NORMAL)
+            self.capture_status.config(text="Monitoramento: Ativo", foreground="green")
+            self.log_area.insert(tk.END, f"\nIniciando monitoramento na interface {monitor_iface}...\n")
             self.log_area.insert(tk.END, "⚠️  Rede temporariamente indisponível (modo monitor ativo)\n")
             
-            self.capture_thread = threading.Thread(
-                target=self.run_periodic_capture,
-                daemon=True
-            )
-            self.capture_thread.start()
-            
             self.update_ui()
     
-    def run_periodic_capture(self):
-        while self.is_capturing:
-            try:
-                start_time = time.time()
-                self.capture_queue.put(f"\n[CAPTURA] Iniciando captura por {self.capture_duration} segundos...\n")
-                
-                sniff(
-                    iface=self.interface,
-                    prn=self.packet_handler,
-                    store=0,
-                    timeout=self.capture_duration,
-                    monitor=True,
-                    filter="type mgt or type ctl"
-                )
-                
-                self.capture_queue.put(f"\n[CAPTURA] Captura concluída. Aguardando próximo ciclo...\n")
-                
-                elapsed = time.time() - start_time
-                sleep_time = max(0, self.capture_interval - elapsed)
-                
-                for _ in range(int(sleep_time)):
-                    if not self.is_capturing:
-                        break
-                    time.sleep(1)
-                    
-            except Exception as e:
-                error_msg = f"\n[ERRO GRAVE] Falha na captura: {str(e)}\n"
-                self.capture_queue.put(error_msg)
-                time.sleep(5)
+    def start_replay(self, scenario, rate, duration, **options):
+        """Teste de carga da interface: quadros sintéticos no lugar do rádio"""
+        if not self.engine.start_replay(scenario, rate, duration, on_done=self._on_replay_done, **options):
+            messagebox.showerror("Erro", self.engine.last_error or "Captura já está ativa")
+            return
+        self.start_button.config(state=tk.DISABLED)
+        self.stop_button.config(state=tk.NORMAL)
+        self.capture_status.config(text=f"Monitoramento: Simulação ({scenario})", foreground="orange")
+        self.update_ui()
+    
+    def _on_replay_done(self, stats):
+        # Chamado na thread da reprodução
+        self.root.after(0, lambda: (self.start_button.config(state=tk.NORMAL),
+                                    self.stop_button.config(state=tk.DISABLED),
+                                    self.capture_status.config(text="Monitoramento: Inativo", foreground="red")))
     
     def stop_capture(self):
-        if self.is_capturing:
-            self.is_capturing = False
+        if self.engine.is_capturing:
             self.start_button.config(state=tk.NORMAL)
             self.stop_button.config(state=tk.DISABLED)
             self.capture_status.config(text="Monitoramento: Inativo", foreground="red")
             
-            # Restaura NetworkManager primeiro
-            self.stop_monitor_mode(self.interface)
-            
-            if self.capture_thread and self.capture_thread.is_alive():
-                self.capture_thread.join(timeout=1)
+            # Para a captura e restaura o NetworkManager
+            self.engine.stop_capture()
             
             self.log_area.insert(tk.END, "\nMonitoramento encerrado.\n")
             
             # Mede QoS APÓS parar o monitoramento (rede restaurada)
             self.log_area.insert(tk.END, "🔄 Aguardando rede se restabelecer...\n")
-            self.root.after(3000, self.measure_qos_after_capture)  # Espera 3 segundos
+            self.root.after(3000, self.engine.measure_qos_after_capture)  # Espera 3 segundos
     
     def show_network_analysis(self):
         if not self.wireless_devices:
@@ -2234,7 +6224,8 @@ class WirelessMonitorApp:
         
         # Verifica canal
         if self.current_wifi_info['channel']:
-            quality, reason = self.problem_solver.check_channel_quality(self.current_wifi_info['channel'])
+            quality, reason = self.problem_solver.check_channel_quality(self.current_wifi_info['channel'],
+                                                                        self.current_wifi_info.get('band'))
             analysis += f"Qualidade do canal: {quality}\n"
             analysis += f"Detalhes: {reason}\n"
         
@@ -2244,14 +6235,51 @@ class WirelessMonitorApp:
         analysis += f"Perda de Pacotes: {self.qos_metrics['packet_loss']}%\n"
         analysis += f"Última Atualização: {self.qos_metrics['last_update']}\n"
         analysis += f"Status: {self.qos_metrics['status']}\n"
-        analysis += f"Total de Medições: {self.qos_measurement_count}\n\n"
+        analysis += f"Total de Medições: {self.engine.qos_measurement_count}\n\n"
+        
+        # Tendência das últimas 24h a partir do arquivo round-robin (1 ponto por hora)
+        analysis += "=== TENDÊNCIA 24H (média por hora) ===\n"
+        day_ago = time.time() - 86400
+        for metric, label, unit in [('latency', 'Latência', 'ms'), ('packet_loss', 'Perda', '%'),
+                                    ('signal_strength', 'Sinal', 'dBm')]:
+            points = self.qos_history.fetch(metric, day_ago, max_points=24)
+            if points:
+                values = " ".join(f"{avg:.0f}" for _, avg, _, _, _ in points)
+                analysis += f"{label} ({unit}): {values}\n"
+            else:
+                analysis += f"{label} ({unit}): sem dados\n"
+        analysis += "\n"
+        
+        # Custo das ferramentas externas (iwconfig, ping, airmon-ng...)
+        command_stats = system_commands.get_stats()
+        if command_stats:
+            analysis += "=== PROCESSOS EXTERNOS ===\n"
+            for name, stats in sorted(command_stats.items()):
+                analysis += (f"{name}: {stats['spawns']} execuções | cache: {stats['cache_hits']} | "
+                             f"agrupadas: {stats['coalesced']} | timeouts: {stats['timeouts']} | "
+                             f"média: {stats['avg_ms']}ms | máx: {stats['max_ms']:.0f}ms\n")
+            analysis += "\n"
+        
+        # Índice invertido do histórico de probes (sem varrer packets)
+        top_probed = self.inventory.probes.top_ssids(10)
+        if top_probed:
+            analysis += "=== SSIDs MAIS PROCURADOS ===\n"
+            for ssid, clients_count in top_probed:
+                analysis += f"{ssid}: {clients_count} cliente(s)\n"
+            analysis += "\n"
         
         analysis += "=== REDES DETECTADAS ===\n"
         for bssid, info in aps.items():
             ssid = info.get('ssid', 'Desconhecido')
             channel = info.get('channel', '?')
             last_seen = datetime.datetime.fromtimestamp(info.get('last_seen', 0)).strftime('%H:%M:%S')
-            analysis += f"SSID: {ssid}\nBSSID: {bssid}\nCanal: {channel}\nÚltimo sinal: {last_seen}\n\n"
+            analysis += f"SSID: {ssid}\nBSSID: {bssid}\nCanal: {channel}\nÚltimo sinal: {last_seen}\n"
+            if info.get('signal') is not None:
+                analysis += f"Sinal: {info['signal']:.0f}dBm (mín {info['signal_min']} / máx {info['signal_max']})"
+                if info.get('noise') is not None:
+                    analysis += f" | Ruído: {info['noise']:.0f}dBm"
+                analysis += "\n"
+            analysis += "\n"
         
         analysis_window = tk.Toplevel(self.root)
         analysis_window.title("Análise de Redes Sem Fio")
@@ -2269,11 +6297,19 @@ class WirelessMonitorApp:
     def clear_all(self):
         self.packets = []
         self.wireless_devices.clear()
+        self.engine.recount_devices()
         self.network_stats.clear()
-        self.qos_metrics.update({'latency': 0, 'jitter': 0, 'packet_loss': 0, 'last_update': "Nunca", 'status': "Não medito"})
-        self.qos_measurement_count = 0
+        self.qos_metrics.update({'latency': 0, 'jitter': 0, 'packet_loss': 0, 'last_update': "Nunca", 'status': "Não medito",
+                                 'latency_stddev': 0, 'latency_p50': 0, 'latency_p95': 0, 'latency_p99': 0,
+                                 'hops': {}})
+        self.engine.qos_measurement_count = 0
+        self.latency_stats.reset()
+        self.problem_solver.deauth_detector.reset()
+        self.problem_solver.beacon_analyzer.reset()
+        self.problem_solver.airtime.reset()
+        self.sampler.reset()
         self.last_diagnosis = []
-        self.last_qos_before_capture = None
+        self.engine.last_qos_before_capture = None
         self.log_area.delete(1.0, tk.END)
         self.log_area.insert(tk.END, "Todos os dados foram limpos. Pronto para novo monitoramento.\n")
         self.network_count.config(text="Redes detectadas: 0")
@@ -2284,7 +6320,82 @@ class WirelessMonitorApp:
         if self.simulator.simulation_active:
             self.stop_simulation()
 
-if __name__ == "__main__":
+def main(argv=None):
+    """Entrada de linha de comando: GUI (padrão) ou serviço --headless"""
+    parser = argparse.ArgumentParser(description="Monitor de rede sem fio com diagnóstico")
+    parser.add_argument('--headless', action='store_true', help="executa sem interface gráfica (serviço)")
+    parser.add_argument('--iface', help="interface Wi-Fi a monitorar (obrigatória com --headless)")
+    parser.add_argument('--interval', type=int, default=15, help="intervalo entre capturas (s)")
+    parser.add_argument('--duration', type=int, default=15, help="duração de cada captura (s)")
+    parser.add_argument('--qos-interval', type=int, default=60, help="intervalo entre medições QoS (s)")
+    parser.add_argument('--db', default="wireless_monitor.db", help="arquivo SQLite")
+    parser.add_argument('--verbose', action='store_true', help="registra cada quadro capturado no log")
+    parser.add_argument('--metrics-port', type=int, help="expõe métricas Prometheus em :PORTA/metrics")
+    parser.add_argument('--metrics-host', default='127.0.0.1',
+                        help="endereço do endpoint de métricas (0.0.0.0 expõe na rede)")
+    parser.add_argument('--profile', action='store_true',
+                        help="cronometra os estágios do handler (relatório com kill -USR1 ou no encerramento)")
+    parser.add_argument('--benchmark', action='store_true', help="executa a suíte de benchmark e sai")
+    parser.add_argument('--bench-frames', type=int, default=2000, help="quadros por carga no benchmark")
+    parser.add_argument('--bench-output', help="grava o resultado do benchmark em JSON")
+    parser.add_argument('--bench-baseline', help="JSON de referência; sai com código 1 se houver regressão")
+    parser.add_argument('--replay', choices=sorted(NetworkSimulator.REPLAY_SCENARIOS),
+                        help="reproduz quadros sintéticos no lugar do rádio (teste de carga)")
+    parser.add_argument('--replay-rate', type=int, default=2000, help="quadros/s da reprodução (0 = máximo)")
+    parser.add_argument('--replay-duration', type=float, default=60, help="duração da reprodução (s)")
+    parser.add_argument('--replay-aps', type=int, default=2000, help="APs sintéticos distintos")
+    parser.add_argument('--replay-clients', type=int, default=200000, help="MACs de clientes sintéticos distintos")
+    parser.add_argument('--seed', type=int, help="semente do gerador sintético")
+    parser.add_argument('--snapshot-interval', type=int, default=60,
+                        help="intervalo entre instantâneos do estado para partida a quente (s, 0 desativa)")
+    args = parser.parse_args(argv)
+    replay = None
+    if args.replay:
+        replay = {'scenario': args.replay, 'rate': args.replay_rate, 'duration': args.replay_duration,
+                  'ap_count': args.replay_aps, 'client_count': args.replay_clients, 'seed': args.seed}
+    
+    if args.benchmark:
+        benchmark = PipelineBenchmark(frames=args.bench_frames)
+        results = benchmark.run()
+        print(PipelineBenchmark.summary(results))
+        if args.bench_output:
+            with open(args.bench_output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+        if args.bench_baseline:
+            with open(args.bench_baseline, encoding='utf-8') as f:
+                regressions = PipelineBenchmark.compare(json.load(f), results)
+            for item in regressions:
+                print(f"   ⚠️  REGRESSÃO {item['metric']}: {item['baseline']} → {item['current']} "
+                      f"({item['change_percent']:+}%)")
+            return 1 if regressions else 0
+        return 0
+    
+    if args.headless:
+        if not args.iface and not replay:
+            parser.error("--iface é obrigatória no modo --headless (ou use --replay)")
+        engine = MonitorEngine(args.db, log_packets=args.verbose, snapshot_interval=args.snapshot_interval)
+        engine.profiler.set_enabled(args.profile)
+        if args.metrics_port is not None:
+            engine.start_metrics_server(args.metrics_port, args.metrics_host)
+        code = engine.run_headless(args.iface, args.interval, args.duration, args.qos_interval, replay)
+        if args.profile:
+            print(engine.profiler.report())
+        return code
+    
+    if tk is None:
+        parser.error("tkinter indisponível; use --headless")
+    engine = MonitorEngine(args.db, snapshot_interval=args.snapshot_interval)
+    engine.profiler.set_enabled(args.profile)
+    if args.metrics_port is not None:
+        engine.start_metrics_server(args.metrics_port, args.metrics_host)
     root = tk.Tk()
-    app = WirelessMonitorApp(root)
+    app = WirelessMonitorApp(root, engine)
+    if replay:
+        root.after(0, lambda: app.start_replay(**replay))
     root.mainloop()
+    app.engine.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
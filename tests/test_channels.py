@@ -0,0 +1,97 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ajuste_final_07_12 import (  # noqa: E402
+    ChannelAirtimeEstimator, ChannelPlanner, NetworkProblemSolver, channel_info, channel_to_frequency_mhz,
+    frequency_mhz_to_channel)
+
+
+class FrequencyTableTest(unittest.TestCase):
+    """Tabela frequência <-> canal nas bordas de cada banda"""
+
+    def test_24ghz(self):
+        self.assertEqual(frequency_mhz_to_channel(2412), ('2.4', 1))
+        self.assertEqual(frequency_mhz_to_channel(2472), ('2.4', 13))
+        self.assertEqual(frequency_mhz_to_channel(2484), ('2.4', 14))
+
+    def test_5ghz(self):
+        self.assertEqual(frequency_mhz_to_channel(5180), ('5', 36))
+        self.assertEqual(frequency_mhz_to_channel(5825), ('5', 165))
+
+    def test_6ghz(self):
+        self.assertEqual(frequency_mhz_to_channel(5935), ('6', 2))
+        self.assertEqual(frequency_mhz_to_channel(5955), ('6', 1))
+        self.assertEqual(frequency_mhz_to_channel(5975), ('6', 5))
+        self.assertEqual(frequency_mhz_to_channel(7115), ('6', 233))
+
+    def test_unknown(self):
+        self.assertEqual(frequency_mhz_to_channel(2400), (None, 0))
+        self.assertEqual(frequency_mhz_to_channel(0), (None, 0))
+
+    def test_round_trip(self):
+        for mhz in (2412, 2437, 2462, 2484, 5180, 5500, 5825, 5955, 6415, 7115):
+            band, channel = frequency_mhz_to_channel(mhz)
+            self.assertEqual(channel_to_frequency_mhz(channel, band), mhz)
+
+    def test_dfs(self):
+        self.assertFalse(channel_info(36).dfs)
+        self.assertTrue(channel_info(52).dfs)
+        self.assertTrue(channel_info(144).dfs)
+        self.assertFalse(channel_info(149).dfs)
+        self.assertFalse(channel_info(1, '6').dfs)
+
+
+class BandKeyTest(unittest.TestCase):
+    """Canais 1-13 de 6 GHz não se confundem com os de 2.4 GHz"""
+
+    def test_planner_separates_bands(self):
+        planner = ChannelPlanner()
+        planner.update_ap('aa:aa:aa:aa:aa:01', 1, -40, band='6')
+        ranked = {(item['band'], item['channel']): item for item in planner.rank()}
+        self.assertEqual(ranked['6', 1]['networks'], 1)
+        self.assertEqual(ranked['2.4', 1]['networks'], 0)
+        self.assertLess(ranked['2.4', 1]['score'], ranked['6', 1]['score'])
+
+    def test_airtime_separates_bands(self):
+        airtime = ChannelAirtimeEstimator()
+        now = time.time()
+        airtime.record(5, 1500, rate=6.0, capture_time=now, band='6')
+        self.assertIsNone(airtime.utilization(5, now=now))
+        self.assertIsNotNone(airtime.utilization(5, now=now, band='6'))
+        self.assertEqual(list(airtime.utilization_by_channel(now=now)), [('6', 5)])
+
+
+class NonStandardChannelTest(unittest.TestCase):
+    """O relatório de canal não-padrão leva a banda até o texto final"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.solver = NetworkProblemSolver(os.path.join(self.tmpdir, "diag.db"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_detection_by_band(self):
+        self.assertTrue(self.solver._detect_non_standard_channel(3))
+        self.assertTrue(self.solver._detect_non_standard_channel(3, '2.4'))
+        self.assertFalse(self.solver._detect_non_standard_channel(3, '6'))
+        self.assertFalse(self.solver._detect_non_standard_channel(6, '2.4'))
+        self.assertFalse(self.solver._detect_non_standard_channel(14))
+        self.assertFalse(self.solver._detect_non_standard_channel(40))
+
+    def test_report_keeps_band(self):
+        problem = self.solver._generate_non_standard_channel_report(3, '6')
+        self.assertEqual(problem['metrics'], {'channel': 3, 'band': '6'})
+        self.assertNotIn('CANAL NÃO-PADRÃO', self.solver.generate_detailed_report([problem]))
+        problem = self.solver._generate_non_standard_channel_report(3, '2.4')
+        self.assertIn('CANAL NÃO-PADRÃO', self.solver.generate_detailed_report([problem]))
+
+
+if __name__ == '__main__':
+    unittest.main()
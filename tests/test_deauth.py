@@ -0,0 +1,76 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ajuste_final_07_12 import DeauthAttackDetector  # noqa: E402
+
+AP = 'aa:aa:aa:aa:aa:01'
+CLIENT = 'bb:bb:bb:bb:bb:01'
+
+
+class DeauthAttackDetectorTest(unittest.TestCase):
+    """Janela deslizante, histerese e atribuição do ataque"""
+
+    def setUp(self):
+        self.events = []
+        self.detector = DeauthAttackDetector(window_seconds=10, attack_threshold=6, pair_threshold=3,
+                                             on_attack=self.events.append)
+
+    def test_fires_on_threshold_frame(self):
+        for i in range(5):
+            self.assertIsNone(self.detector.record(AP, CLIENT, AP, reason=7, now=100.0 + i * 0.1))
+        self.assertFalse(self.detector.under_attack)
+        event = self.detector.record(AP, CLIENT, AP, reason=7, now=100.6)
+        self.assertEqual(event['event'], 'attack_started')
+        self.assertEqual(event['window_count'], 6)
+        self.assertEqual(event['timestamp'], 100.6)
+        self.assertEqual(event['pairs'][0]['src'], AP)
+        self.assertEqual(event['pairs'][0]['reasons'], {7: 4})
+        self.assertEqual(self.events, [event])
+        # Quadros seguintes não repetem o evento
+        self.assertIsNone(self.detector.record(AP, CLIENT, AP, now=100.7))
+        self.assertEqual(len(self.events), 1)
+
+    def test_ends_below_half_threshold(self):
+        for i in range(6):
+            self.detector.record(AP, CLIENT, AP, now=100.0 + i)  # 1 quadro por segundo, 100..105
+        self.assertTrue(self.detector.under_attack)
+        # Em 111 expiram os segundos 100 e 101: restam 4 (>= 3), ainda em ataque
+        self.assertEqual(self.detector.window_count(now=111.0), 4)
+        self.assertTrue(self.detector.under_attack)
+        # Em 113 restam 2 (< 6 / 2): o ataque termina
+        self.assertEqual(self.detector.window_count(now=113.0), 2)
+        self.assertFalse(self.detector.under_attack)
+        self.assertEqual([e['event'] for e in self.events], ['attack_started', 'attack_ended'])
+        self.assertEqual(self.events[1]['started_at'], 105.0)
+        self.assertEqual(self.events[1]['window_count'], 2)
+
+    def test_window_slides(self):
+        for i in range(4):
+            self.detector.record(AP, CLIENT, AP, now=100.0 + i)
+        self.assertEqual(self.detector.window_count(now=103.5), 4)
+        self.assertEqual(self.detector.window_count(now=110.0), 3)
+        self.assertEqual(self.detector.window_count(now=113.0), 0)
+        self.assertEqual(self.detector.top_pairs(now=113.0), [])
+        # Salto maior que a janela zera tudo de uma vez
+        self.detector.record(AP, CLIENT, AP, now=200.0)
+        self.assertEqual(self.detector.window_count(now=200.0), 1)
+        self.assertEqual(self.events, [])
+
+    def test_random_spoofed_sources(self):
+        rng = random.Random(3)
+        event = None
+        for i in range(6):
+            spoofed = '02' + ''.join(f':{rng.randrange(256):02x}' for _ in range(5))
+            event = self.detector.record(spoofed, f'ff:ff:ff:ff:ff:{i:02x}', AP, now=100.0) or event
+        self.assertEqual(event['event'], 'attack_started')
+        # Nenhum par se repete, mas o BSSID atacado aparece em sources
+        self.assertEqual(event['pairs'], [])
+        self.assertEqual(event['sources'][0], {'kind': 'bssid', 'mac': AP, 'count': 6})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ajuste_final_07_12 import parse_information_elements  # noqa: E402
+
+
+def ie(tag, value):
+    return bytes([tag, len(value)]) + value
+
+
+def rsn(*akms, cipher=4):
+    """RSN com grupo/par CCMP (ou cipher) e as AKMs pedidas"""
+    body = b'\x01\x00' + b'\x00\x0f\xac' + bytes([cipher])
+    body += b'\x01\x00' + b'\x00\x0f\xac' + bytes([cipher])
+    body += bytes([len(akms), 0]) + b''.join(b'\x00\x0f\xac' + bytes([akm]) for akm in akms)
+    return ie(48, body + b'\x00\x00')
+
+
+def ht_operation(primary, secondary_offset):
+    # Byte 1: deslocamento do secundário (bits 0-1) + largura de canal permitida (bit 2)
+    return ie(61, bytes([primary, secondary_offset | (0x04 if secondary_offset else 0)]) + bytes(20))
+
+
+def vht_operation(width, seg0, seg1):
+    return ie(192, bytes([width, seg0, seg1]) + b'\x00\x00')
+
+
+def he_operation_6ghz(primary, control):
+    params = 1 << 17  # Só o 6 GHz Operation Information presente
+    body = bytes([36]) + params.to_bytes(3, 'little') + b'\x00' + b'\xff\xff'
+    return ie(255, body + bytes([primary, control, primary + 2, 0, 0]))
+
+
+class ParseInformationElementsTest(unittest.TestCase):
+    """IEs montados à mão, um caso por linha"""
+
+    def test_table(self):
+        ssid = ie(0, b'Casa')
+        cases = [
+            # (descrição, bytes, privacy, campos esperados)
+            ("SSID oculto (zeros)", ie(0, b'\x00' * 4) + ie(3, b'\x06'), False,
+             {'ssid': "", 'channel': 6, 'width': 20, 'standard': None, 'security': 'Aberta'}),
+            ("SSID oculto (vazio)", ie(0, b'') + ie(3, b'\x01'), False, {'ssid': "", 'channel': 1}),
+            ("HT secundário acima", ssid + ie(3, b'\x24') + ht_operation(36, 1), False,
+             {'ssid': 'Casa', 'channel': 36, 'primary_channel': 36, 'width': 40, 'standard': '802.11n'}),
+            ("HT secundário abaixo", ssid + ie(3, b'\x28') + ht_operation(40, 3), False,
+             {'channel': 40, 'width': 40, 'standard': '802.11n'}),
+            ("HT sem secundário", ssid + ht_operation(11, 0), False,
+             {'channel': 11, 'width': 20, 'standard': '802.11n'}),
+            ("VHT 80", ssid + ht_operation(36, 1) + vht_operation(1, 42, 0), False,
+             {'width': 80, 'standard': '802.11ac'}),
+            ("VHT 160 (seg1 a 8 canais)", ssid + ht_operation(36, 1) + vht_operation(1, 42, 50), False,
+             {'width': 160, 'standard': '802.11ac'}),
+            ("VHT 160 (formato antigo)", ssid + ht_operation(36, 1) + vht_operation(2, 50, 0), False,
+             {'width': 160}),
+            ("HE 6 GHz 160", ssid + he_operation_6ghz(37, 3), False,
+             {'channel': 37, 'primary_channel': 37, 'width': 160, 'standard': '802.11ax'}),
+            ("HE 6 GHz 20", ssid + he_operation_6ghz(1, 0), False,
+             {'channel': 1, 'width': 20, 'standard': '802.11ax'}),
+            ("WPA2", ssid + rsn(2), True, {'security': 'WPA2', 'cipher': 'CCMP'}),
+            ("WPA3", ssid + rsn(8, cipher=8), True, {'security': 'WPA3', 'cipher': 'GCMP'}),
+            ("WPA2/WPA3 transição", ssid + rsn(2, 8), True, {'security': 'WPA2/WPA3'}),
+            ("WPA1", ssid + ie(221, b'\x00\x50\xf2\x01\x01\x00'), True, {'security': 'WPA', 'cipher': 'TKIP'}),
+            ("WEP", ssid, True, {'security': 'WEP', 'cipher': None}),
+            ("Aberta", ssid, False, {'security': 'Aberta', 'cipher': None}),
+            ("Truncado", ssid + ie(3, b'\x06') + bytes([48, 20]) + rsn(2)[2:10], True,
+             {'ssid': 'Casa', 'channel': 6, 'security': 'WEP', 'cipher': None}),
+            ("Só cabeçalho", ssid + b'\x03', False, {'ssid': 'Casa', 'channel': None}),
+        ]
+        for name, data, privacy, expected in cases:
+            with self.subTest(name):
+                info = parse_information_elements(data, privacy=privacy)
+                self.assertEqual({key: info[key] for key in expected}, expected)
+
+    def test_first_ssid_wins(self):
+        info = parse_information_elements(ie(0, b'Casa') + ie(0, b'Outra'))
+        self.assertEqual(info['ssid'], 'Casa')
+
+    def test_empty(self):
+        info = parse_information_elements(b'')
+        self.assertEqual((info['ssid'], info['channel'], info['security']), (None, None, 'Aberta'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ajuste_final_07_12 import InventoryCache, MonitorEngine  # noqa: E402
+
+NOW = 1700000000 - 1700000000 % 60  # Início de um minuto de last_seen
+BSSID = 'aa:aa:aa:aa:aa:01'
+
+
+class InventoryCacheTest(unittest.TestCase):
+    """Linhas sujas e UPSERT em banco temporário"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db = os.path.join(self.tmpdir, "inventory.db")
+        # O engine cria o esquema; o cache testado não tem thread de gravação
+        MonitorEngine(self.db, log_packets=False, snapshot_interval=0)
+        self.cache = InventoryCache(self.db)
+        self.ap = {'type': 'AP', 'ssid': 'Casa', 'channel': 6, 'signal': -50.0, 'security': 'WPA2'}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _ap_rows(self):
+        conn = sqlite3.connect(self.db)
+        rows = conn.execute("SELECT id, bssid, ssid, channel, signal_strength FROM access_points").fetchall()
+        conn.close()
+        return rows
+
+    def test_identical_updates_stay_clean(self):
+        self.cache.touch_ap(BSSID, self.ap, NOW)
+        self.assertEqual(self.cache.flush(), 1)
+        # Mesmo estado e mesmo minuto de last_seen: nada a gravar
+        for second in range(59):
+            self.cache.touch_ap(BSSID, dict(self.ap), NOW + second)
+        self.assertEqual(self.cache.dirty, {'ap': {}, 'client': {}})
+        self.assertEqual(self.cache.flush(), 0)
+        self.assertEqual(self.cache.updates_seen, 60)
+        self.assertEqual(self.cache.rows_written, 1)
+
+    def test_change_then_revert_is_clean(self):
+        self.cache.touch_ap(BSSID, self.ap, NOW)
+        self.cache.flush()
+        self.cache.touch_ap(BSSID, dict(self.ap, channel=11), NOW)
+        self.assertIn(BSSID, self.cache.dirty['ap'])
+        self.cache.touch_ap(BSSID, self.ap, NOW)
+        self.assertEqual(self.cache.flush(), 0)
+
+    def test_upsert_keeps_row_id(self):
+        self.cache.touch_ap(BSSID, self.ap, NOW)
+        self.cache.touch_ap('aa:aa:aa:aa:aa:02', dict(self.ap, ssid='Vizinho'), NOW)
+        self.cache.flush()
+        ids = {bssid: row_id for row_id, bssid, *_ in self._ap_rows()}
+
+        self.cache.touch_ap(BSSID, dict(self.ap, channel=11, signal=-61.0), NOW + 60)
+        self.assertEqual(self.cache.flush(), 1)
+        rows = {bssid: (row_id, ssid, channel, signal) for row_id, bssid, ssid, channel, signal in self._ap_rows()}
+        self.assertEqual(rows[BSSID], (ids[BSSID], 'Casa', 11, -61))
+        self.assertEqual(len(rows), 2)
+
+    def test_concurrent_updates_are_counted(self):
+        def worker(offset):
+            for i in range(2000):
+                self.cache.touch_client(f'bb:bb:bb:bb:{offset:02x}:{i % 50:02x}', {'signal': -70.0}, NOW)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for _ in range(5):
+            self.cache.flush()
+        for thread in threads:
+            thread.join()
+        self.cache.flush()
+        self.assertEqual(self.cache.updates_seen, 8000)
+        conn = sqlite3.connect(self.db)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM clients").fetchone()[0], 200)
+        conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import random
+import statistics
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ajuste_final_07_12 import LatencyHistogram, StreamingLatencyStats  # noqa: E402
+
+
+class StreamingLatencyStatsTest(unittest.TestCase):
+    """Janela deslizante comparada com o cálculo direto sobre as amostras"""
+
+    def test_welford_removal_matches_statistics(self):
+        rng = random.Random(11)
+        stats = StreamingLatencyStats(window_size=50)
+        window = []
+        for i in range(1000):
+            rtt = None if i % 17 == 0 else rng.lognormvariate(3, 0.6)
+            stats.record(rtt)
+            window = (window + [rtt])[-50:]
+            values = [v for v in window if v is not None]
+            if len(values) > 1:
+                self.assertAlmostEqual(stats.mean, statistics.mean(values), places=6)
+                self.assertAlmostEqual(stats.variance, statistics.variance(values), places=4)
+            self.assertEqual(stats.count, len(values))
+            self.assertAlmostEqual(stats.packet_loss, (len(window) - len(values)) / len(window) * 100)
+
+    def test_rfc3550_jitter(self):
+        stats = StreamingLatencyStats(window_size=10)
+        for rtt in (10.0, 20.0, None, 10.0, 20.0):
+            stats.record(rtt)
+        # J(i) = J(i-1) + (|D(i-1, i)| - J(i-1)) / 16, com |D| = 10 em todas as transições;
+        # o pacote perdido não interrompe a sequência
+        expected = 0.0
+        for _ in range(3):
+            expected += (10.0 - expected) / 16
+        self.assertAlmostEqual(stats.jitter, expected)
+        self.assertAlmostEqual(stats.jitter, 1.76025390625)
+
+    def test_percentiles_follow_window_exactly(self):
+        stats = StreamingLatencyStats(window_size=10)
+        for _ in range(10):
+            stats.record(500.0)
+        for _ in range(9):
+            stats.record(5.0)
+        # Uma única amostra de 500 ms restante domina o p99, mas não o p50
+        self.assertGreaterEqual(stats.percentile(99), 500.0)
+        self.assertLess(stats.percentile(50), 5.0 * 1.07)
+        stats.record(5.0)
+        self.assertLess(stats.percentile(99), 5.0 * 1.07)
+        self.assertEqual(stats._histogram.total, 10)
+
+    def test_reset(self):
+        stats = StreamingLatencyStats(window_size=5)
+        for rtt in (1.0, None, 3.0):
+            stats.record(rtt)
+        stats.reset()
+        self.assertEqual(stats.snapshot()['samples'], 0)
+        self.assertEqual(stats.percentile(95), 0)
+
+
+class LatencyHistogramTest(unittest.TestCase):
+
+    def test_remove_undoes_record(self):
+        hist = LatencyHistogram()
+        for value in (0.05, 1.0, 42.0, 9000.0):
+            hist.record(value)
+        for value in (0.05, 1.0, 42.0, 9000.0):
+            hist.remove(value)
+        self.assertEqual(hist.total, 0)
+        self.assertFalse(any(hist.counts))
+        hist.remove(42.0)  # Remover o que não existe não deixa contagem negativa
+        self.assertEqual(hist.total, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
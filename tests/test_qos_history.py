@@ -0,0 +1,75 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ajuste_final_07_12 import QoSHistoryArchive  # noqa: E402
+
+BASE = 1700000000 - 1700000000 % 86400  # Início de um dia: todos os arquivos alinhados
+
+
+class QoSHistoryArchiveTest(unittest.TestCase):
+    """Arquivo round-robin em banco temporário"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db = os.path.join(self.tmpdir, "rrd.db")
+        self.archive = QoSHistoryArchive(self.db)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _rows(self, archive):
+        conn = sqlite3.connect(self.db)
+        rows = conn.execute("SELECT slot, bucket_start, count FROM qos_rrd "
+                            "WHERE metric = 'latency' AND archive = ? ORDER BY slot", (archive,)).fetchall()
+        conn.close()
+        return rows
+
+    def test_slot_wraparound(self):
+        # raw: passo 10 s, 360 linhas -> o mesmo slot volta a cada hora
+        self.archive.update({'latency': 10}, timestamp=BASE + 5)
+        self.archive.update({'latency': 20}, timestamp=BASE + 15)
+        self.archive.update({'latency': 30}, timestamp=BASE + 3605)
+        self.archive.flush()
+        # O bucket de BASE + 3600 sobrescreve o de BASE no slot 0
+        self.assertEqual(self._rows('raw'), [(0, BASE + 3600, 1), (1, BASE + 10, 1)])
+        rows = self.archive.fetch('latency', BASE, BASE + 7200, archive='raw')
+        self.assertEqual([(start, avg) for start, avg, *_ in rows], [(BASE + 10, 20.0), (BASE + 3600, 30.0)])
+
+    def test_batched_flush(self):
+        for i in range(30):
+            self.archive.update({'latency': 10 + i, 'jitter': 1}, timestamp=BASE + i)
+        # update() só consolida em memória
+        self.assertEqual(self._rows('raw'), [])
+        # 2 buckets raw fechados de latency e 2 de jitter, mais os 4 arquivos abertos de cada métrica
+        self.assertEqual(self.archive.flush(), 12)
+        self.assertEqual(self.archive.flush(), 0)
+        self.assertEqual([count for _, _, count in self._rows('raw')], [10, 10, 10])
+        self.assertEqual(self._rows('1h'), [(BASE // 3600 % 720, BASE, 30)])
+
+    def test_p95_survives_restart(self):
+        for i in range(20):
+            self.archive.update({'latency': i + 1}, timestamp=BASE + i * 60)
+        self.archive.flush()
+
+        # Novo processo no meio da mesma hora: o bucket é retomado com o histograma
+        restarted = QoSHistoryArchive(self.db)
+        restarted.update({'latency': 500}, timestamp=BASE + 1800)
+        restarted.flush()
+        [(start, avg, low, high, p95)] = restarted.fetch('latency', BASE, BASE + 3599, archive='1h')
+        self.assertEqual(start, BASE)
+        self.assertEqual((low, high), (1, 500))
+        self.assertAlmostEqual(avg, (sum(range(1, 21)) + 500) / 21)
+        # p95 de 21 amostras é a 20ª (20 ms); sem o histograma seria 500
+        self.assertGreaterEqual(p95, 20)
+        self.assertLess(p95, 21)
+        self.assertEqual(self._rows('1h'), [(BASE // 3600 % 720, BASE, 21)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ajuste_final_07_12 import StateSnapshot  # noqa: E402
+
+
+class StateSnapshotTest(unittest.TestCase):
+    """Ida e volta do instantâneo binário"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "state.snapshot")
+        self.now = time.time()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _devices(self):
+        return {
+            'aa:bb:cc:dd:ee:01': {'type': 'AP', 'ssid': 'Casa', 'band': '6', 'channel': 5, 'width': 160,
+                                  'security': 'WPA3', 'signal': -52.123456789, 'noise': -95.25, 'rate': 1200.5,
+                                  'signal_min': -60, 'signal_max': -40, 'last_seen': self.now - 5, 'frames': 2 ** 40},
+            'aa:bb:cc:dd:ee:02': {'type': 'Client', 'probed_ssid': 'Casa', 'signal': -70.1,
+                                  'last_seen': self.now - 1, 'frames': 3},
+            # Chave fora do formato MAC, valor None e campo fora do esquema vão pelo caminho lento
+            'Desconhecido': {'type': 'Client', 'ssid': None, 'vendor': 'Acme', 'last_seen': self.now},
+        }
+
+    def test_round_trip(self):
+        devices = self._devices()
+        snapshot = StateSnapshot(self.path)
+        self.assertEqual(snapshot.save(devices, {'beacon_count': 7}, {'ssid': 'Casa', 'band': '6'}), 3)
+        loaded = StateSnapshot(self.path).load(now=self.now)
+        self.assertEqual(loaded['devices'], devices)
+        self.assertEqual(loaded['network_stats'], {'beacon_count': 7})
+        self.assertEqual(loaded['wifi_info'], {'ssid': 'Casa', 'band': '6'})
+
+    def test_max_age(self):
+        snapshot = StateSnapshot(self.path, max_age=3)
+        snapshot.save(self._devices(), {}, {})
+        devices = snapshot.load(now=self.now)['devices']
+        self.assertEqual(set(devices), {'aa:bb:cc:dd:ee:02', 'Desconhecido'})
+        self.assertEqual(snapshot.load(now=self.now + 10)['devices'], {})
+
+    def test_rejects_previous_format(self):
+        with open(self.path, 'wb') as f:
+            f.write(b"WMSNAP\x00\x02")
+            f.write(StateSnapshot.HEADER.pack(self.now, 2, 2))
+            f.write(b"{}[]")
+        self.assertIsNone(StateSnapshot(self.path).load())
+
+    def test_truncated_file(self):
+        snapshot = StateSnapshot(self.path)
+        snapshot.save(self._devices(), {}, {})
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 8)
+        self.assertIsNone(snapshot.load(now=self.now))
+
+    def test_missing_file(self):
+        self.assertIsNone(StateSnapshot(self.path).load())
+
+
+if __name__ == '__main__':
+    unittest.main()